@@ -0,0 +1,291 @@
+"""
+Benchmarks for every pipeline stage on synthetic datasets.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_pipeline --sizes 1e3,1e4,1e5 --output bench_results.json
+    python -m benchmarks.bench_pipeline --sizes 1e5 --compare baseline.json --threshold 0.2
+
+Each stage is timed (best of --repeat runs) and then run once more under tracemalloc to
+record its peak allocation. Results are written as JSON; with --compare, results slower or
+hungrier than the baseline by more than --threshold are reported and the exit code is 1.
+Sizes up to 1e7 rows work, but list-of-dict stages need several GB of memory at that scale.
+"""
+import argparse
+import csv
+import datetime
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional
+
+import numpy as np
+
+from src.data_processing.loader import DataLoader
+from src.data_processing.parser import DataParser, parse_raw_data, validate_record, VALID_CATEGORIES
+from src.data_processing.schema import DEFAULT_SCHEMA
+from src.calculations import core
+from src.calculations.windowing import iter_windows
+from src.reporting.generator import ReportGenerator
+from src.utils.math_utils import Vector2D, Vector2DArray
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_THRESHOLD = 0.2
+# Timings below this are dominated by noise and never flagged as regressions
+MIN_COMPARABLE_SECONDS = 0.001
+
+CATEGORIES = sorted(VALID_CATEGORIES) + ["fruit", "Snacks"] # Includes some that need normalizing
+
+def iter_raw_records(rows: int, seed: int = 42, invalid_fraction: float = 0.01) -> Iterator[Dict[str, str]]:
+    """Synthetic raw (string) records as a CSV source yields them, with a small share of bad rows."""
+    rng = random.Random(seed)
+    start = datetime.datetime(2023, 1, 1)
+    for i in range(rows):
+        record = {
+            'id': str(i + 1),
+            'name': f" Item {rng.randrange(10_000)}! ",
+            'value': f"{rng.uniform(-500, 5000):.2f}",
+            'category': rng.choice(CATEGORIES),
+            'timestamp': (start + datetime.timedelta(seconds=i)).isoformat(),
+        }
+        if rng.random() < invalid_fraction:
+            record['value'] = rng.choice(["n/a", "", "20000"])
+        yield record
+
+def generate_raw_records(rows: int, seed: int = 42, invalid_fraction: float = 0.01) -> List[Dict[str, str]]:
+    return list(iter_raw_records(rows, seed, invalid_fraction))
+
+def write_csv(records: Iterable[Dict[str, str]], path: str) -> None:
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['id', 'name', 'value', 'category', 'timestamp'])
+        writer.writeheader()
+        writer.writerows(records)
+
+class Dataset:
+    """
+    Inputs for one dataset size, built lazily so only the stages being run pay for them.
+    The CSV file is written row by row and the parsed inputs are read back from it, so the
+    raw records are only held in memory for the stages that take them.
+    """
+    def __init__(self, rows: int, workdir: str):
+        self.rows = rows
+        self.workdir = workdir
+        self._cache: Dict[str, Any] = {}
+
+    def _get(self, key: str, build: Callable[[], Any]) -> Any:
+        if key not in self._cache:
+            self._cache[key] = build()
+        return self._cache[key]
+
+    @property
+    def raw(self) -> List[Dict[str, str]]:
+        return self._get('raw', lambda: generate_raw_records(self.rows))
+
+    @property
+    def csv_path(self) -> str:
+        def build():
+            path = os.path.join(self.workdir, f"data_{self.rows}.csv")
+            write_csv(iter_raw_records(self.rows), path)
+            return path
+        return self._get('csv_path', build)
+
+    @property
+    def parsed(self) -> List[Dict[str, Any]]:
+        return self._get('parsed', lambda: DataParser().parse(self.csv_path))
+
+    @property
+    def parsed_copy(self) -> List[Dict[str, Any]]:
+        """Copies of the parsed records for stages that modify records in place."""
+        return self._get('parsed_copy', lambda: [dict(record) for record in self.parsed])
+
+    @property
+    def batch(self):
+        return self._get('batch', lambda: DataParser().parse(self.csv_path, columnar=True, vectorized=True))
+
+    @property
+    def vectors(self) -> List[Vector2D]:
+        return self._get('vectors', lambda: [Vector2D(r['value'], r['id']) for r in self.parsed])
+
+    @property
+    def vector_array(self) -> Vector2DArray:
+        return self._get('vector_array', lambda: Vector2DArray(self.batch.values, self.batch.ids))
+
+def _validate_all(records: List[Dict[str, Any]]) -> None:
+    for record in records:
+        validate_record(record)
+
+# Stage name -> callable taking a Dataset. Inputs are built before timing starts.
+BENCHMARKS: Dict[str, Callable[[Dataset], Any]] = {
+    'DataLoader.load': lambda d: DataLoader(d.csv_path).load(),
+    'parse_raw_data': lambda d: parse_raw_data(d.raw),
+    'parse_raw_data[vectorized]': lambda d: parse_raw_data(d.raw, columnar=True, vectorized=True),
+    'validate_record': lambda d: _validate_all(d.parsed),
+    'CompiledValidator.validate_batch': lambda d: DEFAULT_SCHEMA.validator.validate_batch(d.parsed),
+    'calculate_total_value': lambda d: core.calculate_total_value(d.parsed),
+    'calculate_total_value[batch]': lambda d: core.calculate_total_value(d.batch),
+    'calculate_weighted_average': lambda d: core.calculate_weighted_average(d.parsed),
+    'calculate_weighted_average[batch]': lambda d: core.calculate_weighted_average(d.batch),
+    'calculate_value_statistics': lambda d: core.calculate_value_statistics(d.parsed),
+    'calculate_value_statistics[batch]': lambda d: core.calculate_value_statistics(d.batch),
+    'find_most_common_categories': lambda d: core.find_most_common_categories(d.parsed),
+    'find_most_common_categories[batch]': lambda d: core.find_most_common_categories(d.batch),
+    'find_most_common_categories[approximate]': lambda d: core.find_most_common_categories(d.parsed, approximate=True),
+    'aggregate_by_group': lambda d: core.aggregate_by_group(d.parsed, 'category'),
+    'aggregate_by_group[batch]': lambda d: core.aggregate_by_group(d.batch, 'category'),
+    'iter_windows[hour]': lambda d: list(iter_windows([d.parsed], 'hour')),
+    'iter_windows[hour][batch]': lambda d: list(iter_windows([d.batch], 'hour')),
+    'AdvancedCalculator.transform_values': lambda d: core.AdvancedCalculator(1.5).transform_values(d.parsed_copy),
+    'AdvancedCalculator.transform_values[batch]': lambda d: core.AdvancedCalculator(1.5).transform_values(d.batch),
+    'AdvancedCalculator.calculate_vector_sum': lambda d: core.AdvancedCalculator().calculate_vector_sum(d.vectors),
+    'AdvancedCalculator.calculate_vector_sum[array]': lambda d: core.AdvancedCalculator().calculate_vector_sum(d.vector_array),
+    'ReportGenerator.generate_summary_report': lambda d: ReportGenerator(d.csv_path).generate_summary_report(),
+}
+
+# Inputs each stage reads, so they are built outside the timed region
+_STAGE_INPUTS = {
+    'DataLoader.load': ('csv_path',),
+    'ReportGenerator.generate_summary_report': ('csv_path',),
+    'parse_raw_data': ('raw',),
+    'parse_raw_data[vectorized]': ('raw',),
+    'AdvancedCalculator.transform_values': ('parsed_copy',),
+    'AdvancedCalculator.calculate_vector_sum': ('vectors',),
+    'AdvancedCalculator.calculate_vector_sum[array]': ('vector_array',),
+}
+
+def _prepare(name: str, dataset: Dataset) -> None:
+    default = ('batch',) if name.endswith('[batch]') else ('parsed',)
+    for attribute in _STAGE_INPUTS.get(name, default):
+        getattr(dataset, attribute)
+
+def measure(func: Callable[[], Any], repeat: int = 3) -> Dict[str, float]:
+    """Best wall time over `repeat` runs, then the tracemalloc peak of one extra run."""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': min(timings), 'peak_bytes': peak}
+
+def run_benchmarks(sizes=DEFAULT_SIZES, stages: Optional[List[str]] = None, repeat: int = 3,
+                   progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """Runs the selected stages for each size and returns the results document."""
+    stages = stages or list(BENCHMARKS)
+    unknown = [name for name in stages if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmark stages: {unknown}")
+
+    results = []
+    previous_disable = logging.root.manager.disable
+    logging.disable(logging.WARNING) # Per-record log lines would dominate the timings
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for rows in sizes:
+                dataset = Dataset(int(rows), workdir)
+                for name in stages:
+                    _prepare(name, dataset)
+                    metrics = measure(lambda: BENCHMARKS[name](dataset), repeat=repeat)
+                    result = {
+                        'benchmark': name,
+                        'rows': int(rows),
+                        'seconds': metrics['seconds'],
+                        'rows_per_second': int(rows) / metrics['seconds'] if metrics['seconds'] else None,
+                        'peak_bytes': metrics['peak_bytes'],
+                    }
+                    results.append(result)
+                    if progress:
+                        progress(f"{name:<48} {int(rows):>10,} rows  {metrics['seconds'] * 1000:>10.2f} ms  {metrics['peak_bytes'] / 2**20:>9.2f} MiB")
+    finally:
+        logging.disable(previous_disable)
+
+    return {
+        'meta': {
+            'created_at': datetime.datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Returns one entry per metric that got worse than the baseline by more than threshold
+    (a fraction, 0.2 = 20%). Only (benchmark, rows) pairs present in both documents are compared.
+    """
+    baseline_index = {(r['benchmark'], r['rows']): r for r in baseline.get('results', [])}
+    regressions = []
+    for result in current.get('results', []):
+        base = baseline_index.get((result['benchmark'], result['rows']))
+        if base is None:
+            continue
+        for metric in ('seconds', 'peak_bytes'):
+            old, new = base.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            if metric == 'seconds' and max(old, new) < MIN_COMPARABLE_SECONDS:
+                continue
+            change = (new - old) / old
+            if change > threshold:
+                regressions.append({
+                    'benchmark': result['benchmark'],
+                    'rows': result['rows'],
+                    'metric': metric,
+                    'baseline': old,
+                    'current': new,
+                    'change': change,
+                })
+    return regressions
+
+def _parse_sizes(text: str) -> List[int]:
+    return [int(float(size)) for size in text.split(',') if size.strip()]
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on synthetic data.")
+    arg_parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES), help="Comma-separated row counts, e.g. 1e3,1e5,1e7")
+    arg_parser.add_argument('--stages', default=None, help="Comma-separated stage names (default: all)")
+    arg_parser.add_argument('--repeat', type=int, default=3, help="Timed runs per stage; the best one is kept")
+    arg_parser.add_argument('--output', default='bench_results.json', help="Where to write the JSON results")
+    arg_parser.add_argument('--compare', default=None, help="Baseline JSON to check for regressions")
+    arg_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown/memory growth as a fraction")
+    arg_parser.add_argument('--list', action='store_true', help="List the stage names and exit")
+    args = arg_parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return 0
+
+    stages = [s.strip() for s in args.stages.split(',')] if args.stages else None
+    document = run_benchmarks(_parse_sizes(args.sizes), stages=stages, repeat=args.repeat, progress=print)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2)
+    print(f"Wrote {len(document['results'])} results to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(document, baseline, args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['benchmark']} @ {r['rows']:,} rows: {r['metric']} {r['baseline']:.6g} -> {r['current']:.6g} ({r['change']:+.0%})")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.compare}.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,449 @@
+from typing import List, Dict, Any, Hashable, Sequence, Tuple, Optional, TYPE_CHECKING
+from collections import Counter
+import datetime
+import math
+
+import numpy as np
+
+from src.utils.helpers import setup_logger
+from src.data_processing.record_batch import RecordBatch
+from .core import Records, GroupKey, numeric_column, group_moments, group_statistics
+from .sketches import SpaceSaving, TDigest, DEFAULT_QUANTILES
+
+if TYPE_CHECKING:
+    from .external import ExactQuantiles
+
+logger = setup_logger(__name__)
+
+# Per-group moments kept by GroupAggregator, in list order
+_MOMENTS = ('count', 'total', 'min', 'max', 'mean', 'm2', 'weight_sum', 'weighted_sum')
+
+def _record_to_state(record: Dict[str, Any]) -> List[List[Any]]:
+    """JSON-friendly [key, value] pairs of a parsed record; datetimes get a third 'datetime' tag."""
+    return [[key, value.isoformat(), 'datetime'] if isinstance(value, datetime.datetime) else [key, value]
+            for key, value in record.items()]
+
+def _record_from_state(pairs: List[List[Any]]) -> Dict[str, Any]:
+    return {pair[0]: datetime.datetime.fromisoformat(pair[1]) if len(pair) == 3 else pair[1] for pair in pairs}
+
+def _running_sum(start: float, values: np.ndarray) -> float:
+    """start + values[0] + values[1] + ..., added left to right like a loop over the values."""
+    return float(np.cumsum(np.concatenate(([start], values)))[-1]) if len(values) else start
+
+def _merge_moments(moments: List[float], partial: List[float]) -> None:
+    """Folds one group's partial moments into its running moments (both ordered as _MOMENTS)."""
+    count, other_count = moments[0], partial[0]
+    if other_count:
+        combined = count + other_count
+        delta = partial[4] - moments[4]
+        moments[4] += delta * other_count / combined
+        moments[5] += partial[5] + delta * delta * count * other_count / combined
+        moments[0] = combined
+        moments[1] += partial[1]
+        moments[2] = min(moments[2], partial[2])
+        moments[3] = max(moments[3], partial[3])
+        moments[6] += partial[6]
+        moments[7] += partial[7]
+
+class GroupAggregator:
+    """
+    Streaming, mergeable form of aggregate_by_group: keeps count, total, min, max, mean, m2 and
+    weight sums per group, and combines batches with the parallel (Chan et al.) variance update.
+    Results match aggregate_by_group over all the data seen.
+    """
+    def __init__(self, key: GroupKey = 'category', value_key: str = 'value', weight_key: str = 'id'):
+        self.key = key
+        self.value_key = value_key
+        self.weight_key = weight_key
+        self.groups: Dict[Hashable, List[float]] = {} # Group key -> moments, ordered as _MOMENTS
+
+    def update(self, record: Dict[str, Any]) -> None:
+        """Folds a single record into its group."""
+        if callable(self.key):
+            group = self.key(record)
+        elif self.key in record:
+            group = record[self.key]
+        else:
+            return
+        moments = self.groups.setdefault(group, [0, 0.0, math.inf, -math.inf, 0.0, 0.0, 0.0, 0.0])
+        value = record.get(self.value_key)
+        if not isinstance(value, (int, float)):
+            return
+        moments[0] += 1
+        moments[1] += value
+        moments[2] = min(moments[2], value)
+        moments[3] = max(moments[3], value)
+        delta = value - moments[4]
+        moments[4] += delta / moments[0]
+        moments[5] += delta * (value - moments[4])
+        weight = record.get(self.weight_key)
+        if isinstance(weight, (int, float)):
+            moments[6] += weight
+            moments[7] += value * weight
+
+    def update_many(self, data: Records) -> 'GroupAggregator':
+        """Aggregates a list of records or a RecordBatch with one vectorized group-by, then merges it in."""
+        if len(data):
+            keys, moments = group_moments(data, self.key, self.value_key, self.weight_key)
+            columns = [moments[field].tolist() for field in _MOMENTS]
+            for group, partial in zip(keys, zip(*columns)):
+                self._merge_group(group, list(partial))
+        return self
+
+    def _merge_group(self, group: Hashable, partial: List[float]) -> None:
+        moments = self.groups.get(group)
+        if moments is None:
+            self.groups[group] = partial
+        else:
+            _merge_moments(moments, partial)
+
+    def merge(self, other: 'GroupAggregator') -> 'GroupAggregator':
+        for group, partial in other.groups.items():
+            self._merge_group(group, list(partial))
+        return self
+
+    def results(self) -> Dict[Hashable, Dict[str, float]]:
+        """Per-group statistics, as returned by aggregate_by_group."""
+        return {group: group_statistics(m[0], m[1], m[2], m[3], m[5], m[6], m[7]) for group, m in self.groups.items()}
+
+    def to_state(self) -> Dict[str, Any]:
+        """JSON-serializable state; only available when grouping by a field name."""
+        if callable(self.key):
+            raise ValueError("A GroupAggregator with a derived key cannot be serialized")
+        return {
+            'key': self.key,
+            'value_key': self.value_key,
+            'weight_key': self.weight_key,
+            # Pairs rather than a mapping so non-string keys and first-seen order survive JSON
+            'groups': [[group, [m if math.isfinite(m) else None for m in moments]] for group, moments in self.groups.items()],
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'GroupAggregator':
+        aggregator = cls(state['key'], state['value_key'], state['weight_key'])
+        for group, moments in state['groups']:
+            # Unset min/max of groups without numeric values are stored as None
+            moments[2] = math.inf if moments[2] is None else moments[2]
+            moments[3] = -math.inf if moments[3] is None else moments[3]
+            aggregator.groups[group] = moments
+        return aggregator
+
+    def __len__(self) -> int:
+        return len(self.groups)
+
+    def __repr__(self) -> str:
+        return f"<GroupAggregator key={getattr(self.key, '__name__', self.key)!r} groups={len(self.groups)}>"
+
+class SummaryAggregator:
+    """
+    Computes everything the summary report needs in a single pass over the data.
+    Tracks the value sum, weighted sum, min, max, sums of values shifted by the first value
+    (for the variance), a t-digest of the values (for the quantiles) and category counts, so
+    no intermediate value or category lists are built.
+    Records and RecordBatches are accumulated the same way (sums are added in record order),
+    so the results do not depend on how the data is batched. They agree with
+    calculate_total_value, calculate_weighted_average, calculate_value_statistics and
+    find_most_common_categories up to floating-point rounding; aggregators built separately
+    and merged agree with a single pass to the same precision.
+    With category_error_rate set, categories are counted in a bounded Space-Saving sketch
+    instead of an exact Counter (see find_most_common_categories(approximate=True)).
+    With group_key set, per-group statistics (see aggregate_by_group) are kept in a GroupAggregator.
+    exact_quantiles are computed exactly (see ExactQuantiles) and replace the t-digest estimates.
+    The first record folded in is kept as sample_record (the report shows it transformed).
+    With memory_budget (bytes) set, group state and exact-quantile values beyond the budget are
+    spilled to temporary files under spill_dir; the results are the same as without a budget.
+    """
+    def __init__(self, value_key: str = 'value', weight_key: str = 'id', category_key: str = 'category',
+                 category_error_rate: Optional[float] = None, quantiles: Sequence[float] = DEFAULT_QUANTILES,
+                 group_key: Optional[str] = None, exact_quantiles: Sequence[float] = (),
+                 memory_budget: Optional[int] = None, spill_dir: Optional[str] = None):
+        self.value_key = value_key
+        self.weight_key = weight_key
+        self.category_key = category_key
+        self.category_error_rate = category_error_rate
+        self.quantiles = tuple(quantiles)
+        self.group_key = group_key
+        self.exact_quantiles = tuple(exact_quantiles)
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+
+        self.records = 0            # Records seen, valid or not
+        self.count = 0              # Records with a numeric value
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.shift = 0.0            # First numeric value; the variance is computed from values minus it
+        self.shifted_total = 0.0
+        self.shifted_squares = 0.0
+        self.value_digest = TDigest()
+
+        self.weighted_sum = 0.0
+        self.weight_sum = 0.0
+        self.weighted_count = 0
+        self.sample_record: Optional[Dict[str, Any]] = None
+
+        self.category_counts: Counter = Counter()
+        self.category_sketch: Optional[SpaceSaving] = SpaceSaving(error_rate=category_error_rate) if category_error_rate else None
+        self.groups: Optional[GroupAggregator] = None
+        self.exact: Optional['ExactQuantiles'] = None
+        if memory_budget is None:
+            self.groups = GroupAggregator(group_key, value_key, weight_key) if group_key else None
+            self.exact = self._new_exact_quantiles(None) if self.exact_quantiles else None
+        elif group_key or self.exact_quantiles:
+            # Imported on demand: spilling is only needed with a memory budget
+            from .external import SpillingGroupAggregator
+            share = memory_budget // (bool(group_key) + bool(self.exact_quantiles)) # Split between the spilling parts
+            if group_key:
+                self.groups = SpillingGroupAggregator(group_key, value_key, weight_key, memory_budget=share, spill_dir=spill_dir)
+            if self.exact_quantiles:
+                self.exact = self._new_exact_quantiles(share)
+
+    def _new_exact_quantiles(self, memory_budget: Optional[int]) -> 'ExactQuantiles':
+        from .external import ExactQuantiles
+        return ExactQuantiles(memory_budget=memory_budget, spill_dir=self.spill_dir)
+
+    def update(self, record: Dict[str, Any]) -> None:
+        """Folds a single record into the running aggregates."""
+        self._fold(record)
+        if self.groups is not None:
+            self.groups.update(record)
+
+    def _fold(self, record: Dict[str, Any]) -> None:
+        self.records += 1
+        if self.sample_record is None:
+            self.sample_record = dict(record)
+        value = record.get(self.value_key)
+        if isinstance(value, (int, float)):
+            self.count += 1
+            self.total += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+            if self.count == 1:
+                self.shift = float(value)
+            shifted = value - self.shift
+            self.shifted_total += shifted
+            self.shifted_squares += shifted * shifted
+            self.value_digest.update(value)
+            if self.exact is not None:
+                self.exact.update(value)
+
+            weight = record.get(self.weight_key)
+            if isinstance(weight, (int, float)):
+                self.weighted_sum += value * weight
+                self.weight_sum += weight
+                self.weighted_count += 1
+
+        if self.category_key in record:
+            if self.category_sketch is not None:
+                self.category_sketch.update(record[self.category_key])
+            else:
+                self.category_counts[record[self.category_key]] += 1
+
+    def update_many(self, data: Records) -> 'SummaryAggregator':
+        """Folds a list of records or a RecordBatch into the running aggregates."""
+        if isinstance(data, RecordBatch):
+            self._fold_batch(data)
+        else:
+            for record in data:
+                self._fold(record)
+        if self.groups is not None:
+            self.groups.update_many(data)
+        return self
+
+    def _fold_batch(self, batch: RecordBatch) -> None:
+        """Vectorized _fold over a columnar batch, giving the same results as folding its records."""
+        self.records += len(batch)
+        if not len(batch):
+            return
+        if self.sample_record is None:
+            self.sample_record = batch.slice(0, 1).to_records()[0]
+
+        values = numeric_column(batch, self.value_key)
+        if values is not None:
+            if not self.count:
+                self.shift = float(values[0])
+            self.count += len(values)
+            self.total = _running_sum(self.total, values)
+            low, high = float(values.min()), float(values.max())
+            self.min = low if self.min is None else min(self.min, low)
+            self.max = high if self.max is None else max(self.max, high)
+            shifted = values - self.shift
+            self.shifted_total = _running_sum(self.shifted_total, shifted)
+            self.shifted_squares = _running_sum(self.shifted_squares, shifted * shifted)
+            self.value_digest.update_many(values)
+            if self.exact is not None:
+                self.exact.update_many(values)
+
+            weights = numeric_column(batch, self.weight_key)
+            if weights is not None:
+                self.weighted_sum = _running_sum(self.weighted_sum, values * weights)
+                self.weight_sum = _running_sum(self.weight_sum, weights)
+                self.weighted_count += len(weights)
+
+        if self.category_key == 'category':
+            counts = batch.category_counts()
+        else:
+            column = batch.column(self.category_key)
+            counts = Counter(column.tolist()) if column is not None else Counter()
+        if self.category_sketch is not None:
+            self.category_sketch.update_counts(counts)
+        else:
+            self.category_counts.update(counts)
+
+    def merge(self, other: 'SummaryAggregator') -> 'SummaryAggregator':
+        """Combines another aggregator's state into this one, rebasing its shifted sums onto this shift."""
+        if other.count:
+            if self.count:
+                offset = other.shift - self.shift
+                self.shifted_squares += other.shifted_squares + 2 * offset * other.shifted_total + other.count * offset * offset
+                self.shifted_total += other.shifted_total + other.count * offset
+                self.min = min(self.min, other.min)
+                self.max = max(self.max, other.max)
+            else:
+                self.shift, self.shifted_total, self.shifted_squares = other.shift, other.shifted_total, other.shifted_squares
+                self.min, self.max = other.min, other.max
+            self.count += other.count
+            self.total += other.total
+            self.value_digest.merge(other.value_digest)
+
+        self.records += other.records
+        if self.sample_record is None:
+            self.sample_record = other.sample_record
+        self.weighted_sum += other.weighted_sum
+        self.weight_sum += other.weight_sum
+        self.weighted_count += other.weighted_count
+        if self.category_sketch is not None:
+            if other.category_sketch is not None:
+                self.category_sketch.merge(other.category_sketch)
+            else:
+                self.category_sketch.update_counts(other.category_counts)
+        elif other.category_sketch is not None:
+            raise ValueError("Cannot merge approximate category counts into an aggregator with exact counts")
+        else:
+            self.category_counts.update(other.category_counts)
+        if self.groups is not None and other.groups is not None:
+            self.groups.merge(other.groups)
+        if self.exact is not None and other.exact is not None:
+            self.exact.merge(other.exact)
+        return self
+
+    def total_value(self) -> float:
+        """Equivalent of calculate_total_value."""
+        return self.total
+
+    def weighted_average(self) -> float:
+        """Equivalent of calculate_weighted_average. Returns 0.0 if the total weight is zero."""
+        if self.weight_sum == 0:
+            logger.warning(f"Total weight is zero after processing {self.weighted_count} valid records. Cannot calculate weighted average. Returning 0.")
+            return 0.0
+        return self.weighted_sum / self.weight_sum
+
+    def statistics(self) -> Dict[str, float]:
+        """Equivalent of calculate_value_statistics."""
+        if not self.count:
+            return {'min': 0.0, 'max': 0.0, 'mean': 0.0, 'std_dev': 0.0, 'count': 0}
+        stats = {
+            'min': self.min,
+            'max': self.max,
+            'mean': self.total / self.count,
+            'count': self.count,
+            'std_dev': math.sqrt(self.m2() / (self.count - 1)) if self.count >= 2 else 0.0
+        }
+        stats.update(self.value_digest.quantiles(self.quantiles))
+        if self.exact is not None:
+            stats.update(self.exact.quantiles(self.exact_quantiles))
+        return stats
+
+    def m2(self) -> float:
+        """Sum of squared deviations from the mean."""
+        if not self.count:
+            return 0.0
+        return max(self.shifted_squares - self.shifted_total * self.shifted_total / self.count, 0.0)
+
+    def quantile(self, q: float) -> float:
+        """Estimated value at quantile q (NaN if no numeric values were seen)."""
+        return self.value_digest.quantile(q)
+
+    def most_common_categories(self, top_n: int = 3) -> List[Tuple[str, int]]:
+        """Equivalent of find_most_common_categories (approximate if category_error_rate is set)."""
+        if self.category_sketch is not None:
+            return self.category_sketch.most_common(top_n)
+        return self.category_counts.most_common(top_n)
+
+    def category_error_bound(self) -> int:
+        """Largest possible overestimate of any category count (always 0 for exact counts)."""
+        return self.category_sketch.max_error() if self.category_sketch is not None else 0
+
+    def to_state(self) -> Dict[str, Any]:
+        """Returns the aggregator's state as a JSON-serializable dictionary."""
+        if self.exact is not None:
+            raise ValueError("Exact quantiles keep every value and cannot be saved as state")
+        return {
+            'value_key': self.value_key,
+            'weight_key': self.weight_key,
+            'category_key': self.category_key,
+            'category_error_rate': self.category_error_rate,
+            'quantiles': list(self.quantiles),
+            'records': self.records,
+            'count': self.count,
+            'total': self.total,
+            'min': self.min,
+            'max': self.max,
+            'shift': self.shift,
+            'shifted_total': self.shifted_total,
+            'shifted_squares': self.shifted_squares,
+            'value_digest': self.value_digest.to_state(),
+            'weighted_sum': self.weighted_sum,
+            'weight_sum': self.weight_sum,
+            'weighted_count': self.weighted_count,
+            'sample_record': _record_to_state(self.sample_record) if self.sample_record is not None else None,
+            # Pairs rather than a mapping so first-seen order (used to break ties) survives JSON
+            'category_counts': [[category, count] for category, count in self.category_counts.items()],
+            'category_sketch': self.category_sketch.to_state() if self.category_sketch is not None else None,
+            'group_key': self.group_key,
+            'groups': self.groups.to_state() if self.groups is not None else None,
+            'memory_budget': self.memory_budget,
+            'spill_dir': self.spill_dir,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'SummaryAggregator':
+        """Rebuilds an aggregator from a dictionary produced by to_state."""
+        aggregator = cls(state['value_key'], state['weight_key'], state['category_key'], state.get('category_error_rate'),
+                         state.get('quantiles', DEFAULT_QUANTILES), state.get('group_key'),
+                         memory_budget=state.get('memory_budget'), spill_dir=state.get('spill_dir'))
+        for field in ('records', 'count', 'total', 'min', 'max', 'shift', 'shifted_total', 'shifted_squares',
+                      'weighted_sum', 'weight_sum', 'weighted_count'):
+            setattr(aggregator, field, state[field])
+        if state.get('sample_record') is not None:
+            aggregator.sample_record = _record_from_state(state['sample_record'])
+        aggregator.value_digest = TDigest.from_state(state['value_digest'])
+        aggregator.category_counts = Counter({category: count for category, count in state['category_counts']})
+        if state.get('category_sketch') is not None:
+            aggregator.category_sketch = SpaceSaving.from_state(state['category_sketch'])
+        if state.get('groups') is not None:
+            restored = GroupAggregator.from_state(state['groups'])
+            if aggregator.groups is None:
+                aggregator.groups = restored
+            else:
+                aggregator.groups.merge(restored) # Keeps the spilling aggregator for a memory budget
+        return aggregator
+
+    def copy(self) -> 'SummaryAggregator':
+        """Returns an independent copy of this aggregator."""
+        return SummaryAggregator.from_state(self.to_state())
+
+    def __repr__(self) -> str:
+        categories = len(self.category_sketch) if self.category_sketch is not None else len(self.category_counts)
+        return f"<SummaryAggregator records={self.records} count={self.count} categories={categories}>"
+
+def aggregate_summary(data: Records, value_key: str = 'value', weight_key: str = 'id', category_key: str = 'category',
+                      category_error_rate: Optional[float] = None) -> SummaryAggregator:
+    """Runs a SummaryAggregator over the data in one pass and returns it."""
+    logger.info(f"Aggregating summary for {len(data)} records in a single pass.")
+    aggregator = SummaryAggregator(value_key=value_key, weight_key=weight_key, category_key=category_key, category_error_rate=category_error_rate)
+    aggregator.update_many(data)
+    logger.info(f"Summary aggregation complete: {aggregator}")
+    return aggregator
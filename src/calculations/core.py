@@ -1,38 +1,64 @@
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Callable, Hashable, Optional, Sequence, Tuple, Union
 from collections import Counter
 import math # Already imported, but good practice to be explicit if needed
 
+import numpy as np
+
 from src.utils.helpers import setup_logger
-from src.utils.math_utils import add, multiply, divide, power, calculate_std_dev, Vector2D # Added std_dev, Vector2D
+from src.utils.math_utils import add, multiply, divide, calculate_std_dev, Vector2D, Vector2DArray # Added std_dev, Vector2D
+from src.data_processing.record_batch import RecordBatch
+from .sketches import SpaceSaving, TDigest, DEFAULT_ERROR_RATE, DEFAULT_QUANTILES
 
 logger = setup_logger(__name__)
 
-def calculate_total_value(data: List[Dict[str, Any]]) -> float:
+# Every calculation accepts either the list-of-dicts representation or a columnar RecordBatch
+Records = Union[List[Dict[str, Any]], RecordBatch]
+
+def numeric_column(batch: RecordBatch, key: str):
+    """Returns a numeric column of a RecordBatch as float64, or None if the key is not a numeric column."""
+    if key not in ('id', 'value'):
+        return None
+    return batch.column(key).astype(np.float64, copy=False)
+
+def calculate_total_value(data: Records) -> float:
     """Calculates the sum of all 'value' fields in the processed data."""
     logger.info(f"Calculating total value for {len(data)} records.")
+    if isinstance(data, RecordBatch):
+        total = float(data.values.sum())
+        logger.info(f"Total value calculated: {total}")
+        return total
     total = 0.0
     for record in data:
         total = add(total, record.get('value', 0.0))
     logger.info(f"Total value calculated: {total}")
     return total
 
-def calculate_weighted_average(data: List[Dict[str, Any]], weight_key: str = 'id') -> float:
+def calculate_weighted_average(data: Records, weight_key: str = 'id') -> float:
     """Calculates a weighted average of 'value', weighted by another key (default 'id')."""
     logger.info(f"Calculating weighted average for {len(data)} records, weighted by '{weight_key}'.")
     total_value_sum = 0.0
     total_weight_sum = 0.0
     valid_records = 0
-    for record in data:
-        value = record.get('value')
-        weight = record.get(weight_key)
-        
-        # Ensure both value and weight are numeric and present
-        if isinstance(value, (int, float)) and isinstance(weight, (int, float)):
-            total_value_sum = add(total_value_sum, multiply(value, weight))
-            total_weight_sum = add(total_weight_sum, weight)
-            valid_records += 1
+    if isinstance(data, RecordBatch):
+        weights = numeric_column(data, weight_key)
+        if weights is not None:
+            total_value_sum = float(np.dot(data.values, weights))
+            total_weight_sum = float(weights.sum())
+            valid_records = len(data)
         else:
-            logger.debug(f"Skipping record for weighted average due to non-numeric/missing fields: {record}")
+            logger.debug(f"Column '{weight_key}' is not numeric, skipping all records for weighted average.")
+    else:
+        for record in data:
+            value = record.get('value')
+            weight = record.get(weight_key)
+            
+            # Ensure both value and weight are numeric and present
+            if isinstance(value, (int, float)) and isinstance(weight, (int, float)):
+                total_value_sum = add(total_value_sum, multiply(value, weight))
+                total_weight_sum = add(total_weight_sum, weight)
+                valid_records += 1
+            else:
+                logger.debug(f"Skipping record for weighted average due to non-numeric/missing fields: {record}")
 
     if total_weight_sum == 0:
         logger.warning(f"Total weight is zero after processing {valid_records} valid records. Cannot calculate weighted average. Returning 0.")
@@ -42,14 +68,40 @@ def calculate_weighted_average(data: List[Dict[str, Any]], weight_key: str = 'id
     logger.info(f"Weighted average calculated using {valid_records} records: {weighted_avg}")
     return weighted_avg
 
-def calculate_value_statistics(data: List[Dict[str, Any]], value_key: str = 'value') -> Dict[str, float]:
-    """Calculates basic statistics (min, max, mean, std dev) for a given key."""
+def _estimate_quantiles(values, quantiles: Sequence[float]) -> Dict[str, float]:
+    if not quantiles:
+        return {}
+    digest = TDigest()
+    digest.update_many(values)
+    return digest.quantiles(quantiles)
+
+def calculate_value_statistics(data: Records, value_key: str = 'value', quantiles: Sequence[float] = DEFAULT_QUANTILES) -> Dict[str, float]:
+    """
+    Calculates basic statistics (min, max, mean, std dev) for a given key, plus estimated
+    quantiles (keyed 'p50', 'p90', ...) from a t-digest; pass quantiles=() to skip them.
+    """
     logger.info(f"Calculating statistics for key '{value_key}' on {len(data)} records.")
-    values = [record.get(value_key) for record in data if isinstance(record.get(value_key), (int, float))]
+    if isinstance(data, RecordBatch):
+        column = numeric_column(data, value_key)
+        values = column if column is not None else np.empty(0)
+    else:
+        values = [record.get(value_key) for record in data if isinstance(record.get(value_key), (int, float))]
     
-    if not values:
+    if not len(values):
         logger.warning(f"No valid numeric data found for key '{value_key}'. Cannot calculate statistics.")
         return {'min': 0.0, 'max': 0.0, 'mean': 0.0, 'std_dev': 0.0, 'count': 0}
+
+    if isinstance(values, np.ndarray):
+        stats = {
+            'min': float(values.min()),
+            'max': float(values.max()),
+            'mean': float(values.mean()),
+            'count': len(values),
+            'std_dev': float(values.std(ddof=1)) if len(values) >= 2 else 0.0
+        }
+        stats.update(_estimate_quantiles(values, quantiles))
+        logger.info(f"Statistics calculated for '{value_key}': {stats}")
+        return stats
         
     stats = {
         'min': min(values),
@@ -67,13 +119,50 @@ def calculate_value_statistics(data: List[Dict[str, Any]], value_key: str = 'val
             stats['std_dev'] = float('nan') # Indicate calculation failure
     else:
         stats['std_dev'] = 0.0 # Std dev is 0 for single point, undefined for zero points
+    stats.update(_estimate_quantiles(values, quantiles))
         
     logger.info(f"Statistics calculated for '{value_key}': {stats}")
     return stats
 
-def find_most_common_categories(data: List[Dict[str, Any]], category_key: str = 'category', top_n: int = 3) -> List[Tuple[str, int]]:
-    """Finds the most common values for a given category key."""
+def find_most_common_categories(data: Records, category_key: str = 'category', top_n: int = 3,
+                                approximate: bool = False, error_rate: float = DEFAULT_ERROR_RATE) -> List[Tuple[str, int]]:
+    """
+    Finds the most common values for a given category key.
+    With approximate=True, counts are kept in a Space-Saving sketch of ceil(1 / error_rate)
+    counters instead of a full Counter, so memory stays bounded however many distinct values
+    there are; each count may be overestimated by at most error_rate * number of records.
+    """
     logger.info(f"Finding top {top_n} most common categories for key '{category_key}'.")
+    if approximate:
+        sketch = SpaceSaving(error_rate=error_rate)
+        if isinstance(data, RecordBatch):
+            if category_key == 'category':
+                sketch.update_counts(data.category_counts())
+            else:
+                column = data.column(category_key)
+                sketch.update_many(column.tolist() if column is not None else [])
+        else:
+            sketch.update_many(record.get(category_key, "Unknown") for record in data if category_key in record)
+        if not sketch.total:
+            logger.warning(f"No data found for category key '{category_key}'.")
+            return []
+        most_common = sketch.most_common(top_n)
+        logger.info(f"Most common categories (approximate, counts within +{sketch.max_error()}): {most_common}")
+        return most_common
+
+    if isinstance(data, RecordBatch):
+        if category_key == 'category':
+            category_counts = data.category_counts()
+        else:
+            column = data.column(category_key)
+            category_counts = Counter(column.tolist()) if column is not None else Counter()
+        if not category_counts:
+            logger.warning(f"No data found for category key '{category_key}'.")
+            return []
+        most_common = category_counts.most_common(top_n)
+        logger.info(f"Most common categories: {most_common}")
+        return most_common
+
     categories = [record.get(category_key, "Unknown") for record in data if category_key in record]
     if not categories:
         logger.warning(f"No data found for category key '{category_key}'.")
@@ -84,48 +173,195 @@ def find_most_common_categories(data: List[Dict[str, Any]], category_key: str =
     logger.info(f"Most common categories: {most_common}")
     return most_common
 
+# A group-by key: a column/record key name, or a function deriving the key from a record
+GroupKey = Union[str, Callable[[Dict[str, Any]], Hashable]]
+
+# Statistics reported for each group by aggregate_by_group
+GROUP_STATISTICS = ('count', 'sum', 'min', 'max', 'mean', 'std_dev', 'weighted_average')
+
+def _factorize(data: Records, key: GroupKey) -> Tuple[np.ndarray, List[Hashable]]:
+    """
+    Assigns every record a dense group code in one hash pass, numbering groups in order of first
+    appearance. Returns the codes (-1 for records without the key) and the key of each group.
+    """
+    if isinstance(data, RecordBatch) and isinstance(key, str):
+        if key in ('category', 'name'):
+            # Already dictionary-encoded: renumber the codes in use by first appearance
+            codes = data.category_codes if key == 'category' else data.name_codes
+            dictionary = data.category_dictionary if key == 'category' else data.name_dictionary
+            used, first_seen = np.unique(codes, return_index=True)
+            order = used[np.argsort(first_seen, kind='stable')]
+            rank = np.full(len(dictionary), -1, dtype=np.int64)
+            rank[order] = np.arange(len(order))
+            return rank[codes], [dictionary[code] for code in order.tolist()]
+        column = data.column(key)
+        if column is None:
+            return np.full(len(data), -1, dtype=np.int64), []
+        uniques, first_seen, inverse = np.unique(column, return_index=True, return_inverse=True)
+        order = np.argsort(first_seen, kind='stable')
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        return rank[inverse.ravel()], uniques[order].tolist()
+
+    records = data.to_records() if isinstance(data, RecordBatch) else data
+    index: Dict[Hashable, int] = {}
+    if callable(key):
+        codes = [index.setdefault(key(record), len(index)) for record in records]
+    else:
+        codes = [index.setdefault(record[key], len(index)) if key in record else -1 for record in records]
+    return np.array(codes, dtype=np.int64), list(index)
+
+def _numeric_values(data: Records, key: str) -> Tuple[np.ndarray, np.ndarray]:
+    """A key as a float64 array plus a mask of the records where it is numeric (int or float)."""
+    if isinstance(data, RecordBatch):
+        column = numeric_column(data, key)
+        if column is None:
+            return np.zeros(len(data)), np.zeros(len(data), dtype=bool)
+        return column, np.ones(len(data), dtype=bool)
+    raw = [record.get(key) for record in data]
+    mask = np.array([isinstance(value, (int, float)) for value in raw], dtype=bool)
+    values = np.array([value if numeric else 0.0 for value, numeric in zip(raw, mask.tolist())], dtype=np.float64)
+    return values, mask
+
+def group_moments(data: Records, key: GroupKey = 'category', value_key: str = 'value',
+                   weight_key: str = 'id') -> Tuple[List[Hashable], Dict[str, np.ndarray]]:
+    """
+    Mergeable per-group moments of value_key: count, total, min, max, mean, m2 (sum of squared
+    deviations), weight_sum and weighted_sum, as arrays aligned with the returned group keys.
+    Groups come from one hash pass over the keys; the reductions are NumPy bincounts.
+    """
+    codes, keys = _factorize(data, key)
+    size = len(keys)
+    present = codes >= 0
+
+    values, numeric = _numeric_values(data, value_key)
+    live = present & numeric
+    group, group_values = codes[live], values[live]
+    count = np.bincount(group, minlength=size)
+    total = np.bincount(group, weights=group_values, minlength=size)
+    mean = np.divide(total, count, out=np.zeros(size), where=count > 0)
+    m2 = np.bincount(group, weights=np.square(group_values - mean[group]), minlength=size)
+    minimum, maximum = np.full(size, np.inf), np.full(size, -np.inf)
+    np.minimum.at(minimum, group, group_values)
+    np.maximum.at(maximum, group, group_values)
+
+    weights, weight_numeric = _numeric_values(data, weight_key)
+    weighted = live & weight_numeric
+    weight_sum = np.bincount(codes[weighted], weights=weights[weighted], minlength=size)
+    weighted_sum = np.bincount(codes[weighted], weights=values[weighted] * weights[weighted], minlength=size)
+    return keys, {
+        'count': count, 'total': total, 'min': minimum, 'max': maximum, 'mean': mean, 'm2': m2,
+        'weight_sum': weight_sum, 'weighted_sum': weighted_sum,
+    }
+
+def group_statistics(count: int, total: float, minimum: float, maximum: float, m2: float,
+                     weight_sum: float, weighted_sum: float) -> Dict[str, float]:
+    """Turns one group's moments into the statistics listed in GROUP_STATISTICS."""
+    if not count:
+        return {'count': 0, 'sum': 0.0, 'min': 0.0, 'max': 0.0, 'mean': 0.0, 'std_dev': 0.0, 'weighted_average': 0.0}
+    return {
+        'count': int(count),
+        'sum': float(total),
+        'min': float(minimum),
+        'max': float(maximum),
+        'mean': float(total) / count,
+        'std_dev': math.sqrt(m2 / (count - 1)) if count >= 2 else 0.0,
+        'weighted_average': float(weighted_sum) / weight_sum if weight_sum else 0.0,
+    }
+
+def aggregate_by_group(data: Records, key: GroupKey = 'category', value_key: str = 'value',
+                       weight_key: str = 'id') -> Dict[Hashable, Dict[str, float]]:
+    """
+    Per-group count, sum, min, max, mean, std_dev and weighted_average of value_key, weighted
+    by weight_key. key is a field name ('category', 'name', ...) or a function of a record for
+    derived keys. Groups are returned in order of first appearance; records without the key are
+    skipped, and only numeric values count towards a group's statistics.
+    Columnar batches grouped by a column are aggregated without materializing records.
+    """
+    key_name = getattr(key, '__name__', key)
+    logger.info(f"Aggregating {len(data)} records by '{key_name}'.")
+    keys, moments = group_moments(data, key, value_key, weight_key)
+    columns = [moments[field].tolist() for field in ('count', 'total', 'min', 'max', 'm2', 'weight_sum', 'weighted_sum')]
+    groups = {group: group_statistics(*row) for group, row in zip(keys, zip(*columns))}
+    logger.info(f"Aggregated {len(groups)} groups by '{key_name}'.")
+    return groups
+
+def power_column(values: np.ndarray, exponent: float) -> np.ndarray:
+    """
+    Vectorized values ** exponent. Inputs math.pow rejects (a negative base with a fractional
+    exponent, zero with a negative exponent) and NaN inputs yield NaN instead of raising.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    invalid = np.isnan(values)
+    if not float(exponent).is_integer():
+        invalid |= values < 0
+    if exponent < 0:
+        invalid |= values == 0
+    result = np.full(len(values), np.nan)
+    valid = ~invalid
+    with np.errstate(over='ignore'):
+        np.power(values, exponent, out=result, where=valid)
+    return result
+
 class AdvancedCalculator:
     def __init__(self, exponent: float = 2.0):
         self.exponent = exponent
         self.logger = setup_logger(f"{__name__}.AdvancedCalculator")
 
-    def transform_values(self, data: List[Dict[str, Any]], value_key: str = 'value') -> List[Dict[str, Any]]:
-        self.logger.info(f"Transforming values for {len(data)} records using exponent {self.exponent}")
-        transformed_data = []
+    def transform_values(self, data: Records, value_key: str = 'value', exponents: Optional[Sequence[float]] = None) -> Records:
+        """
+        Raises every value to self.exponent (or to each of `exponents`) in one vectorized pass.
+        The result goes to '<value_key>_transformed', or '<value_key>_transformed_<exponent>' per
+        exponent when several are given. Invalid or non-numeric inputs give NaN (None in records).
+        A RecordBatch gets the new columns via with_column; a list of records is updated in place
+        and returned, so no record is copied.
+        """
+        exponents = list(exponents) if exponents else [self.exponent]
+        self.logger.info(f"Transforming values for {len(data)} records using exponents {exponents}")
+        if isinstance(data, RecordBatch):
+            column = numeric_column(data, value_key)
+            values = column if column is not None else np.full(len(data), np.nan)
+        else:
+            values = np.array([
+                value if isinstance(value, (int, float)) else np.nan
+                for value in (record.get(value_key) for record in data)
+            ], dtype=np.float64)
+
         errors = 0
-        for record in data:
-            new_record = record.copy()
-            original_value = new_record.get(value_key)
-            if isinstance(original_value, (int, float)):
-                try:
-                    transformed_value = power(original_value, self.exponent)
-                    new_record[f"{value_key}_transformed"] = transformed_value
-                except ValueError as e: # e.g., power might raise error for negative base with non-integer exp
-                    self.logger.warning(f"Could not transform value {original_value} with exponent {self.exponent}: {e}")
-                    new_record[f"{value_key}_transformed"] = None # Indicate transformation failure
-                    errors += 1
+        for exponent in exponents:
+            key = f"{value_key}_transformed" if len(exponents) == 1 else f"{value_key}_transformed_{exponent:g}"
+            transformed = power_column(values, exponent)
+            errors += int(np.isnan(transformed).sum())
+            if isinstance(data, RecordBatch):
+                data = data.with_column(key, transformed)
             else:
-                self.logger.debug(f"Skipping transformation for non-numeric value in record: {record}")
-                new_record[f"{value_key}_transformed"] = None
-                errors += 1
-                
-            transformed_data.append(new_record)
-            
+                for record, value in zip(data, np.where(np.isnan(transformed), None, transformed).tolist()):
+                    record[key] = value
+
+        if errors:
+            self.logger.warning(f"Could not transform {errors} values (non-numeric, or invalid for the exponent).")
         self.logger.info(f"Transformation complete. Encountered {errors} issues.")
-        return transformed_data
+        return data
 
-    def calculate_vector_sum(self, vectors: List[Vector2D]) -> Vector2D:
-        """Calculates the sum of a list of Vector2D objects."""
+    def calculate_vector_sum(self, vectors: Union[List[Vector2D], Vector2DArray]) -> Vector2D:
+        """Calculates the sum of a list of Vector2D objects or of a Vector2DArray."""
         self.logger.info(f"Calculating sum of {len(vectors)} vectors.")
+        if isinstance(vectors, Vector2DArray):
+            sum_vector = vectors.sum()
+            self.logger.info(f"Calculated vector sum: {sum_vector}")
+            return sum_vector
         if not vectors:
             return Vector2D(0, 0)
         
-        sum_vector = Vector2D(0, 0)
+        # Accumulate components directly rather than allocating a Vector2D per addition
+        sum_x = sum_y = 0
         for vec in vectors:
             if isinstance(vec, Vector2D):
-                sum_vector += vec
+                sum_x += vec.x
+                sum_y += vec.y
             else:
                 self.logger.warning(f"Skipping non-Vector2D item during summation: {vec}")
         
+        sum_vector = Vector2D(sum_x, sum_y)
         self.logger.info(f"Calculated vector sum: {sum_vector}")
-        return sum_vector 
\ No newline at end of file
+        return sum_vector
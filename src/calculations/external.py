@@ -0,0 +1,271 @@
+from typing import List, Dict, Any, Hashable, Iterable, Optional, Sequence, Tuple
+import math
+import pickle
+import struct
+
+import numpy as np
+
+from src.utils.helpers import setup_logger
+from src.utils.spill import SpillDirectory
+from .core import Records, GroupKey, group_moments
+from .aggregation import GroupAggregator, _MOMENTS, _merge_moments
+from .sketches import quantile_label
+
+logger = setup_logger(__name__)
+
+# Approximate memory held per group by a GroupAggregator: key, moments list and dict entry
+GROUP_STATE_BYTES = 512
+
+# Files that spilled group state is hash-partitioned into; each is merged on its own
+DEFAULT_SPILL_PARTITIONS = 16
+
+# Single values buffered before they are appended as one array
+_SCALAR_BUFFER = 4096
+
+_LOW_BITS = 0x7FFFFFFFFFFFFFFF
+
+def _order_key(value: float) -> int:
+    """Maps a float to an integer with the same ordering (so bisection can run over integers)."""
+    bits = struct.unpack('<q', struct.pack('<d', value))[0]
+    return bits ^ _LOW_BITS if bits < 0 else bits
+
+def _from_order_key(key: int) -> float:
+    bits = key ^ _LOW_BITS if key < 0 else key
+    return struct.unpack('<d', struct.pack('<q', bits))[0]
+
+def _kth_smallest(runs: Sequence[np.ndarray], k: int) -> float:
+    """
+    The k-th smallest value (0-based) across sorted runs, found by bisecting the value range
+    and counting with searchsorted, so memory-mapped runs are only touched at a few pages.
+    """
+    if len(runs) == 1:
+        return float(runs[0][k])
+    low = min(_order_key(float(run[0])) for run in runs if len(run))
+    high = max(_order_key(float(run[-1])) for run in runs if len(run))
+    while low < high:
+        middle = (low + high) // 2
+        value = _from_order_key(middle)
+        if sum(int(np.searchsorted(run, value, side='right')) for run in runs) > k:
+            high = middle
+        else:
+            low = middle + 1
+    return _from_order_key(low) + 0.0 # A zero may be found as -0.0; values are stored as +0.0
+
+class ExactQuantiles:
+    """
+    Exact quantiles over a stream of values, interpolated linearly like numpy.quantile.
+    Values are buffered; with a memory_budget (bytes), the buffer is sorted and written to a
+    spill file as a run whenever it exceeds the budget, and the runs are memory-mapped back.
+    Quantiles are read from the runs without merging them, so the results are the same
+    whether or not anything was spilled. NaN values are ignored.
+    """
+    def __init__(self, memory_budget: Optional[int] = None, spill_dir: Optional[str] = None):
+        self.memory_budget = memory_budget
+        self.count = 0
+        self._buffers: List[np.ndarray] = []
+        self._buffered_bytes = 0
+        self._scalars: List[float] = []
+        self._runs: List[np.ndarray] = [] # Sorted runs, memory-mapped from spill files
+        self._spill = SpillDirectory(spill_dir, prefix='quantiles-')
+        self._adopted: List[SpillDirectory] = [] # Kept alive for the runs taken over by merge
+
+    def update(self, value: float) -> None:
+        self._scalars.append(value)
+        if len(self._scalars) >= _SCALAR_BUFFER:
+            self._flush_scalars()
+
+    def update_many(self, values: Iterable[float]) -> None:
+        values = np.asarray(values if isinstance(values, np.ndarray) else list(values), dtype=np.float64)
+        values = values[~np.isnan(values)] + 0.0 # Also turns -0.0 into 0.0
+        if not len(values):
+            return
+        self._buffers.append(values)
+        self._buffered_bytes += values.nbytes
+        self.count += len(values)
+        if self.memory_budget is not None and self._buffered_bytes > self.memory_budget:
+            self._spill_run()
+
+    def _flush_scalars(self) -> None:
+        scalars, self._scalars = self._scalars, []
+        self.update_many(np.array(scalars, dtype=np.float64))
+
+    def _spill_run(self) -> None:
+        run = np.sort(np.concatenate(self._buffers))
+        path = self._spill.new_file('.npy')
+        np.save(path, run)
+        self._runs.append(np.load(path, mmap_mode='r'))
+        self._buffers, self._buffered_bytes = [], 0
+        logger.debug(f"Spilled a run of {len(run)} values to {path}.")
+
+    def merge(self, other: 'ExactQuantiles') -> 'ExactQuantiles':
+        other._flush_scalars()
+        self._runs.extend(other._runs)
+        self.count += sum(len(run) for run in other._runs)
+        self._adopted.extend([other._spill, *other._adopted])
+        for values in other._buffers:
+            self.update_many(values)
+        return self
+
+    @property
+    def spilled_runs(self) -> int:
+        return len(self._runs)
+
+    def quantiles(self, qs: Iterable[float]) -> Dict[str, float]:
+        """Exact values at each quantile, keyed like TDigest.quantiles ('p50', ...); NaN if empty."""
+        self._flush_scalars()
+        runs = list(self._runs)
+        if self._buffers:
+            runs.append(np.sort(np.concatenate(self._buffers)))
+        return {quantile_label(q): self._quantile(runs, q) for q in qs}
+
+    def quantile(self, q: float) -> float:
+        return self.quantiles([q])[quantile_label(q)]
+
+    def _quantile(self, runs: List[np.ndarray], q: float) -> float:
+        if not self.count:
+            return math.nan
+        position = q * (self.count - 1)
+        low = math.floor(position)
+        fraction = position - low
+        a = _kth_smallest(runs, low)
+        if fraction == 0:
+            return a
+        b = _kth_smallest(runs, low + 1)
+        # Same interpolation as numpy.quantile's default (linear) method
+        difference = b - a
+        return b - difference * (1 - fraction) if fraction >= 0.5 else a + difference * fraction
+
+    def close(self) -> None:
+        """Drops the values and removes the spill files."""
+        self._runs, self._buffers, self._scalars, self._adopted = [], [], [], []
+        self._buffered_bytes = self.count = 0
+        self._spill.close()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Spill files belong to this process; runs are read back into memory when pickled
+        self._flush_scalars()
+        state = self.__dict__.copy()
+        state['_runs'] = [np.array(run) for run in self._runs]
+        state['_spill'] = SpillDirectory(self._spill.parent, prefix='quantiles-')
+        state['_adopted'] = []
+        return state
+
+    def __repr__(self) -> str:
+        return f"<ExactQuantiles count={self.count} spilled_runs={len(self._runs)}>"
+
+class SpillingGroupAggregator(GroupAggregator):
+    """
+    GroupAggregator that keeps about memory_budget bytes of group state (see GROUP_STATE_BYTES).
+    Once the budget is exceeded, the state so far and every later batch's per-group partials are
+    appended to hash-partitioned spill files instead. results() replays each partition in the
+    original order, so every group goes through the same merges as it would in memory and
+    the results (including first-seen group order) are identical.
+    """
+    def __init__(self, key: GroupKey = 'category', value_key: str = 'value', weight_key: str = 'id',
+                 memory_budget: Optional[int] = None, spill_dir: Optional[str] = None,
+                 partitions: int = DEFAULT_SPILL_PARTITIONS):
+        super().__init__(key, value_key, weight_key)
+        self.memory_budget = memory_budget
+        self.partitions = partitions
+        self._spill = SpillDirectory(spill_dir, prefix='groups-')
+        self._files: Optional[List[Any]] = None # Open partition files while spilling
+        self._frames = 0
+
+    @property
+    def spilled(self) -> bool:
+        return self._files is not None
+
+    def update(self, record: Dict[str, Any]) -> None:
+        if self.spilled:
+            self.update_many([record])
+            return
+        super().update(record)
+        self._check_budget()
+
+    def update_many(self, data: Records) -> 'SpillingGroupAggregator':
+        if not self.spilled:
+            super().update_many(data)
+            self._check_budget()
+        elif len(data):
+            keys, moments = group_moments(data, self.key, self.value_key, self.weight_key)
+            columns = [moments[field].tolist() for field in _MOMENTS]
+            self._write_frame(keys, [list(partial) for partial in zip(*columns)])
+        return self
+
+    def _check_budget(self) -> None:
+        if self.memory_budget is not None and len(self.groups) * GROUP_STATE_BYTES > self.memory_budget:
+            self._start_spilling()
+
+    def _start_spilling(self) -> None:
+        logger.info(f"{len(self.groups)} groups exceed the memory budget of {self.memory_budget} bytes; spilling group state.")
+        self._files = [open(self._spill.new_file(f'.part{p}'), 'wb') for p in range(self.partitions)]
+        self._frames = 0
+        # The state so far is the first frame: groups replay from it as they would have continued in memory
+        groups, self.groups = self.groups, {}
+        self._write_frame(list(groups), list(groups.values()))
+
+    def _write_frame(self, keys: List[Hashable], partials: List[List[float]]) -> None:
+        buckets: List[List[Tuple[int, Hashable, List[float]]]] = [[] for _ in range(self.partitions)]
+        for position, (group, partial) in enumerate(zip(keys, partials)):
+            buckets[hash(group) % self.partitions].append((position, group, partial))
+        for f, bucket in zip(self._files, buckets):
+            if bucket:
+                pickle.dump((self._frames, bucket), f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._frames += 1
+
+    def _materialize(self) -> None:
+        """Merges the spilled partitions back into self.groups, in first-seen order."""
+        if not self.spilled:
+            return
+        collected = []
+        for f in self._files:
+            f.close()
+            merged: Dict[Hashable, Tuple[Tuple[int, int], List[float]]] = {}
+            with open(f.name, 'rb') as partition:
+                while True:
+                    try:
+                        frame, bucket = pickle.load(partition)
+                    except EOFError:
+                        break
+                    for position, group, partial in bucket:
+                        entry = merged.get(group)
+                        if entry is None:
+                            merged[group] = ((frame, position), partial)
+                        else:
+                            _merge_moments(entry[1], partial)
+            collected.extend((first_seen, group, moments) for group, (first_seen, moments) in merged.items())
+        collected.sort(key=lambda entry: entry[0])
+        self.groups = {group: moments for _, group, moments in collected}
+        self._files = None
+        self._spill.close()
+
+    def merge(self, other: GroupAggregator) -> 'SpillingGroupAggregator':
+        if isinstance(other, SpillingGroupAggregator):
+            other._materialize()
+        self._materialize()
+        super().merge(other)
+        self._check_budget()
+        return self
+
+    def results(self) -> Dict[Hashable, Dict[str, float]]:
+        self._materialize()
+        return super().results()
+
+    def to_state(self) -> Dict[str, Any]:
+        self._materialize()
+        return super().to_state()
+
+    def __len__(self) -> int:
+        self._materialize()
+        return super().__len__()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Open spill files cannot be pickled; the state is merged back into memory instead
+        self._materialize()
+        state = self.__dict__.copy()
+        state['_spill'] = SpillDirectory(self._spill.parent, prefix='groups-')
+        return state
+
+    def __repr__(self) -> str:
+        status = f"spilled to {self._spill.path}" if self.spilled else f"groups={len(self.groups)}"
+        return f"<SpillingGroupAggregator key={getattr(self.key, '__name__', self.key)!r} {status}>"
@@ -0,0 +1,296 @@
+from typing import List, Dict, Any, Hashable, Iterable, Optional, Tuple
+import heapq
+import math
+
+import numpy as np
+
+from src.utils.helpers import setup_logger
+
+logger = setup_logger(__name__)
+
+# Default bound on count errors, as a fraction of the total count
+DEFAULT_ERROR_RATE = 0.001
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitters sketch (Metwally et al.) with a fixed number of counters.
+    Each tracked item carries a count that overestimates its true frequency by at most its
+    recorded error, and every error is at most total / capacity. Items that occur more than
+    total / capacity times are always tracked. While no more than `capacity` distinct items
+    have been seen, all counts are exact.
+    Sketches built over separate chunks (or in worker processes) can be merged.
+    """
+    def __init__(self, capacity: Optional[int] = None, error_rate: float = DEFAULT_ERROR_RATE):
+        if capacity is None:
+            if not 0 < error_rate < 1:
+                raise ValueError("error_rate must be between 0 and 1")
+            capacity = math.ceil(1 / error_rate)
+        if capacity <= 0:
+            raise ValueError("capacity must be a positive integer")
+        self.capacity = capacity
+        self.total = 0
+        self._counts: Dict[Hashable, int] = {}
+        self._errors: Dict[Hashable, int] = {}
+        self._heap: List[Tuple[int, int, Hashable]] = [] # (count, sequence, item); stale entries are skipped lazily
+        self._sequence = 0
+
+    def update(self, item: Hashable, count: int = 1) -> None:
+        """Adds count occurrences of item."""
+        self.total += count
+        if item in self._counts:
+            self._counts[item] += count
+        elif len(self._counts) < self.capacity:
+            self._counts[item] = count
+            self._errors[item] = 0
+        else:
+            # Replace the item with the smallest count; its count becomes the newcomer's error
+            minimum, evicted = self._pop_min()
+            del self._counts[evicted]
+            del self._errors[evicted]
+            self._counts[item] = minimum + count
+            self._errors[item] = minimum
+        self._push(item)
+
+    def update_many(self, items: Iterable[Hashable]) -> None:
+        """Adds each item once."""
+        for item in items:
+            self.update(item)
+
+    def update_counts(self, counts: Dict[Hashable, int]) -> None:
+        """Adds pre-aggregated counts, e.g. the per-category counts of one batch."""
+        for item, count in counts.items():
+            self.update(item, count)
+
+    def _push(self, item: Hashable) -> None:
+        self._sequence += 1
+        heapq.heappush(self._heap, (self._counts[item], self._sequence, item))
+        if len(self._heap) > 4 * self.capacity:
+            self._rebuild_heap()
+
+    def _rebuild_heap(self) -> None:
+        self._heap = [(count, i, item) for i, (item, count) in enumerate(self._counts.items())]
+        heapq.heapify(self._heap)
+        self._sequence = len(self._heap)
+
+    def _pop_min(self) -> Tuple[int, Hashable]:
+        while True:
+            count, _, item = heapq.heappop(self._heap)
+            if self._counts.get(item) == count:
+                return count, item
+
+    def min_count(self) -> int:
+        """Smallest tracked count once all counters are in use (0 before that)."""
+        if len(self._counts) < self.capacity:
+            return 0
+        return min(self._counts.values())
+
+    def merge(self, other: 'SpaceSaving') -> 'SpaceSaving':
+        """
+        Combines another sketch into this one (Agarwal et al. mergeable summaries): an item missing
+        from a full sketch may have occurred up to that sketch's minimum count, so that minimum is
+        added to both its count and its error. The largest `capacity` counters are kept.
+        """
+        own_min, other_min = self.min_count(), other.min_count()
+        counts: Dict[Hashable, int] = {}
+        errors: Dict[Hashable, int] = {}
+        for item in list(self._counts) + [item for item in other._counts if item not in self._counts]:
+            counts[item] = self._counts.get(item, own_min) + other._counts.get(item, other_min)
+            errors[item] = self._errors.get(item, own_min) + other._errors.get(item, other_min)
+
+        if len(counts) > self.capacity:
+            keep = set(sorted(counts, key=counts.__getitem__, reverse=True)[:self.capacity])
+            counts = {item: count for item, count in counts.items() if item in keep}
+        self._counts = counts
+        self._errors = {item: errors[item] for item in counts}
+        self.total += other.total
+        self._rebuild_heap()
+        return self
+
+    def most_common(self, n: int) -> List[Tuple[Hashable, int]]:
+        """Top n items by estimated count; ties keep first-seen order like Counter.most_common."""
+        return sorted(self._counts.items(), key=lambda item: item[1], reverse=True)[:n]
+
+    def error(self, item: Hashable) -> int:
+        """Maximum overestimate of item's count (the true count is within [count - error, count])."""
+        return self._errors.get(item, self.min_count())
+
+    def max_error(self) -> int:
+        """Bound on the error of any estimate in this sketch; never more than total / capacity."""
+        return max(self._errors.values(), default=0)
+
+    def is_exact(self) -> bool:
+        return self.max_error() == 0
+
+    def to_state(self) -> Dict[str, Any]:
+        """JSON-serializable state; items are stored as [item, count, error] in first-seen order."""
+        return {
+            'capacity': self.capacity,
+            'total': self.total,
+            'counters': [[item, count, self._errors[item]] for item, count in self._counts.items()],
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'SpaceSaving':
+        sketch = cls(capacity=state['capacity'])
+        sketch.total = state['total']
+        for item, count, error in state['counters']:
+            sketch._counts[item] = count
+            sketch._errors[item] = error
+        sketch._rebuild_heap()
+        return sketch
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __repr__(self) -> str:
+        return f"<SpaceSaving capacity={self.capacity} tracked={len(self._counts)} total={self.total} max_error={self.max_error()}>"
+
+# Quantiles reported alongside the basic value statistics
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+def quantile_label(q: float) -> str:
+    """Statistics key for a quantile, e.g. 0.5 -> 'p50', 0.999 -> 'p99.9'."""
+    return f"p{q * 100:g}"
+
+class TDigest:
+    """
+    Merging t-digest (Dunning) for streaming quantile estimates in bounded memory.
+    Values are buffered and merged into at most about compression / 2 centroids every
+    buffer_size values, sized with the arcsine scale function so centroids stay small near the
+    tails, where p99-style estimates need the most resolution. Digests of separate chunks can be merged.
+    Merges happen at fixed counts and reading or saving a digest leaves its buffer alone, so the
+    estimates depend only on the values and their order, not on how they were batched or where
+    the digest was saved and restored.
+    """
+    def __init__(self, compression: float = 400.0, buffer_size: Optional[int] = None):
+        self.compression = compression
+        self.buffer_size = buffer_size or int(compression * 10)
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._pending: List[np.ndarray] = []
+        self._pending_weights: List[np.ndarray] = []
+        self._pending_count = 0
+        self._scalars: List[float] = [] # Single values, turned into one array when compressing
+
+    def update(self, value: float) -> None:
+        self._scalars.append(value)
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if len(self._scalars) + self._pending_count >= self.buffer_size:
+            self._compress()
+
+    def update_many(self, values: Iterable[float]) -> None:
+        """Adds a batch of values; NumPy arrays are consumed without a Python-level loop."""
+        values = np.asarray(values if isinstance(values, np.ndarray) else list(values), dtype=np.float64)
+        if len(values):
+            self._add(values, np.ones(len(values)))
+
+    def _add(self, values: np.ndarray, weights: np.ndarray) -> None:
+        self.count += float(weights.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        # Split the batch where the buffer fills up, so it is compressed at the same counts as value-by-value updates
+        while len(values):
+            room = self.buffer_size - len(self._scalars) - self._pending_count
+            self._pending.append(values[:room])
+            self._pending_weights.append(weights[:room])
+            self._pending_count += len(self._pending[-1])
+            values, weights = values[room:], weights[room:]
+            if len(self._scalars) + self._pending_count >= self.buffer_size:
+                self._compress()
+
+    def _merged(self) -> Tuple[np.ndarray, np.ndarray]:
+        """The centroids with the buffered values merged in, leaving the digest unchanged."""
+        if not self._pending and not self._scalars:
+            return self.means, self.weights
+        means = np.concatenate([self.means, *self._pending, np.array(self._scalars, dtype=np.float64)])
+        weights = np.concatenate([self.weights, *self._pending_weights, np.ones(len(self._scalars))])
+
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        cumulative = np.cumsum(weights)
+        total = cumulative[-1]
+        # Group neighbours whose mid-points fall in the same unit of the k1 scale, k = delta / (2 pi) * asin(2q - 1)
+        q_mid = (cumulative - weights / 2) / total
+        k = self.compression / (2 * math.pi) * np.arcsin(2 * q_mid - 1)
+        groups = np.floor(k)
+        starts = np.flatnonzero(np.concatenate(([True], groups[1:] != groups[:-1])))
+        group_weights = np.add.reduceat(weights, starts)
+        return np.add.reduceat(means * weights, starts) / group_weights, group_weights
+
+    def _compress(self) -> None:
+        self.means, self.weights = self._merged()
+        self._pending, self._pending_weights, self._pending_count, self._scalars = [], [], 0, []
+
+    def merge(self, other: 'TDigest') -> 'TDigest':
+        """Folds another digest's centroids (and buffered values) into this one."""
+        if other.count:
+            means, weights = other._merged()
+            self._add(means.copy(), weights.copy())
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q: float) -> float:
+        """Estimated value at quantile q (0 <= q <= 1); NaN if the digest is empty."""
+        return self._quantile(self._merged(), q)
+
+    def _quantile(self, centroids: Tuple[np.ndarray, np.ndarray], q: float) -> float:
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        if not self.count:
+            return float('nan')
+        # Interpolate between centroid centres, anchored by the exact min and max
+        means, weights = centroids
+        centres = np.cumsum(weights) - weights / 2
+        x = np.concatenate(([0.0], centres, [self.count]))
+        y = np.concatenate(([self.min], means, [self.max]))
+        return float(np.interp(q * self.count, x, y))
+
+    def quantiles(self, qs: Iterable[float]) -> Dict[str, float]:
+        """Estimates for several quantiles, keyed by quantile_label."""
+        centroids = self._merged()
+        return {quantile_label(q): self._quantile(centroids, q) for q in qs}
+
+    def to_state(self) -> Dict[str, Any]:
+        """JSON-friendly state; buffered values are kept as they are rather than compressed."""
+        buffered = np.concatenate([*self._pending, np.array(self._scalars, dtype=np.float64)])
+        buffered_weights = np.concatenate([*self._pending_weights, np.ones(len(self._scalars))])
+        return {
+            'compression': self.compression,
+            'buffer_size': self.buffer_size,
+            'count': self.count,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            'means': self.means.tolist(),
+            'weights': self.weights.tolist(),
+            'buffered': buffered.tolist(),
+            'buffered_weights': buffered_weights.tolist(),
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'TDigest':
+        digest = cls(compression=state['compression'], buffer_size=state.get('buffer_size'))
+        digest.means = np.array(state['means'], dtype=np.float64)
+        digest.weights = np.array(state['weights'], dtype=np.float64)
+        digest.count = state['count']
+        if state['count']:
+            digest.min, digest.max = state['min'], state['max']
+        if state.get('buffered'):
+            digest._pending = [np.array(state['buffered'], dtype=np.float64)]
+            digest._pending_weights = [np.array(state['buffered_weights'], dtype=np.float64)]
+            digest._pending_count = len(state['buffered'])
+        return digest
+
+    def __len__(self) -> int:
+        """Number of centroids once buffered values are merged in."""
+        return len(self._merged()[0])
+
+    def __repr__(self) -> str:
+        return f"<TDigest count={self.count:g} centroids={len(self)} compression={self.compression:g}>"
@@ -0,0 +1,239 @@
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Union
+import datetime
+
+import numpy as np
+
+from src.utils.helpers import setup_logger
+from src.data_processing.record_batch import RecordBatch
+from .core import Records
+from .aggregation import SummaryAggregator
+from .sketches import DEFAULT_QUANTILES
+
+logger = setup_logger(__name__)
+
+# Named window lengths accepted wherever a window size or slide is expected
+WINDOW_SIZES = {
+    'minute': datetime.timedelta(minutes=1),
+    'hour': datetime.timedelta(hours=1),
+    'day': datetime.timedelta(days=1),
+}
+
+# Windows are aligned to multiples of the slide counted from this instant
+DEFAULT_ORIGIN = datetime.datetime(1970, 1, 1)
+
+# Open windows kept before the oldest are emitted early regardless of the watermark
+DEFAULT_MAX_OPEN_WINDOWS = 10000
+
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+def _as_timedelta(length: Union[str, float, datetime.timedelta]) -> datetime.timedelta:
+    """Accepts a timedelta, a number of seconds or one of the WINDOW_SIZES names."""
+    if isinstance(length, datetime.timedelta):
+        result = length
+    elif isinstance(length, str):
+        if length not in WINDOW_SIZES:
+            raise ValueError(f"Unknown window length '{length}'; expected one of {sorted(WINDOW_SIZES)}")
+        result = WINDOW_SIZES[length]
+    else:
+        result = datetime.timedelta(seconds=length)
+    if result <= datetime.timedelta(0):
+        raise ValueError("Window lengths must be positive")
+    return result
+
+class WindowResult:
+    """A closed window [start, end) and the SummaryAggregator of the records that fell into it."""
+    def __init__(self, start: datetime.datetime, end: datetime.datetime, aggregator: SummaryAggregator):
+        self.start = start
+        self.end = end
+        self.aggregator = aggregator
+
+    def statistics(self) -> Dict[str, Any]:
+        """The window bounds plus the report's statistics (see SummaryAggregator.statistics)."""
+        return {
+            'window_start': self.start,
+            'window_end': self.end,
+            'records': self.aggregator.records,
+            'total_value': self.aggregator.total_value(),
+            **self.aggregator.statistics(),
+        }
+
+    def __repr__(self) -> str:
+        return f"<WindowResult {self.start.isoformat()} - {self.end.isoformat()} records={self.aggregator.records}>"
+
+class WindowedAggregator:
+    """
+    Streaming tumbling or sliding window aggregation over a timestamp field.
+    Each window [start, start + size) starts at a multiple of slide (= size for tumbling windows)
+    from origin, and keeps a SummaryAggregator of its records. The watermark trails the latest
+    timestamp seen by allowed_lateness; a window is emitted once the watermark reaches its end,
+    and records arriving for windows already emitted are dropped and counted in late_records.
+    The watermark advances after each update_many chunk, so records within one chunk may be
+    in any order. State is bounded: at most max_open_windows windows are kept open.
+    """
+    def __init__(self,
+                 size: Union[str, float, datetime.timedelta],
+                 slide: Optional[Union[str, float, datetime.timedelta]] = None,
+                 allowed_lateness: Union[float, datetime.timedelta] = datetime.timedelta(0),
+                 timestamp_key: str = 'timestamp',
+                 value_key: str = 'value',
+                 weight_key: str = 'id',
+                 category_key: str = 'category',
+                 category_error_rate: Optional[float] = None,
+                 quantiles: Sequence[float] = DEFAULT_QUANTILES,
+                 origin: datetime.datetime = DEFAULT_ORIGIN,
+                 max_open_windows: int = DEFAULT_MAX_OPEN_WINDOWS):
+        self.size = _as_timedelta(size)
+        self.slide = _as_timedelta(slide) if slide is not None else self.size
+        if self.slide > self.size:
+            raise ValueError("slide must not be longer than the window size")
+        self.allowed_lateness = allowed_lateness if isinstance(allowed_lateness, datetime.timedelta) else datetime.timedelta(seconds=allowed_lateness)
+        self.timestamp_key = timestamp_key
+        self.value_key = value_key
+        self.weight_key = weight_key
+        self.category_key = category_key
+        self.category_error_rate = category_error_rate
+        self.quantiles = tuple(quantiles)
+        self.origin = origin
+        self.max_open_windows = max_open_windows
+
+        self.watermark: Optional[datetime.datetime] = None
+        self.windows: Dict[int, SummaryAggregator] = {} # Window index (start = origin + index * slide) -> aggregates
+        self.late_records = 0
+        self.skipped_records = 0 # Records without a usable timestamp
+        self.windows_per_record = -(-self.size // self.slide) # Sliding windows overlap: each record is in up to this many
+
+    def _new_aggregator(self) -> SummaryAggregator:
+        return SummaryAggregator(self.value_key, self.weight_key, self.category_key, self.category_error_rate, self.quantiles)
+
+    def _window_start(self, index: int) -> datetime.datetime:
+        return self.origin + index * self.slide
+
+    def _first_open_index(self) -> Optional[int]:
+        """Smallest window index whose end is still after the watermark."""
+        if self.watermark is None:
+            return None
+        # end = origin + index * slide + size > watermark
+        return (self.watermark - self.origin - self.size) // self.slide + 1
+
+    def update(self, record: Dict[str, Any]) -> List[WindowResult]:
+        """Adds one record and returns the windows its timestamp closed."""
+        return self.update_many([record])
+
+    def update_many(self, data: Records) -> List[WindowResult]:
+        """Adds a chunk of records (a list or a RecordBatch), then advances the watermark and returns the windows that closed."""
+        if isinstance(data, RecordBatch):
+            latest = self._add_batch(data)
+        else:
+            latest = self._add_records(data)
+        if latest is not None:
+            candidate = latest - self.allowed_lateness
+            if self.watermark is None or candidate > self.watermark:
+                self.watermark = candidate
+        return self._emit_ready()
+
+    def _add_records(self, records: Iterable[Dict[str, Any]]) -> Optional[datetime.datetime]:
+        first_open = self._first_open_index()
+        by_window: Dict[int, List[Dict[str, Any]]] = {}
+        latest = None
+        for record in records:
+            timestamp = record.get(self.timestamp_key)
+            if not isinstance(timestamp, datetime.datetime):
+                self.skipped_records += 1
+                continue
+            last = (timestamp - self.origin) // self.slide
+            accepted = False
+            for index in range(last, last - self.windows_per_record, -1):
+                if self._window_start(index) + self.size <= timestamp:
+                    break # The window ended before this timestamp
+                if first_open is not None and index < first_open:
+                    break # Already emitted; older windows are too
+                by_window.setdefault(index, []).append(record)
+                accepted = True
+            if not accepted:
+                self.late_records += 1
+            if latest is None or timestamp > latest:
+                latest = timestamp
+        for index, window_records in by_window.items():
+            self._aggregator(index).update_many(window_records)
+        return latest
+
+    def _add_batch(self, batch: RecordBatch) -> Optional[datetime.datetime]:
+        if self.timestamp_key != 'timestamp':
+            # Only the typed timestamp column is vectorized; other keys go through the record path
+            return self._add_records(batch.to_records())
+        if not len(batch):
+            return None
+        micros = batch.timestamps.astype('datetime64[us]').astype(np.int64)
+        origin = (self.origin - DEFAULT_ORIGIN) // _MICROSECOND
+        slide = self.slide // _MICROSECOND
+        size = self.size // _MICROSECOND
+        offsets = micros - origin
+        last = np.floor_divide(offsets, slide)
+        first_open = self._first_open_index()
+
+        rows, indexes = [], []
+        for step in range(self.windows_per_record):
+            index = last - step
+            member = index * slide + size > offsets # The window still covers the timestamp
+            if first_open is not None:
+                member &= index >= first_open
+            rows.append(np.flatnonzero(member))
+            indexes.append(index[member])
+        rows, indexes = np.concatenate(rows), np.concatenate(indexes)
+        self.late_records += len(batch) - len(np.unique(rows))
+
+        # Sort once by window, then hand each window its slice of row positions
+        order = np.argsort(indexes, kind='stable')
+        rows, indexes = rows[order], indexes[order]
+        boundaries = np.flatnonzero(np.diff(indexes)) + 1
+        starts = np.concatenate(([0], boundaries)) if len(indexes) else boundaries
+        for window_rows, index in zip(np.split(rows, boundaries), indexes[starts].tolist()):
+            self._aggregator(index).update_many(batch.filter(np.sort(window_rows)))
+        return batch.timestamps.max().astype(datetime.datetime)
+
+    def _aggregator(self, index: int) -> SummaryAggregator:
+        aggregator = self.windows.get(index)
+        if aggregator is None:
+            aggregator = self.windows[index] = self._new_aggregator()
+        return aggregator
+
+    def _emit_ready(self) -> List[WindowResult]:
+        ready = []
+        first_open = self._first_open_index()
+        if first_open is not None:
+            ready = sorted(index for index in self.windows if index < first_open)
+        overflow = len(self.windows) - len(ready) - self.max_open_windows
+        if overflow > 0:
+            # Bound the state: emit the oldest windows early, and treat later records for them as late
+            early = sorted(index for index in self.windows if first_open is None or index >= first_open)[:overflow]
+            logger.warning(f"{len(self.windows)} open windows exceed the limit of {self.max_open_windows}; emitting {overflow} early.")
+            ready.extend(early)
+            self.watermark = max(self.watermark or datetime.datetime.min, self._window_start(early[-1]) + self.size)
+        return [self._close(index) for index in ready]
+
+    def _close(self, index: int) -> WindowResult:
+        start = self._window_start(index)
+        return WindowResult(start, start + self.size, self.windows.pop(index))
+
+    def flush(self) -> List[WindowResult]:
+        """Emits every open window (at the end of the stream), oldest first."""
+        results = [self._close(index) for index in sorted(self.windows)]
+        if results:
+            self.watermark = max(self.watermark or datetime.datetime.min, results[-1].end)
+        return results
+
+    def __repr__(self) -> str:
+        return f"<WindowedAggregator size={self.size} slide={self.slide} open={len(self.windows)} watermark={self.watermark}>"
+
+def iter_windows(batches: Iterable[Records], size: Union[str, float, datetime.timedelta], **options: Any) -> Iterator[WindowResult]:
+    """
+    Runs a WindowedAggregator over a stream of batches (e.g. DataParser.iter_parse) and yields
+    each window as soon as it closes, then the remaining windows at the end of the stream.
+    Other keyword arguments are passed to WindowedAggregator.
+    """
+    aggregator = WindowedAggregator(size, **options)
+    for batch in batches:
+        yield from aggregator.update_many(batch)
+    yield from aggregator.flush()
+    if aggregator.late_records:
+        logger.info(f"Dropped {aggregator.late_records} late records.")
@@ -0,0 +1,136 @@
+from typing import List, Dict, Any, Callable, Optional, Tuple
+import datetime
+
+import numpy as np
+
+from src.utils.string_utils import normalize_name
+# Reason codes mirror the exception branches of the row-by-row parser
+from .quarantine import REASON_MISSING_KEY, REASON_CONVERSION_ERROR, REASON_UNEXPECTED_ERROR
+from .mapping import ColumnProjection, IDENTITY_PROJECTION
+
+class ConvertedColumns:
+    """
+    Result of converting a chunk of raw records column by column.
+    Column entries for rows flagged in error_mask are placeholders and must be ignored;
+    the first error seen for each rejected row is kept in errors as (reason, message), and
+    for unexpected errors the exception itself is kept in exceptions (for logging tracebacks).
+    """
+    def __init__(self, size: int):
+        self.size = size
+        self.ids = np.zeros(size, dtype=np.int64)
+        self.values = np.zeros(size, dtype=np.float64)
+        self.names: List[Optional[str]] = [None] * size
+        self.categories: List[Optional[str]] = [None] * size
+        self.timestamps: List[Optional[datetime.datetime]] = [None] * size
+        self.error_mask = np.zeros(size, dtype=bool)
+        self.errors: Dict[int, Tuple[str, str]] = {}
+        self.exceptions: Dict[int, BaseException] = {}
+
+    def reject(self, row: int, reason: str, message: str, exception: Optional[BaseException] = None) -> None:
+        """Flags a row as rejected, keeping only the first error reported for it."""
+        if row not in self.errors:
+            self.error_mask[row] = True
+            self.errors[row] = (reason, message)
+            if exception is not None:
+                self.exceptions[row] = exception
+
+def _convert_strings(cells: List[Any], func: Callable[[Any], str], result: List[Optional[str]], columns: ConvertedColumns) -> None:
+    """Applies func once per distinct cell value, rejecting rows whose value raises."""
+    cache: Dict[Any, Tuple[bool, Any]] = {}
+    for row, cell in enumerate(cells):
+        if row in columns.errors:
+            continue
+        try:
+            outcome = cache.get(cell)
+            cacheable = True
+        except TypeError:
+            # Unhashable cells (e.g. lists passed in directly) are converted without caching
+            outcome, cacheable = None, False
+        if outcome is None:
+            try:
+                outcome = (True, func(cell))
+            except Exception as e:
+                outcome = (False, e)
+            if cacheable:
+                cache[cell] = outcome
+        if outcome[0]:
+            result[row] = outcome[1]
+        else:
+            columns.reject(row, REASON_UNEXPECTED_ERROR, str(outcome[1]), outcome[1])
+
+def _convert_numeric(cells: List[Any], dtype, converter: Callable[[Any], Any], out: np.ndarray, columns: ConvertedColumns) -> None:
+    """
+    Converts a column with one NumPy cast, which applies the same int()/float() semantics per cell.
+    If any cell fails, the column is re-converted cell by cell to find and flag the bad rows.
+    """
+    # Rows that already failed get a harmless placeholder so the fast cast can still run
+    live_cells = [0 if row in columns.errors else cell for row, cell in enumerate(cells)] if columns.errors else cells
+    try:
+        out[:] = np.array(live_cells, dtype=object).astype(dtype)
+        return
+    except (ValueError, TypeError, OverflowError):
+        pass
+
+    for row, cell in enumerate(live_cells):
+        if row in columns.errors:
+            continue
+        try:
+            out[row] = converter(cell)
+        except ValueError as e:
+            columns.reject(row, REASON_CONVERSION_ERROR, str(e))
+        except OverflowError:
+            # The row parser keeps Python ints of any size, but the id column is int64
+            columns.reject(row, REASON_CONVERSION_ERROR, f"{cell!r} is outside the {out.dtype} range of batch parsing")
+        except Exception as e:
+            columns.reject(row, REASON_UNEXPECTED_ERROR, str(e), e)
+
+def _normalize_category(category: str) -> str:
+    return category.upper().strip()
+
+def convert_batch(raw_data: List[Dict[str, str]], projection: ColumnProjection = IDENTITY_PROJECTION) -> ConvertedColumns:
+    """
+    Converts a chunk of raw records into typed columns without raising per row.
+    Conversion steps run in the same order as the row-by-row parser, so each rejected row
+    reports the same reason it would have been skipped for there. The one difference: ids
+    outside the int64 range are rejected as conversion errors, while the row parser keeps them.
+    Each column is read from the raw column projection names for it.
+    """
+    size = len(raw_data)
+    columns = ConvertedColumns(size)
+    sources, defaults = projection.sources, projection.defaults
+    default_timestamp = defaults['timestamp'] or datetime.datetime.now().isoformat() # Clock is read once per batch
+
+    name_key, default_name = sources['name'], defaults['name']
+    names = [raw_record.get(name_key, default_name) for raw_record in raw_data]
+    _convert_strings(names, normalize_name, columns.names, columns)
+
+    id_key, default_id = sources['id'], defaults['id']
+    value_key, default_value = sources['value'], defaults['value']
+    id_cells = [raw_record.get(id_key, default_id) for raw_record in raw_data]
+    value_cells = [raw_record.get(value_key, default_value) for raw_record in raw_data]
+    missing_key_message = str(KeyError("Missing essential keys 'id' or 'value'"))
+    for row in range(size):
+        if id_cells[row] is None or value_cells[row] is None:
+            columns.reject(row, REASON_MISSING_KEY, missing_key_message)
+
+    _convert_numeric(id_cells, np.int64, int, columns.ids, columns)
+    _convert_numeric(value_cells, np.float64, float, columns.values, columns)
+
+    category_key, default_category = sources['category'], defaults['category']
+    categories = [raw_record.get(category_key, default_category) for raw_record in raw_data]
+    _convert_strings(categories, _normalize_category, columns.categories, columns)
+
+    fromisoformat = datetime.datetime.fromisoformat
+    timestamp_key = sources['timestamp']
+    for row, raw_record in enumerate(raw_data):
+        if row in columns.errors:
+            continue
+        ts_str = raw_record.get(timestamp_key, default_timestamp)
+        try:
+            columns.timestamps[row] = fromisoformat(ts_str.replace('Z', '+00:00'))
+        except ValueError as e:
+            columns.reject(row, REASON_CONVERSION_ERROR, str(e))
+        except Exception as e:
+            columns.reject(row, REASON_UNEXPECTED_ERROR, str(e), e)
+
+    return columns
@@ -0,0 +1,220 @@
+import asyncio
+import json
+import queue
+import threading
+from typing import List, Dict, Any, AsyncIterator, Iterator, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit, urlencode, parse_qsl
+
+import requests
+
+from src.utils.helpers import setup_logger, load_settings
+
+logger = setup_logger(__name__)
+
+# Responses worth retrying: throttling and transient server errors
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_CONCURRENCY = 4
+
+class HTTPSourceError(Exception):
+    """Raised when a page cannot be fetched or decoded after all retries."""
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+class AsyncConnectionPool:
+    """
+    Bounded pool of keep-alive connections to one host for asyncio code, backed by a requests
+    Session. At most max_connections requests are on the wire at once; each runs in a worker
+    thread so other pages keep being scheduled, and idle connections are reused.
+    Redirects are followed by requests.
+    """
+    def __init__(self, max_connections: int = DEFAULT_CONCURRENCY, timeout: float = 30.0):
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_connections)
+        # pool_block keeps the open connections to the host at max_connections
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max_connections, pool_block=True)
+        self._session = requests.Session()
+        self._session.headers['Accept'] = 'application/json'
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+    async def request(self, url: str) -> Tuple[int, bytes]:
+        """Sends a GET request and returns (status, body) of the final response."""
+        async with self._semaphore:
+            return await asyncio.to_thread(self._get, url)
+
+    def _get(self, url: str) -> Tuple[int, bytes]:
+        with self._session.get(url, timeout=self.timeout) as response:
+            return response.status_code, response.content
+
+    async def close(self) -> None:
+        self._session.close()
+
+class PaginatedHTTPSource:
+    """
+    Streams records from a paginated JSON endpoint (GET url?page=N&page_size=M).
+    A page may be a JSON list of records or an object with 'records' (or 'data') plus optional
+    'has_more', 'next_page' or 'total_pages'; a short or empty page also ends the stream.
+    Up to `concurrency` pages are fetched at once over a bounded connection pool and are
+    yielded in page order as soon as each one is available.
+    """
+    def __init__(self, url: str, page_size: int = DEFAULT_PAGE_SIZE, concurrency: int = DEFAULT_CONCURRENCY,
+                 max_connections: Optional[int] = None, max_retries: int = 3, backoff_factor: float = 0.5,
+                 timeout: float = 30.0, first_page: int = 1):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError(f"Unsupported URL scheme for HTTP source: {url}")
+        self.url = url
+        self.base_url = urlunsplit((parts.scheme, parts.netloc, parts.path or '/', '', ''))
+        self.base_query = parse_qsl(parts.query)
+        self.page_size = page_size
+        self.concurrency = max(1, concurrency)
+        self.max_connections = max_connections or self.concurrency
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.first_page = first_page
+        self.logger = setup_logger(f"{__name__}.PaginatedHTTPSource")
+
+    @classmethod
+    def from_settings(cls, source: str, settings: Optional[Dict[str, Any]] = None, **options) -> 'PaginatedHTTPSource':
+        """
+        Builds a source from config/settings.json: 'api' resolves to apiEndpoints.dataService,
+        and retryPolicy supplies maxRetries and backoffFactor.
+        """
+        settings = settings if settings is not None else load_settings()
+        url = settings.get('apiEndpoints', {}).get('dataService') if source == 'api' else source
+        if not url:
+            raise ValueError("No apiEndpoints.dataService configured for source 'api'")
+        retry_policy = settings.get('retryPolicy', {})
+        options.setdefault('max_retries', retry_policy.get('maxRetries', 3))
+        options.setdefault('backoff_factor', retry_policy.get('backoffFactor', 0.5))
+        return cls(url, **options)
+
+    def _page_url(self, page: int) -> str:
+        query = urlencode(self.base_query + [('page', page), ('page_size', self.page_size)])
+        return f"{self.base_url}?{query}"
+
+    async def _fetch_page(self, pool: AsyncConnectionPool, page: int) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Fetches one page with retries. Returns its records and the last page number, if now known."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                status, body = await pool.request(self._page_url(page))
+                if status in RETRYABLE_STATUSES:
+                    raise HTTPSourceError(f"HTTP {status} for page {page}", retryable=True)
+                if not 200 <= status < 300:
+                    # Redirects were already followed, so any other status is final
+                    raise HTTPSourceError(f"HTTP {status} for page {page}")
+                return self._decode_page(json.loads(body), page)
+            except HTTPSourceError as e:
+                if not e.retryable or attempt == self.max_retries:
+                    raise
+                error = e
+            except requests.TooManyRedirects as e:
+                raise HTTPSourceError(f"Too many redirects for page {page}: {e}") from e
+            except (requests.RequestException, OSError, asyncio.TimeoutError) as e:
+                if attempt == self.max_retries:
+                    raise HTTPSourceError(f"Failed to fetch page {page} after {attempt + 1} attempts: {e}") from e
+                error = e
+            except ValueError as e:
+                raise HTTPSourceError(f"Invalid JSON in page {page}: {e}") from e
+            delay = self.backoff_factor * (2 ** attempt)
+            self.logger.warning(f"Fetching page {page} failed ({error}); retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    def _decode_page(self, payload: Any, page: int) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        if isinstance(payload, list):
+            records, last_page = payload, None
+        elif isinstance(payload, dict):
+            records = payload.get('records', payload.get('data', []))
+            last_page = None
+            if 'total_pages' in payload:
+                last_page = self.first_page + int(payload['total_pages']) - 1
+            elif payload.get('has_more') is False or ('next_page' in payload and payload['next_page'] is None):
+                last_page = page
+        else:
+            raise HTTPSourceError(f"Unexpected JSON payload type for page {page}: {type(payload).__name__}")
+        if len(records) < self.page_size:
+            last_page = page if last_page is None else min(last_page, page)
+        # Scalars become strings so rows look the same as CSV rows to the parser
+        rows = [{k: (v if v is None or isinstance(v, str) else str(v)) for k, v in record.items()}
+                for record in records if isinstance(record, dict)]
+        return rows, last_page
+
+    async def iter_pages(self) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yields each page's records in page order while later pages are fetched concurrently."""
+        pool = AsyncConnectionPool(self.max_connections, self.timeout)
+        in_flight: Dict[int, asyncio.Task] = {}
+        next_page = expected = self.first_page
+        last_page: Optional[int] = None
+        try:
+            while last_page is None or expected <= last_page:
+                while len(in_flight) < self.concurrency and (last_page is None or next_page <= last_page):
+                    in_flight[next_page] = asyncio.ensure_future(self._fetch_page(pool, next_page))
+                    next_page += 1
+                records, page_last = await in_flight.pop(expected)
+                if page_last is not None and (last_page is None or page_last < last_page):
+                    last_page = page_last
+                    for page in [p for p in in_flight if p > last_page]:
+                        in_flight.pop(page).cancel()
+                if records:
+                    yield records
+                expected += 1
+        finally:
+            for task in in_flight.values():
+                task.cancel()
+            await asyncio.gather(*in_flight.values(), return_exceptions=True)
+            await pool.close()
+            self.logger.info(f"Fetched {expected - self.first_page} pages from {self.url}.")
+
+    def iter_batches(self, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Synchronous view of iter_pages for the DataLoader: the event loop runs in a background
+        thread and pages are re-chunked to batch_size and handed over through a bounded queue.
+        """
+        pages: "queue.Queue" = queue.Queue(maxsize=self.concurrency * 2)
+        stop = threading.Event()
+        done = object()
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        async def produce():
+            async for page in self.iter_pages():
+                if not await asyncio.to_thread(put, page):
+                    break
+
+        def run():
+            try:
+                asyncio.run(produce())
+                put(done)
+            except BaseException as e:
+                put(e)
+
+        thread = threading.Thread(target=run, name="http-source", daemon=True)
+        thread.start()
+        batch: List[Dict[str, Any]] = []
+        try:
+            while True:
+                item = pages.get()
+                if item is done:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                batch.extend(item)
+                while len(batch) >= batch_size:
+                    yield batch[:batch_size]
+                    batch = batch[batch_size:]
+            if batch:
+                yield batch
+        finally:
+            stop.set()
+            thread.join(timeout=self.timeout)
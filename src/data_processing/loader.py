@@ -1,17 +1,36 @@
 import csv
 import io
-from typing import List, Dict
+import json
+import os
+from typing import List, Dict, Iterator, Optional
 
 from src.utils.helpers import setup_logger
+from src.data_processing.record_batch import RecordBatch
+from src.data_processing.snapshot import is_snapshot_source, snapshot_path, load_snapshot
 
 logger = setup_logger(__name__)
 
+# Number of raw records handed out per batch by the streaming readers
+DEFAULT_BATCH_SIZE = 10000
+
+# File extensions understood by DataLoader, mapped to the reader format
+FILE_FORMATS = {
+    '.csv': 'csv',
+    '.tsv': 'tsv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+}
+
+def is_http_source(source: str) -> bool:
+    """True for 'api' (the configured data service) and for http(s) URLs."""
+    return source == 'api' or source.startswith(('http://', 'https://'))
+
 def load_dummy_data() -> List[Dict[str, str]]:
     """Loads sample data from a hardcoded CSV string."""
     logger.info("Loading dummy data.")
     # Simulate reading from a file
     csv_data = "id,name,value\n1,Apple,10\n2,Banana,20\n3,Cherry,30\n4,Date Fruit,40"
-    
+
     data = []
     try:
         # Use io.StringIO to treat the string as a file
@@ -24,15 +43,180 @@ def load_dummy_data() -> List[Dict[str, str]]:
         raise
     return data
 
+def detect_file_format(path: str) -> Optional[str]:
+    """Returns the reader format for a file path based on its extension, or None."""
+    _, ext = os.path.splitext(path)
+    return FILE_FORMATS.get(ext.lower())
+
+def has_shared_header(source: str) -> bool:
+    """Whether every row of a source has the same columns: delimited files (one header line) and the dummy data."""
+    return source == "dummy" or (not is_http_source(source) and detect_file_format(source) in ('csv', 'tsv'))
+
+def _chunked(rows: Iterator[Dict[str, str]], batch_size: int) -> Iterator[List[Dict[str, str]]]:
+    """Groups an iterator of rows into lists of at most batch_size rows."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+class _OffsetLineReader:
+    """Iterates a binary file's lines as text while tracking the byte offset consumed so far."""
+    def __init__(self, f, complete_lines_only: bool = False, encoding: str = 'utf-8'):
+        self.f = f
+        self.offset = f.tell()
+        self.complete_lines_only = complete_lines_only
+        self.encoding = encoding
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        line = self.f.readline()
+        if not line or (self.complete_lines_only and not line.endswith(b'\n')):
+            # An unterminated last line may still be being written; leave it for the next read
+            raise StopIteration
+        self.offset += len(line)
+        return line.decode(self.encoding)
+
+class FileReader:
+    """
+    Reads rows from a local CSV/TSV/JSON-lines file, optionally resuming from a byte offset.
+    After each row is produced, offset holds the byte position just past that row, which can
+    be passed back as start_offset to continue reading an append-only file later.
+    """
+    def __init__(self, path: str, file_format: str, start_offset: int = 0, complete_lines_only: bool = False):
+        self.path = path
+        self.file_format = file_format
+        self.start_offset = start_offset
+        self.complete_lines_only = complete_lines_only
+        self.offset = start_offset
+
+    def rows(self) -> Iterator[Dict[str, str]]:
+        with open(self.path, 'rb') as f:
+            if self.file_format == 'jsonl':
+                yield from self._jsonl_rows(f)
+            else:
+                yield from self._delimited_rows(f, delimiter='\t' if self.file_format == 'tsv' else ',')
+
+    def _delimited_rows(self, f, delimiter: str) -> Iterator[Dict[str, str]]:
+        lines = _OffsetLineReader(f, self.complete_lines_only)
+        header = next(csv.reader(lines, delimiter=delimiter), None)
+        if header is None:
+            self.offset = max(self.start_offset, lines.offset)
+            return
+        if self.start_offset > lines.offset:
+            f.seek(self.start_offset)
+            lines.offset = self.start_offset
+        self.offset = lines.offset
+        for row in csv.DictReader(lines, fieldnames=header, delimiter=delimiter):
+            self.offset = lines.offset
+            yield row
+
+    def _jsonl_rows(self, f) -> Iterator[Dict[str, str]]:
+        f.seek(self.start_offset)
+        lines = _OffsetLineReader(f, self.complete_lines_only)
+        for line in lines:
+            self.offset = lines.offset
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning(f"Skipping malformed JSON at byte {self.offset} of {self.path}: {e}")
+                continue
+            if not isinstance(obj, dict):
+                logger.warning(f"Skipping non-object JSON at byte {self.offset} of {self.path}.")
+                continue
+            # Scalars become strings so rows look the same as CSV rows to the parser
+            yield {k: (v if v is None or isinstance(v, str) else str(v)) for k, v in obj.items()}
+
+def iter_csv_batches(path: str, batch_size: int = DEFAULT_BATCH_SIZE, delimiter: str = ',') -> Iterator[List[Dict[str, str]]]:
+    """Streams a delimited text file as batches of row dictionaries."""
+    yield from _chunked(FileReader(path, 'tsv' if delimiter == '\t' else 'csv').rows(), batch_size)
+
+def iter_jsonl_batches(path: str, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Dict[str, str]]]:
+    """
+    Streams a JSON-lines file as batches of row dictionaries.
+    Scalar values are converted to strings so rows look the same as CSV rows to the parser.
+    """
+    yield from _chunked(FileReader(path, 'jsonl').rows(), batch_size)
+
 class DataLoader:
-    def __init__(self, source: str):
+    def __init__(self, source: str, batch_size: int = DEFAULT_BATCH_SIZE, http_options: Optional[Dict] = None):
         self.source = source
+        self.batch_size = batch_size
+        # Extra PaginatedHTTPSource arguments (page_size, concurrency, ...) for 'api' and URL sources
+        self.http_options = http_options or {}
+        self.offset: Optional[int] = None # Byte position reached in a file source
         self.logger = setup_logger(f"{__name__}.DataLoader")
 
     def load(self) -> List[Dict[str, str]]:
         self.logger.info(f"Loading data from {self.source}")
+        if is_snapshot_source(self.source):
+            raise ValueError(self._snapshot_message())
         if self.source == "dummy":
             return load_dummy_data()
+        elif detect_file_format(self.source) or is_http_source(self.source):
+            data = [record for batch in self.iter_batches() for record in batch]
+            self.logger.info(f"Successfully loaded {len(data)} records from {self.source}.")
+            return data
         else:
             self.logger.warning(f"Source '{self.source}' not implemented, returning empty list.")
-            return [] 
\ No newline at end of file
+            return []
+
+    def load_snapshot(self) -> RecordBatch:
+        """Memory-maps a snapshot:// source. Its records were validated when the snapshot was written."""
+        return load_snapshot(snapshot_path(self.source))
+
+    def _snapshot_message(self) -> str:
+        return (f"{self.source} holds parsed records, not raw rows; read it with load_snapshot() "
+                f"or DataParser instead")
+
+    def iter_batches(self, batch_size: Optional[int] = None, start_offset: int = 0, complete_lines_only: bool = False) -> Iterator[List[Dict[str, str]]]:
+        """
+        Yields the source's raw records in lists of at most batch_size records.
+        File sources are read lazily, so only one batch is held in memory at a time;
+        HTTP sources ('api' or a URL) yield records as their pages arrive.
+        Snapshot sources hold parsed data, not raw rows, and raise ValueError (see load_snapshot).
+        For file sources, start_offset resumes reading at a byte position and self.offset
+        tracks the position just past the last record yielded.
+        """
+        batch_size = self.batch_size if batch_size is None else batch_size
+        if batch_size <= 0:
+            raise ValueError("batch_size must be a positive integer")
+        if is_snapshot_source(self.source):
+            raise ValueError(self._snapshot_message())
+
+        if self.source == "dummy":
+            yield from _chunked(iter(load_dummy_data()), batch_size)
+            return
+
+        if is_http_source(self.source):
+            # Imported on demand: asyncio, requests and ssl are a large share of startup time for file-only runs
+            from src.data_processing.http_source import PaginatedHTTPSource
+            http_source = PaginatedHTTPSource.from_settings(self.source, **self.http_options)
+            self.logger.info(f"Streaming paginated data from {http_source.url} in batches of {batch_size}")
+            yield from http_source.iter_batches(batch_size)
+            return
+
+        file_format = detect_file_format(self.source)
+        if file_format is None:
+            self.logger.warning(f"Source '{self.source}' not implemented, no batches to read.")
+            return
+
+        self.logger.info(f"Streaming {file_format} data from {self.source} in batches of {batch_size}")
+        reader = FileReader(self.source, file_format, start_offset=start_offset, complete_lines_only=complete_lines_only)
+        self.offset = start_offset
+        try:
+            for batch in _chunked(reader.rows(), batch_size):
+                self.offset = reader.offset
+                yield batch
+            self.offset = reader.offset
+        except OSError as e:
+            self.logger.error(f"Failed to read data from {self.source}: {e}")
+            raise
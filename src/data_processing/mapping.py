@@ -0,0 +1,159 @@
+from typing import List, Dict, Any, Iterable, Optional, Sequence, Tuple
+
+from src.utils.helpers import setup_logger
+
+logger = setup_logger(__name__)
+
+# Raw columns read by the parser, with the value used when a row does not have the column
+FIELD_DEFAULTS: Dict[str, Optional[str]] = {
+    'id': None,
+    'name': '',
+    'value': None,
+    'category': 'Unknown',
+    'timestamp': None, # The parser substitutes the current time
+}
+
+# Distinct headers whose projection is kept per mapping
+MAX_CACHED_HEADERS = 64
+
+class ColumnProjection:
+    """
+    A ColumnMapping resolved against one header: the raw column to read for each parser field
+    and the value used when a row does not have it.
+    """
+    __slots__ = ('sources', 'defaults')
+
+    def __init__(self, sources: Dict[str, str], defaults: Dict[str, Optional[str]]):
+        self.sources = sources
+        self.defaults = defaults
+
+    @property
+    def is_identity(self) -> bool:
+        return all(source == field for field, source in self.sources.items())
+
+    def __repr__(self) -> str:
+        renamed = {field: source for field, source in self.sources.items() if source != field}
+        return f"<ColumnProjection renamed={renamed}>"
+
+IDENTITY_PROJECTION = ColumnProjection({field: field for field in FIELD_DEFAULTS}, dict(FIELD_DEFAULTS))
+
+class ColumnMapping:
+    """
+    Declarative renames for a data source's columns.
+    columns maps a parser field to its candidate raw columns in order of preference; the first
+    candidate present in a header is read for every row (fields not listed are read as-is).
+    defaults overrides the value used for rows without the column.
+    Mappings are resolved once per distinct header (see resolve), so rows are never copied or rebuilt.
+    """
+    def __init__(self, columns: Optional[Dict[str, Sequence[str]]] = None, defaults: Optional[Dict[str, Optional[str]]] = None):
+        self.columns = {field: tuple(candidates) for field, candidates in (columns or {}).items()}
+        self.defaults = dict(defaults or {})
+        unknown = [field for field in (*self.columns, *self.defaults) if field not in FIELD_DEFAULTS]
+        if unknown:
+            raise ValueError(f"Column mapping for unknown fields {unknown}; expected fields from {list(FIELD_DEFAULTS)}")
+        empty = [field for field, candidates in self.columns.items() if not candidates]
+        if empty:
+            raise ValueError(f"No candidate columns given for {empty}")
+        self._projections: Dict[Tuple[str, ...], ColumnProjection] = {}
+        # Headers that resolve to the same columns share one projection object
+        self._interned: Dict[Tuple[str, ...], ColumnProjection] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'ColumnMapping':
+        """
+        Builds a mapping from a JSON-style definition, e.g.
+        {"columns": {"id": ["legacyId", "id"]}, "defaults": {"category": "Unknown"}}.
+        A single column name may be given instead of a list.
+        """
+        columns = {field: [candidates] if isinstance(candidates, str) else candidates
+                   for field, candidates in config.get('columns', {}).items()}
+        return cls(columns, config.get('defaults'))
+
+    def resolve(self, header: Iterable[str]) -> ColumnProjection:
+        """
+        Returns the projection for a header (e.g. the keys of a batch's first record).
+        A field with no candidate in the header is read under its first candidate, so rows
+        that do carry that column are still parsed.
+        """
+        key = tuple(header)
+        projection = self._projections.get(key)
+        if projection is None:
+            present = set(key)
+            sources = {}
+            for field in FIELD_DEFAULTS:
+                candidates = self.columns.get(field, (field,))
+                sources[field] = next((column for column in candidates if column in present), candidates[0])
+            if len(self._projections) >= MAX_CACHED_HEADERS:
+                self._projections.clear()
+                self._interned.clear()
+            projection = self._interned.get(tuple(sources.values()))
+            if projection is None:
+                projection = ColumnProjection(sources, {**FIELD_DEFAULTS, **self.defaults})
+                self._interned[tuple(sources.values())] = projection
+            self._projections[key] = projection
+            logger.debug(f"Resolved column mapping for header {list(key)}: {projection!r}")
+        return projection
+
+    def project(self, raw_data: List[Dict[str, Any]], shared_header: bool = False) -> List[Tuple[int, int, ColumnProjection]]:
+        """
+        Splits a batch of raw records into (start, stop, projection) runs of consecutive rows read
+        through the same projection. With shared_header (delimited files, whose rows all have the
+        header's columns) the first record's projection covers the batch; otherwise each row's keys
+        are resolved, since JSON-lines and HTTP rows need not share their columns.
+        """
+        if shared_header or not raw_data:
+            return [(0, len(raw_data), self.resolve(raw_data[0] if raw_data else ()))]
+        runs = []
+        start, current = 0, self.resolve(raw_data[0])
+        for i in range(1, len(raw_data)):
+            projection = self.resolve(raw_data[i])
+            if projection is not current:
+                runs.append((start, i, current))
+                start, current = i, projection
+        runs.append((start, len(raw_data), current))
+        return runs
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Worker processes resolve headers again rather than receiving the cache
+        state = self.__dict__.copy()
+        state['_projections'] = {}
+        state['_interned'] = {}
+        return state
+
+    def __repr__(self) -> str:
+        return f"<ColumnMapping columns={self.columns}>"
+
+# Applies to every source without its own mapping: some feeds name the id column 'item_id'
+DEFAULT_MAPPING = ColumnMapping({'id': ['id', 'item_id']})
+
+# Mappings registered for specific data sources; other sources use DEFAULT_MAPPING
+_SOURCE_MAPPINGS: Dict[str, ColumnMapping] = {}
+
+def register_mapping(source: str, mapping: ColumnMapping) -> None:
+    """Reads records from the given data source through mapping instead of the default."""
+    _SOURCE_MAPPINGS[source] = mapping
+
+def unregister_mapping(source: str) -> None:
+    _SOURCE_MAPPINGS.pop(source, None)
+
+def get_mapping(source: Optional[str] = None) -> ColumnMapping:
+    return _SOURCE_MAPPINGS.get(source, DEFAULT_MAPPING) if source is not None else DEFAULT_MAPPING
+
+def register_mappings_from_settings(settings: Dict[str, Any]) -> List[str]:
+    """Registers the mappings in the settings' "sourceMappings" section and returns their sources."""
+    sources = []
+    for source, config in settings.get('sourceMappings', {}).items():
+        register_mapping(source, ColumnMapping.from_config(config))
+        sources.append(source)
+    if sources:
+        logger.info(f"Registered column mappings for sources: {sources}")
+    return sources
+
+# The legacy system's export names every column differently
+register_mapping('legacy_system', ColumnMapping({
+    'id': ['legacyId', 'id'],
+    'name': ['itemName', 'name'],
+    'value': ['itemValue', 'value'],
+    'category': ['itemCat', 'category'],
+    'timestamp': ['creationDate', 'timestamp'],
+}))
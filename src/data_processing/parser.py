@@ -1,61 +1,79 @@
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Callable, Optional, Tuple, Iterator, Iterable, Union
+from collections import deque, Counter
 import datetime
+import time
+
+import numpy as np
 
 from src.utils.helpers import setup_logger
-from src.utils.string_utils import sanitize_string, capitalize_words, snake_to_camel
-from .loader import DataLoader # Relative import from within the same package
+from src.utils.instrumentation import Instrumentation, NULL_INSTRUMENTATION
+from src.utils.string_utils import normalize_name, normalization_stats, snake_to_camel
+from .loader import DataLoader, DEFAULT_BATCH_SIZE, has_shared_header # Relative import from within the same package
+from .record_batch import RecordBatch
+from .partitions import PartitionedDataset
+from .snapshot import is_snapshot_source, snapshot_path, iter_snapshot_batches
+from .batch_conversion import convert_batch, ConvertedColumns
+from .schema import Schema, DEFAULT_SCHEMA, EXPECTED_SCHEMA, VALID_CATEGORIES, get_schema, note_unknown_category
+from .mapping import ColumnMapping, ColumnProjection, IDENTITY_PROJECTION, get_mapping
+from .quarantine import (
+    QuarantineSink,
+    RejectionReporter,
+    REASON_MISSING_KEY,
+    REASON_CONVERSION_ERROR,
+    REASON_UNEXPECTED_ERROR,
+    REASON_VALIDATION_ERROR,
+)
 
 logger = setup_logger(__name__)
 
-# Define expected schema for validation
-EXPECTED_SCHEMA = {
-    'id': int,
-    'name': str,
-    'value': float,
-    'category': str,
-    'timestamp': datetime.datetime
-}
-
-# Define valid categories (example)
-VALID_CATEGORIES = {"FRUIT", "VEGETABLE", "GRAIN", "DAIRY", "UNKNOWN"}
-
-def validate_record(record: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
-    """Validates a single parsed record against the schema and constraints."""
-    for key, expected_type in EXPECTED_SCHEMA.items():
-        if key not in record:
-            return False, f"Missing key: '{key}'"
-        if not isinstance(record[key], expected_type):
-            return False, f"Invalid type for '{key}': Expected {expected_type.__name__}, got {type(record[key]).__name__}"
-
-    # Specific field validation
-    if record['value'] < -1000 or record['value'] > 10000:
-        return False, f"Value {record['value']} out of reasonable range (-1000 to 10000)"
-    
-    if record['category'] not in VALID_CATEGORIES:
-        logger.warning(f"Category '{record['category']}' not in standard list {VALID_CATEGORIES}. Treating as UNKNOWN.")
-        record['category'] = "UNKNOWN" # Standardize unknown categories
-        
-    # Example: Ensure timestamp is not in the future (allowing for some clock skew)
-    if record['timestamp'] > datetime.datetime.now() + datetime.timedelta(minutes=5):
-        return False, f"Timestamp {record['timestamp']} is in the future"
-        
-    return True, None
-
-def parse_raw_data(raw_data: List[Dict[str, str]]) -> List[Dict[str, Any]]:
-    """Parses and cleans the raw data, including validation and type conversion."""
-    logger.info(f"Parsing {len(raw_data)} raw records.")
+def validate_record(record: Dict[str, Any], reporter: Optional[RejectionReporter] = None) -> Tuple[bool, Optional[str]]:
+    """
+    Validates a single parsed record against the default schema and constraints.
+    If a reporter is given, unknown-category warnings go through its sampled logging.
+    Use a schema's validator directly (validate_batch for chunks) to read the clock only once.
+    """
+    return DEFAULT_SCHEMA.validator.validate(record, reporter)
+
+def _new_validation_timings() -> Dict[str, Any]:
+    return {'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'rows_in': 0, 'rows_out': 0, 'rejected': Counter()}
+
+def _timed_validate_record(timings: Dict[str, Any], validate: Callable, record: Dict[str, Any], reporter: Optional[RejectionReporter],
+                           cutoff: Optional[datetime.datetime]) -> Tuple[bool, Optional[str]]:
+    wall, cpu = time.perf_counter(), time.process_time()
+    is_valid, error_msg = validate(record, reporter, cutoff)
+    timings['wall_seconds'] += time.perf_counter() - wall
+    timings['cpu_seconds'] += time.process_time() - cpu
+    timings['rows_in'] += 1
+    return is_valid, error_msg
+
+def _parse_records(raw_data: List[Dict[str, str]], start_index: int = 0, reporter: Optional[RejectionReporter] = None,
+                   timings: Optional[Dict[str, Any]] = None, schema: Schema = DEFAULT_SCHEMA,
+                   projection: ColumnProjection = IDENTITY_PROJECTION) -> Tuple[List[Dict[str, Any]], Counter]:
+    """
+    Parses a batch of raw records without logging a summary.
+    Returns the parsed records plus the number of rejected records per reason code.
+    start_index offsets the record numbers used in log messages when parsing a stream in batches.
+    If timings (see _new_validation_timings) is given, time spent validating is added to it.
+    projection names the raw column read for each field (see ColumnMapping.resolve).
+    """
+    reporter = reporter if reporter is not None else RejectionReporter(log=logger)
     parsed_data = []
-    skipped_records = 0
-    validation_errors = 0
+    rejections = Counter()
+    validate = schema.validator.validate
+    cutoff = schema.future_cutoff() # Clock is read once per batch
+    sources, defaults = projection.sources, projection.defaults
+    id_key, name_key, value_key, category_key, timestamp_key = (sources[field] for field in ('id', 'name', 'value', 'category', 'timestamp'))
+    default_id, default_name, default_value, default_category = (defaults[field] for field in ('id', 'name', 'value', 'category'))
+    default_timestamp = defaults['timestamp'] or datetime.datetime.now().isoformat()
 
-    for i, raw_record in enumerate(raw_data):
+    for i, raw_record in enumerate(raw_data, start=start_index):
         try:
             # Basic parsing and cleaning
-            cleaned_name = capitalize_words(sanitize_string(raw_record.get('name', '')))
-            record_id_str = raw_record.get('id')
-            record_value_str = raw_record.get('value')
-            record_category_raw = raw_record.get('category', 'Unknown')
-            record_ts_str = raw_record.get('timestamp', datetime.datetime.now().isoformat()) # Default timestamp
+            cleaned_name = normalize_name(raw_record.get(name_key, default_name))
+            record_id_str = raw_record.get(id_key, default_id)
+            record_value_str = raw_record.get(value_key, default_value)
+            record_category_raw = raw_record.get(category_key, default_category)
+            record_ts_str = raw_record.get(timestamp_key, default_timestamp)
 
             if record_id_str is None or record_value_str is None:
                 raise KeyError("Missing essential keys 'id' or 'value'")
@@ -68,64 +86,382 @@ def parse_raw_data(raw_data: List[Dict[str, str]]) -> List[Dict[str, Any]]:
                 'category': record_category_raw.upper().strip(), # Standardize category format
                 'timestamp': datetime.datetime.fromisoformat(record_ts_str.replace('Z', '+00:00')) # Handle ISO format
             }
-            
-            # Apply complex field name transformation (example)
-            # Let's imagine the source had 'item_id' instead of 'id' sometimes
-            if 'item_id' in raw_record and 'id' not in raw_record:
-                 parsed_record['id'] = int(raw_record['item_id'])
-            
+
             # Convert keys to camelCase if needed (demonstration)
             # camel_case_record = {snake_to_camel(k): v for k, v in parsed_record.items()}
             # We'll stick to snake_case for consistency here, but this shows usage
 
             # Validate the parsed record
-            is_valid, error_msg = validate_record(parsed_record)
+            if timings is None:
+                is_valid, error_msg = validate(parsed_record, reporter, cutoff)
+            else:
+                is_valid, error_msg = _timed_validate_record(timings, validate, parsed_record, reporter, cutoff)
             if is_valid:
                 parsed_data.append(parsed_record)
             else:
-                logger.warning(f"Skipping invalid record #{i+1}: {error_msg}. Original: {raw_record}")
-                validation_errors += 1
-                skipped_records += 1
+                reporter.reject(i + 1, REASON_VALIDATION_ERROR, error_msg, raw_record)
+                rejections[REASON_VALIDATION_ERROR] += 1
 
         except KeyError as e:
-            logger.warning(f"Skipping record #{i+1} due to missing key: {e}. Original: {raw_record}")
-            skipped_records += 1
+            reporter.reject(i + 1, REASON_MISSING_KEY, str(e), raw_record)
+            rejections[REASON_MISSING_KEY] += 1
         except ValueError as e:
-            logger.warning(f"Skipping record #{i+1} due to parsing/conversion error: {e}. Original: {raw_record}")
-            skipped_records += 1
+            reporter.reject(i + 1, REASON_CONVERSION_ERROR, str(e), raw_record)
+            rejections[REASON_CONVERSION_ERROR] += 1
         except Exception as e:
-            logger.error(f"Unexpected error parsing record #{i+1}: {e}. Original: {raw_record}", exc_info=True)
-            skipped_records += 1
-    
-    logger.info(f"Successfully parsed {len(parsed_data)} records.")
+            reporter.reject(i + 1, REASON_UNEXPECTED_ERROR, str(e), raw_record, exc_info=True)
+            rejections[REASON_UNEXPECTED_ERROR] += 1
+
+    if timings is not None:
+        timings['rows_out'] += len(parsed_data)
+        timings['rejected'][REASON_VALIDATION_ERROR] += rejections[REASON_VALIDATION_ERROR]
+    return parsed_data, rejections
+
+# Type of each column produced by convert_batch, as the row-by-row parser's records hold it
+COLUMN_TYPES = {'id': int, 'name': str, 'value': float, 'category': str, 'timestamp': datetime.datetime}
+
+def _unsupported_column_checks(schema: Schema) -> List[str]:
+    """Schema checks that validate_columns cannot reproduce on converted columns."""
+    problems = []
+    for field in schema.ranges:
+        if field in COLUMN_TYPES and field not in ('id', 'value'):
+            problems.append(f"range on non-numeric field {field!r}")
+    if schema.categories is not None and schema.category_field in schema.fields and schema.category_field not in ('name', 'category'):
+        problems.append(f"categories on non-string field {schema.category_field!r}")
+    if schema.timestamp_field in schema.fields and schema.timestamp_field in COLUMN_TYPES and schema.timestamp_field != 'timestamp':
+        problems.append(f"future check on field {schema.timestamp_field!r}")
+    return problems
+
+def validate_columns(columns: ConvertedColumns, reporter: Optional[RejectionReporter] = None, schema: Schema = DEFAULT_SCHEMA) -> None:
+    """
+    Batch counterpart of validate_record for converted columns.
+    Rows failing a check are flagged on the columns' error mask, and unknown categories are
+    standardized in place. Checks run in the same order, with the same messages, as the
+    schema's compiled validator. Raises ValueError for a schema with checks only the
+    row-by-row parser can run (see _unsupported_column_checks).
+    """
+    unsupported = _unsupported_column_checks(schema)
+    if unsupported:
+        raise ValueError(f"Vectorized parsing cannot enforce {schema!r} ({'; '.join(unsupported)}); parse with vectorized=False")
+
+    # Every converted row has the same fields and types, so a field check fails for all live rows or none
+    for field, field_type in schema.fields.items():
+        column_type = COLUMN_TYPES.get(field)
+        if column_type is None:
+            message = f"Missing key: {field!r}"
+        elif not issubclass(column_type, field_type):
+            message = f"Invalid type for {field!r}: Expected {field_type.__name__}, got {column_type.__name__}"
+        else:
+            continue
+        for row in np.flatnonzero(~columns.error_mask).tolist():
+            columns.reject(row, REASON_VALIDATION_ERROR, message)
+        return
+
+    numeric_columns = {'id': columns.ids, 'value': columns.values}
+    for field, (low, high) in schema.ranges.items():
+        column = numeric_columns[field]
+        out_of_range = ~columns.error_mask & ((column < low) | (column > high))
+        for row in np.flatnonzero(out_of_range).tolist():
+            columns.reject(row, REASON_VALIDATION_ERROR, f"{field.capitalize()} {column[row].item()} out of reasonable range ({low} to {high})")
+
+    category_column = None
+    if schema.categories is not None and schema.category_field in schema.fields:
+        category_column = columns.names if schema.category_field == 'name' else columns.categories
+    future_cutoff = schema.future_cutoff() if schema.timestamp_field == 'timestamp' else None # Clock is read once per batch
+    for row in np.flatnonzero(~columns.error_mask).tolist():
+        if category_column is not None and category_column[row] not in schema.categories:
+            note_unknown_category(category_column[row], schema.categories, reporter)
+            category_column[row] = schema.unknown_category # Standardize unknown categories
+        if future_cutoff is None:
+            continue
+        timestamp = columns.timestamps[row]
+        if timestamp.tzinfo is not None:
+            # Matches the TypeError validate_record hits when comparing against the naive clock
+            columns.reject(row, REASON_UNEXPECTED_ERROR, "can't compare offset-naive and offset-aware datetimes")
+        elif timestamp > future_cutoff:
+            columns.reject(row, REASON_VALIDATION_ERROR, f"Timestamp {timestamp} is in the future")
+
+def _parse_records_vectorized(raw_data: List[Dict[str, str]], start_index: int = 0, columnar: bool = False,
+                              reporter: Optional[RejectionReporter] = None, timings: Optional[Dict[str, Any]] = None,
+                              schema: Schema = DEFAULT_SCHEMA,
+                              projection: ColumnProjection = IDENTITY_PROJECTION) -> Tuple[Union[List[Dict[str, Any]], RecordBatch], Counter]:
+    """
+    Column-at-a-time counterpart of _parse_records.
+    Bad cells are collected in a per-row error mask instead of raising, but rows are skipped,
+    reported and counted exactly as the row-by-row parser would (except ids beyond int64;
+    see convert_batch).
+    """
+    reporter = reporter if reporter is not None else RejectionReporter(log=logger)
+    columns = convert_batch(raw_data, projection)
+    if timings is None:
+        validate_columns(columns, reporter, schema)
+    else:
+        rows_in, rejected_before = int((~columns.error_mask).sum()), len(columns.errors)
+        wall, cpu = time.perf_counter(), time.process_time()
+        validate_columns(columns, reporter, schema)
+        timings['wall_seconds'] += time.perf_counter() - wall
+        timings['cpu_seconds'] += time.process_time() - cpu
+        timings['rows_in'] += rows_in
+        timings['rows_out'] += int((~columns.error_mask).sum())
+        timings['rejected'][REASON_VALIDATION_ERROR] += len(columns.errors) - rejected_before
+
+    rejections = Counter()
+    for row in sorted(columns.errors):
+        reason, message = columns.errors[row]
+        reporter.reject(start_index + row + 1, reason, message, raw_data[row], exc_info=columns.exceptions.get(row, False))
+        rejections[reason] += 1
+
+    keep = np.flatnonzero(~columns.error_mask).tolist()
+    names = [columns.names[row] for row in keep]
+    categories = [columns.categories[row] for row in keep]
+    timestamps = [columns.timestamps[row] for row in keep]
+    if columnar:
+        parsed = RecordBatch.from_columns(columns.ids[keep], names, columns.values[keep], categories, timestamps)
+    else:
+        parsed = [
+            {'id': record_id, 'name': name, 'value': value, 'category': category, 'timestamp': timestamp}
+            for record_id, name, value, category, timestamp in zip(
+                columns.ids[keep].tolist(), names, columns.values[keep].tolist(), categories, timestamps)
+        ]
+    return parsed, rejections
+
+def _parse_batch(raw_data: List[Dict[str, str]], start_index: int = 0, columnar: bool = False, vectorized: bool = False,
+                 reporter: Optional[RejectionReporter] = None, timings: Optional[Dict[str, Any]] = None,
+                 schema: Schema = DEFAULT_SCHEMA, mapping: Optional[ColumnMapping] = None,
+                 shared_header: bool = False) -> Tuple[Union[List[Dict[str, Any]], RecordBatch], Counter]:
+    """
+    Parses one batch with the selected conversion mode and output representation.
+    Raw columns are read through mapping (the default mapping unless given), resolved once from
+    the batch's header when shared_header is set and per distinct row key set otherwise.
+    """
+    runs = (mapping or get_mapping()).project(raw_data, shared_header)
+    if len(runs) == 1:
+        return _parse_run(raw_data, start_index, columnar, vectorized, reporter, timings, schema, runs[0][2])
+    parsed_runs = []
+    rejections = Counter()
+    for start, stop, projection in runs:
+        parsed_run, run_rejections = _parse_run(raw_data[start:stop], start_index + start, columnar, vectorized, reporter, timings,
+                                                schema, projection)
+        parsed_runs.append(parsed_run)
+        rejections.update(run_rejections)
+    if columnar:
+        return RecordBatch.concat(parsed_runs), rejections
+    return [record for parsed_run in parsed_runs for record in parsed_run], rejections
+
+def _parse_run(raw_data: List[Dict[str, str]], start_index: int, columnar: bool, vectorized: bool, reporter: Optional[RejectionReporter],
+               timings: Optional[Dict[str, Any]], schema: Schema, projection: ColumnProjection) -> Tuple[Union[List[Dict[str, Any]], RecordBatch], Counter]:
+    """Parses consecutive raw records that are read through the same projection."""
+    if vectorized:
+        return _parse_records_vectorized(raw_data, start_index=start_index, columnar=columnar, reporter=reporter, timings=timings,
+                                         schema=schema, projection=projection)
+    parsed_data, rejections = _parse_records(raw_data, start_index=start_index, reporter=reporter, timings=timings, schema=schema,
+                                             projection=projection)
+    if columnar:
+        return RecordBatch.from_records(parsed_data), rejections
+    return parsed_data, rejections
+
+def _log_parse_summary(parsed_count: int, rejections: Counter) -> None:
+    """Logs the end-of-parse summary shared by every parsing entry point."""
+    skipped_records = sum(rejections.values())
+    validation_errors = rejections[REASON_VALIDATION_ERROR]
+    logger.info(f"Successfully parsed {parsed_count} records.")
     logger.info(f"Skipped {skipped_records} records ({validation_errors} due to validation failures). ")
+    if skipped_records:
+        logger.info(f"Rejected records by reason: {dict(rejections)}")
+
+def parse_raw_data(raw_data: List[Dict[str, str]], columnar: bool = False, vectorized: bool = False,
+                   quarantine: Optional[QuarantineSink] = None, schema: Schema = DEFAULT_SCHEMA,
+                   mapping: Optional[ColumnMapping] = None) -> Union[List[Dict[str, Any]], RecordBatch]:
+    """
+    Parses and cleans the raw data, including validation and type conversion.
+    With columnar=True the result is returned as a RecordBatch instead of a list of dicts.
+    With vectorized=True whole columns are converted at once instead of row by row.
+    Rejected records are sent to the quarantine sink if one is given.
+    Records are validated against schema (the default schema unless given), and their columns
+    are read through mapping (the default column mapping unless given).
+    """
+    logger.info(f"Parsing {len(raw_data)} raw records.")
+    reporter = RejectionReporter(log=logger, sink=quarantine)
+    parsed_data, rejections = _parse_batch(raw_data, columnar=columnar, vectorized=vectorized, reporter=reporter, schema=schema, mapping=mapping)
+    reporter.log_summary()
+    _log_parse_summary(len(parsed_data), rejections)
     return parsed_data
 
+def _parse_batch_job(raw_data: List[Dict[str, str]], start_index: int, columnar: bool, vectorized: bool, collect_quarantine: bool,
+                     schema: Schema = DEFAULT_SCHEMA, mapping: Optional[ColumnMapping] = None,
+                     shared_header: bool = False) -> Tuple[Union[List[Dict[str, Any]], RecordBatch], Counter, list]:
+    """
+    Worker-process entry point: parses one batch through the source's column mapping.
+    Rejected records are collected in memory and returned so the parent can forward them to its sink.
+    """
+    sink = QuarantineSink() if collect_quarantine else None
+    reporter = RejectionReporter(log=logger, sink=sink)
+    parsed, rejections = _parse_batch(raw_data, start_index=start_index, columnar=columnar, vectorized=vectorized, reporter=reporter,
+                                      schema=schema, mapping=mapping, shared_header=shared_header)
+    reporter.log_summary()
+    return parsed, rejections, sink.entries if sink is not None else []
+
 class DataParser:
-    def __init__(self):
+    def __init__(self, quarantine: Optional[QuarantineSink] = None, instrumentation: Optional[Instrumentation] = None,
+                 schema: Optional[Schema] = None, mapping: Optional[ColumnMapping] = None):
+        self.quarantine = quarantine # Optional sink receiving every rejected record
+        self.schema = schema # Overrides the schema registered for the data source
+        self.mapping = mapping # Overrides the column mapping registered for the data source
+        # Records 'load', 'parse' and (for in-process parsing) the nested 'validate' stage
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        self.last_offset: Optional[int] = None # Byte position reached by the last file source parsed
+        self.last_rejections: Counter = Counter() # Rejected records per reason for the last source parsed
         self.logger = setup_logger(f"{__name__}.DataParser")
 
-    def parse(self, data_source: str) -> List[Dict[str, Any]]:
+    def parse(self, data_source: str, batch_size: int = DEFAULT_BATCH_SIZE, columnar: bool = False, vectorized: bool = False, workers: int = 1) -> Union[List[Dict[str, Any]], RecordBatch]:
         self.logger.info(f"Initiating parsing process for source: {data_source}")
-        loader = DataLoader(data_source)
-        raw_data = loader.load()
-        
-        # Add example modification based on source (could be more complex)
-        if data_source == "legacy_system":
-            self.logger.info("Applying legacy data transformations...")
-            # Hypothetical: maybe legacy system used different column names
-            transformed_raw_data = []
-            for rec in raw_data:
-                 new_rec = {
-                     'id': rec.get('legacyId', rec.get('id')),
-                     'name': rec.get('itemName', rec.get('name')),
-                     'value': rec.get('itemValue', rec.get('value')),
-                     'category': rec.get('itemCat', rec.get('category', 'Unknown')),
-                     'timestamp': rec.get('creationDate', rec.get('timestamp'))
-                 }
-                 transformed_raw_data.append({k: v for k, v in new_rec.items() if v is not None}) # Keep only non-null
-            raw_data = transformed_raw_data
-
-        parsed_data = parse_raw_data(raw_data)
+        if columnar and is_snapshot_source(data_source):
+            # Hand out the memory-mapped columns as they are instead of concatenating slices
+            self.last_offset, self.last_rejections = None, Counter()
+            return DataLoader(data_source).load_snapshot()
+        batches = self.iter_parse(data_source, batch_size=batch_size, columnar=columnar, vectorized=vectorized, workers=workers)
+        if columnar:
+            parsed_data = RecordBatch.concat(list(batches))
+        else:
+            parsed_data = []
+            for parsed_batch in batches:
+                parsed_data.extend(parsed_batch)
         self.logger.info("Parsing process completed.")
-        return parsed_data 
\ No newline at end of file
+        return parsed_data
+
+    def parse_partitioned(self, data_source: str, memory_budget: Optional[int] = None, spill_dir: Optional[str] = None,
+                          batch_size: int = DEFAULT_BATCH_SIZE, vectorized: bool = False, workers: int = 1) -> PartitionedDataset:
+        """
+        Out-of-core counterpart of parse(columnar=True): each parsed batch becomes a partition,
+        and partitions beyond memory_budget bytes are spilled to disk (see PartitionedDataset).
+        """
+        dataset = PartitionedDataset(memory_budget=memory_budget, spill_dir=spill_dir)
+        for parsed_batch in self.iter_parse(data_source, batch_size=batch_size, columnar=True, vectorized=vectorized, workers=workers):
+            dataset.append(parsed_batch)
+        self.logger.info(f"Parsed {data_source} into {dataset!r}")
+        return dataset
+
+    def iter_parse(self, data_source: str, batch_size: int = DEFAULT_BATCH_SIZE, columnar: bool = False, vectorized: bool = False, workers: int = 1,
+                   start_offset: int = 0, complete_lines_only: bool = False) -> Iterator[Union[List[Dict[str, Any]], RecordBatch]]:
+        """
+        Loads and parses the source one batch at a time, yielding each parsed batch.
+        Only a single raw batch is held in memory, so arbitrarily large files can be processed.
+        With columnar=True each batch is yielded as a RecordBatch; vectorized=True selects
+        column-at-a-time conversion. workers > 1 parses batches in a process pool while
+        still yielding them in source order. start_offset and complete_lines_only are passed
+        to the loader for resuming file sources; the byte position reached is kept in last_offset.
+        Snapshot sources already hold validated records and are passed through without parsing.
+        """
+        if is_snapshot_source(data_source):
+            self.last_offset, self.last_rejections = None, Counter()
+            for snapshot_batch in self._timed_load(iter_snapshot_batches(snapshot_path(data_source), batch_size)):
+                yield snapshot_batch if columnar else snapshot_batch.to_records()
+            return
+
+        loader = DataLoader(data_source, batch_size=batch_size)
+
+        mapping = self.mapping or get_mapping(data_source)
+        if mapping is not get_mapping():
+            self.logger.info(f"Reading columns through {mapping!r}")
+        shared_header = has_shared_header(data_source)
+
+        raw_batches = self._timed_load(loader.iter_batches(start_offset=start_offset, complete_lines_only=complete_lines_only))
+        reporter = RejectionReporter(log=logger, sink=self.quarantine)
+        schema = self.schema or get_schema(data_source)
+        if workers and workers > 1:
+            self.logger.info(f"Parsing with {workers} worker processes.")
+            results = self._parse_in_pool(raw_batches, workers, columnar, vectorized, schema, mapping, shared_header)
+        else:
+            results = self._parse_serially(raw_batches, columnar, vectorized, reporter, schema, mapping, shared_header)
+
+        raw_count = parsed_count = 0
+        rejections = Counter()
+        for raw_len, parsed_batch, batch_rejections in results:
+            raw_count += raw_len
+            parsed_count += len(parsed_batch)
+            rejections.update(batch_rejections)
+            yield parsed_batch
+
+        self.last_offset = loader.offset
+        self.last_rejections = rejections
+        if self.quarantine is not None:
+            self.quarantine.flush()
+        reporter.log_summary()
+        logger.info(f"Parsed {raw_count} raw records from {data_source}.")
+        logger.debug(f"Name normalization cache: {normalization_stats()}")
+        _log_parse_summary(parsed_count, rejections)
+
+    def _timed_load(self, batches: Iterable) -> Iterator:
+        """Records the time spent pulling each batch from the loader as the 'load' stage."""
+        if not self.instrumentation.enabled:
+            return iter(batches)
+        return self._iter_timed_load(iter(batches))
+
+    def _iter_timed_load(self, batches: Iterator) -> Iterator:
+        while True:
+            with self.instrumentation.stage('load') as stage:
+                batch = next(batches, None)
+                stage.rows_out = len(batch) if batch is not None else 0
+            if batch is None:
+                return
+            yield batch
+
+    @staticmethod
+    def _with_offsets(raw_batches: Iterable[List[Dict[str, str]]]) -> Iterator[Tuple[List[Dict[str, str]], int]]:
+        """Pairs each raw batch with the index of its first record in the whole source."""
+        start_index = 0
+        for raw_batch in raw_batches:
+            yield raw_batch, start_index
+            start_index += len(raw_batch)
+
+    def _parse_serially(self, raw_batches: Iterable[List[Dict[str, str]]], columnar: bool, vectorized: bool, reporter: RejectionReporter,
+                        schema: Schema = DEFAULT_SCHEMA, mapping: Optional[ColumnMapping] = None,
+                        shared_header: bool = False) -> Iterator[Tuple[int, Union[List[Dict[str, Any]], RecordBatch], Counter]]:
+        """Parses raw batches in this process, sharing one reporter so log sampling spans the whole source."""
+        for raw_batch, start_index in self._with_offsets(raw_batches):
+            timings = _new_validation_timings() if self.instrumentation.enabled else None
+            with self.instrumentation.stage('parse', rows_in=len(raw_batch)) as stage:
+                parsed_batch, rejections = _parse_batch(raw_batch, start_index=start_index, columnar=columnar, vectorized=vectorized,
+                                                        reporter=reporter, timings=timings, schema=schema, mapping=mapping,
+                                                        shared_header=shared_header)
+                stage.rows_out = len(parsed_batch)
+                stage.rejected = rejections
+            if timings is not None:
+                self.instrumentation.record('validate', **timings)
+            yield len(raw_batch), parsed_batch, rejections
+
+    def _parse_in_pool(self, raw_batches: Iterable[List[Dict[str, str]]], workers: int, columnar: bool, vectorized: bool,
+                       schema: Schema = DEFAULT_SCHEMA, mapping: Optional[ColumnMapping] = None,
+                       shared_header: bool = False) -> Iterator[Tuple[int, Union[List[Dict[str, Any]], RecordBatch], Counter]]:
+        """
+        Parses raw batches in a process pool and yields (raw_count, parsed, rejections) in source order.
+        At most two batches per worker are in flight, so memory stays bounded for streamed sources.
+        Each worker samples its own log lines; quarantined records are forwarded to this parser's sink.
+        """
+        # Imported on demand: multiprocessing is only needed when parsing with workers
+        from concurrent.futures import ProcessPoolExecutor
+        collect_quarantine = self.quarantine is not None
+        pool = ProcessPoolExecutor(max_workers=workers)
+        pending = deque()
+
+        def finish(raw_len, future):
+            # The 'parse' stage measures the time spent waiting on the worker
+            with self.instrumentation.stage('parse', rows_in=raw_len) as stage:
+                parsed_batch, rejections, quarantined = future.result()
+                stage.rows_out = len(parsed_batch)
+                stage.rejected = rejections
+            if quarantined:
+                self.quarantine.extend(quarantined)
+            return raw_len, parsed_batch, rejections
+
+        try:
+            for raw_batch, start_index in self._with_offsets(raw_batches):
+                future = pool.submit(_parse_batch_job, raw_batch, start_index, columnar, vectorized, collect_quarantine, schema, mapping,
+                                     shared_header)
+                pending.append((len(raw_batch), future))
+                if len(pending) >= workers * 2:
+                    yield finish(*pending.popleft())
+            while pending:
+                yield finish(*pending.popleft())
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
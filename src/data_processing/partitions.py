@@ -0,0 +1,70 @@
+from typing import List, Iterator, Optional, Union
+
+from src.utils.helpers import setup_logger
+from src.utils.spill import SpillDirectory
+from .record_batch import RecordBatch
+from .snapshot import write_snapshot, load_snapshot
+
+logger = setup_logger(__name__)
+
+# Rough per-entry cost of a dictionary-encoded string (object header plus list slot)
+_DICTIONARY_ENTRY_BYTES = 64
+
+def batch_nbytes(batch: RecordBatch) -> int:
+    """Approximate memory held by a RecordBatch: its arrays plus the name/category dictionaries."""
+    arrays = [batch.ids, batch.values, batch.timestamps, batch.name_codes, batch.category_codes, *batch.extra_columns.values()]
+    dictionaries = batch.name_dictionary + batch.category_dictionary
+    return sum(array.nbytes for array in arrays) + sum(len(entry) + _DICTIONARY_ENTRY_BYTES for entry in dictionaries)
+
+class PartitionedDataset:
+    """
+    Parsed data kept as a sequence of RecordBatch partitions, for passes that need to read the
+    data more than once. Partitions are held in memory up to memory_budget bytes; later ones
+    are written to snapshot files under spill_dir and memory-mapped back when iterated.
+    Partitions carrying derived columns are always kept in memory (snapshots store the schema fields only).
+    """
+    def __init__(self, memory_budget: Optional[int] = None, spill_dir: Optional[str] = None):
+        self.memory_budget = memory_budget
+        self.memory_bytes = 0
+        self.rows = 0
+        self._partitions: List[Union[RecordBatch, str]] = [] # In-memory batches or snapshot paths
+        self._spill = SpillDirectory(spill_dir, prefix='partitions-')
+
+    def append(self, batch: RecordBatch) -> None:
+        size = batch_nbytes(batch)
+        over_budget = self.memory_budget is not None and self.memory_bytes + size > self.memory_budget
+        if over_budget and not batch.extra_columns:
+            path = self._spill.new_file('.snap')
+            write_snapshot(batch, path)
+            self._partitions.append(path)
+        else:
+            self._partitions.append(batch)
+            self.memory_bytes += size
+        self.rows += len(batch)
+
+    def __iter__(self) -> Iterator[RecordBatch]:
+        for partition in self._partitions:
+            yield partition if isinstance(partition, RecordBatch) else load_snapshot(partition)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    @property
+    def partitions(self) -> int:
+        return len(self._partitions)
+
+    @property
+    def spilled_partitions(self) -> int:
+        return sum(1 for partition in self._partitions if not isinstance(partition, RecordBatch))
+
+    def to_batch(self) -> RecordBatch:
+        """Concatenates every partition into one in-memory RecordBatch."""
+        return RecordBatch.concat(list(self)) if self._partitions else RecordBatch.empty()
+
+    def close(self) -> None:
+        """Drops the partitions and removes the spill files."""
+        self._partitions, self.memory_bytes, self.rows = [], 0, 0
+        self._spill.close()
+
+    def __repr__(self) -> str:
+        return f"<PartitionedDataset rows={self.rows} partitions={len(self._partitions)} spilled={self.spilled_partitions}>"
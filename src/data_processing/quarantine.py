@@ -0,0 +1,127 @@
+import json
+import logging
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple, Union
+
+from src.utils.helpers import setup_logger
+
+logger = setup_logger(__name__)
+
+# Reason codes for rejected records
+REASON_MISSING_KEY = 'missing_key'
+REASON_CONVERSION_ERROR = 'conversion_error'
+REASON_UNEXPECTED_ERROR = 'unexpected_error'
+REASON_VALIDATION_ERROR = 'validation_error'
+REJECTION_REASONS = (REASON_MISSING_KEY, REASON_CONVERSION_ERROR, REASON_UNEXPECTED_ERROR, REASON_VALIDATION_ERROR)
+
+# Reason code for records that are kept but needed fixing up
+REASON_UNKNOWN_CATEGORY = 'unknown_category'
+
+# %-style templates so the (potentially large) original record is only formatted if a line is emitted
+_LOG_TEMPLATES = {
+    REASON_MISSING_KEY: (logging.WARNING, "Skipping record #%d due to missing key: %s. Original: %s"),
+    REASON_CONVERSION_ERROR: (logging.WARNING, "Skipping record #%d due to parsing/conversion error: %s. Original: %s"),
+    REASON_UNEXPECTED_ERROR: (logging.ERROR, "Unexpected error parsing record #%d: %s. Original: %s"),
+    REASON_VALIDATION_ERROR: (logging.WARNING, "Skipping invalid record #%d: %s. Original: %s"),
+}
+
+# Default sampling: log the first few lines per reason, then one in every N
+DEFAULT_SAMPLE_FIRST = 5
+DEFAULT_SAMPLE_EVERY = 1000
+
+# Entry kept for each rejected record: (record_number, reason, message, original_record)
+QuarantineEntry = Tuple[int, str, str, Dict[str, Any]]
+
+class QuarantineSink:
+    """
+    Bulk sink for rejected records and their reason codes.
+    Without a path, entries are kept in memory (see entries); with a path, they are buffered
+    and appended to a JSON-lines file in batches of buffer_size.
+    """
+    def __init__(self, path: Optional[str] = None, buffer_size: int = 1000):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.entries: List[QuarantineEntry] = []
+        self.counts: Counter = Counter()
+
+    def add(self, record_number: int, reason: str, message: str, original: Dict[str, Any]) -> None:
+        self.counts[reason] += 1
+        self.entries.append((record_number, reason, message, original))
+        if self.path and len(self.entries) >= self.buffer_size:
+            self.flush()
+
+    def extend(self, entries: List[QuarantineEntry]) -> None:
+        """Adds entries collected elsewhere, e.g. by a worker process."""
+        for entry in entries:
+            self.add(*entry)
+
+    def flush(self) -> None:
+        """Writes buffered entries to the file (no-op for in-memory sinks)."""
+        if not self.path or not self.entries:
+            return
+        lines = [
+            json.dumps({'record': number, 'reason': reason, 'message': message, 'original': original}, default=str)
+            for number, reason, message, original in self.entries
+        ]
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        self.entries = []
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> 'QuarantineSink':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"<QuarantineSink path={self.path!r} total={sum(self.counts.values())}>"
+
+class RejectionReporter:
+    """
+    Counts rejected records per reason, forwards them to an optional QuarantineSink and
+    emits sampled log lines: the first sample_first per reason, then one in every sample_every
+    (0 disables the periodic lines). Suppressed lines are only reflected in the counts.
+    """
+    def __init__(self, log: logging.Logger = logger, sink: Optional[QuarantineSink] = None,
+                 sample_first: int = DEFAULT_SAMPLE_FIRST, sample_every: int = DEFAULT_SAMPLE_EVERY):
+        self.log = log
+        self.sink = sink
+        self.sample_first = sample_first
+        self.sample_every = sample_every
+        self.counts: Counter = Counter()
+        self.suppressed: Counter = Counter()
+
+    def _should_emit(self, reason: str, level: int) -> bool:
+        seen = self.counts[reason]
+        sampled = seen <= self.sample_first or (self.sample_every and seen % self.sample_every == 0)
+        if sampled and self.log.isEnabledFor(level):
+            return True
+        self.suppressed[reason] += 1
+        return False
+
+    def reject(self, record_number: int, reason: str, message: str, original: Dict[str, Any], exc_info: Union[bool, BaseException] = False) -> None:
+        """Records a rejected record under a reason code."""
+        self.counts[reason] += 1
+        if self.sink is not None:
+            self.sink.add(record_number, reason, message, original)
+        level, template = _LOG_TEMPLATES[reason]
+        if self._should_emit(reason, level):
+            self.log.log(level, template, record_number, message, original, exc_info=exc_info)
+
+    def note(self, reason: str, template: str, *args: Any, level: int = logging.WARNING) -> None:
+        """Records a non-fatal issue; template is %-formatted only if the line is emitted."""
+        self.counts[reason] += 1
+        if self._should_emit(reason, level):
+            self.log.log(level, template, *args)
+
+    def rejection_counts(self) -> Counter:
+        """Counts of rejected records only, keyed by reason."""
+        return Counter({reason: self.counts[reason] for reason in REJECTION_REASONS if self.counts[reason]})
+
+    def log_summary(self) -> None:
+        """Logs the aggregate counts behind any suppressed lines."""
+        if self.suppressed:
+            self.log.info("Suppressed %d log lines; totals by reason: %s", sum(self.suppressed.values()), dict(self.counts))
@@ -0,0 +1,209 @@
+from collections import Counter
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple
+import datetime
+
+import numpy as np
+
+# Column dtypes used for the typed (non-string) fields
+ID_DTYPE = np.int64
+VALUE_DTYPE = np.float64
+TIMESTAMP_DTYPE = 'datetime64[us]'
+CODE_DTYPE = np.int32
+
+def dictionary_encode(values: Iterable[str]) -> Tuple[np.ndarray, List[str]]:
+    """
+    Encodes a sequence of strings as integer codes plus a dictionary of distinct values.
+    Codes are assigned in order of first appearance.
+    """
+    index: Dict[str, int] = {}
+    codes = [index.setdefault(value, len(index)) for value in values]
+    return np.array(codes, dtype=CODE_DTYPE), list(index)
+
+class RecordBatch:
+    """
+    Columnar container for parsed records.
+    'id', 'value' and 'timestamp' are stored as typed NumPy arrays, while 'name' and
+    'category' are dictionary-encoded (integer codes into a list of distinct strings).
+    Derived columns (e.g. 'value_transformed') can be attached with with_column.
+    """
+    def __init__(self,
+                 ids: np.ndarray,
+                 values: np.ndarray,
+                 timestamps: np.ndarray,
+                 name_codes: np.ndarray,
+                 name_dictionary: List[str],
+                 category_codes: np.ndarray,
+                 category_dictionary: List[str],
+                 extra_columns: Optional[Dict[str, np.ndarray]] = None):
+        extra_columns = extra_columns or {}
+        lengths = {len(ids), len(values), len(timestamps), len(name_codes), len(category_codes)}
+        lengths.update(len(column) for column in extra_columns.values())
+        if len(lengths) > 1:
+            raise ValueError(f"All columns of a RecordBatch must have the same length, got {sorted(lengths)}")
+        self.ids = np.asarray(ids, dtype=ID_DTYPE)
+        self.values = np.asarray(values, dtype=VALUE_DTYPE)
+        self.timestamps = np.asarray(timestamps, dtype=TIMESTAMP_DTYPE)
+        self.name_codes = np.asarray(name_codes, dtype=CODE_DTYPE)
+        self.name_dictionary = name_dictionary
+        self.category_codes = np.asarray(category_codes, dtype=CODE_DTYPE)
+        self.category_dictionary = category_dictionary
+        self.extra_columns = extra_columns
+
+    @classmethod
+    def empty(cls) -> 'RecordBatch':
+        """Returns a batch with zero rows."""
+        return cls.from_columns([], [], [], [], [])
+
+    @classmethod
+    def from_columns(cls,
+                     ids: Sequence[int],
+                     names: Sequence[str],
+                     values: Sequence[float],
+                     categories: Sequence[str],
+                     timestamps: Sequence[datetime.datetime]) -> 'RecordBatch':
+        """Builds a batch from plain per-column sequences, dictionary-encoding the string columns."""
+        name_codes, name_dictionary = dictionary_encode(names)
+        category_codes, category_dictionary = dictionary_encode(categories)
+        return cls(
+            ids=np.array(ids, dtype=ID_DTYPE),
+            values=np.array(values, dtype=VALUE_DTYPE),
+            timestamps=np.array(timestamps, dtype=TIMESTAMP_DTYPE),
+            name_codes=name_codes,
+            name_dictionary=name_dictionary,
+            category_codes=category_codes,
+            category_dictionary=category_dictionary,
+        )
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[str, Any]]) -> 'RecordBatch':
+        """Adapter from the list-of-dicts representation. Every record must carry all schema fields."""
+        return cls.from_columns(
+            ids=[record['id'] for record in records],
+            names=[record['name'] for record in records],
+            values=[record['value'] for record in records],
+            categories=[record['category'] for record in records],
+            timestamps=[record['timestamp'] for record in records],
+        )
+
+    @classmethod
+    def concat(cls, batches: Sequence['RecordBatch']) -> 'RecordBatch':
+        """Concatenates batches, merging their string dictionaries."""
+        batches = [batch for batch in batches if len(batch)]
+        if not batches:
+            return cls.empty()
+        if len(batches) == 1:
+            return batches[0]
+
+        def merge(codes_attr: str, dictionary_attr: str) -> Tuple[np.ndarray, List[str]]:
+            index: Dict[str, int] = {}
+            merged_codes = []
+            for batch in batches:
+                remap = np.array([index.setdefault(value, len(index)) for value in getattr(batch, dictionary_attr)], dtype=CODE_DTYPE)
+                merged_codes.append(remap[getattr(batch, codes_attr)])
+            return np.concatenate(merged_codes), list(index)
+
+        name_codes, name_dictionary = merge('name_codes', 'name_dictionary')
+        category_codes, category_dictionary = merge('category_codes', 'category_dictionary')
+        # Derived columns survive only if every batch has them
+        shared_extras = [key for key in batches[0].extra_columns if all(key in batch.extra_columns for batch in batches)]
+        return cls(
+            ids=np.concatenate([batch.ids for batch in batches]),
+            values=np.concatenate([batch.values for batch in batches]),
+            timestamps=np.concatenate([batch.timestamps for batch in batches]),
+            name_codes=name_codes,
+            name_dictionary=name_dictionary,
+            category_codes=category_codes,
+            category_dictionary=category_dictionary,
+            extra_columns={key: np.concatenate([batch.extra_columns[key] for batch in batches]) for key in shared_extras},
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.to_records())
+
+    def __repr__(self) -> str:
+        return f"<RecordBatch rows={len(self)} categories={len(self.category_dictionary)}>"
+
+    @property
+    def names(self) -> np.ndarray:
+        """Decoded 'name' column as an object array."""
+        return np.array(self.name_dictionary, dtype=object)[self.name_codes] if len(self) else np.array([], dtype=object)
+
+    @property
+    def categories(self) -> np.ndarray:
+        """Decoded 'category' column as an object array."""
+        return np.array(self.category_dictionary, dtype=object)[self.category_codes] if len(self) else np.array([], dtype=object)
+
+    def column(self, key: str) -> Optional[np.ndarray]:
+        """Returns the named column as an array, or None if the batch has no such column."""
+        if key == 'id':
+            return self.ids
+        if key == 'value':
+            return self.values
+        if key == 'timestamp':
+            return self.timestamps
+        if key == 'name':
+            return self.names
+        if key == 'category':
+            return self.categories
+        return self.extra_columns.get(key)
+
+    def with_column(self, key: str, values: np.ndarray) -> 'RecordBatch':
+        """Returns a batch with an added (or replaced) derived column; existing columns are shared, not copied."""
+        values = np.asarray(values)
+        if len(values) != len(self):
+            raise ValueError(f"Column '{key}' has {len(values)} rows, expected {len(self)}")
+        return RecordBatch(
+            ids=self.ids,
+            values=self.values,
+            timestamps=self.timestamps,
+            name_codes=self.name_codes,
+            name_dictionary=self.name_dictionary,
+            category_codes=self.category_codes,
+            category_dictionary=self.category_dictionary,
+            extra_columns={**self.extra_columns, key: values},
+        )
+
+    def category_counts(self) -> Counter:
+        """Counts rows per category, ordered by first appearance like a Counter built row by row."""
+        codes, first_seen, counts = np.unique(self.category_codes, return_index=True, return_counts=True)
+        order = np.argsort(first_seen, kind='stable')
+        return Counter({self.category_dictionary[codes[i]]: int(counts[i]) for i in order})
+
+    def filter(self, mask: np.ndarray) -> 'RecordBatch':
+        """Returns the rows selected by mask (a boolean array or slice). Dictionaries are shared with this batch."""
+        return RecordBatch(
+            ids=self.ids[mask],
+            values=self.values[mask],
+            timestamps=self.timestamps[mask],
+            name_codes=self.name_codes[mask],
+            name_dictionary=self.name_dictionary,
+            category_codes=self.category_codes[mask],
+            category_dictionary=self.category_dictionary,
+            extra_columns={key: column[mask] for key, column in self.extra_columns.items()},
+        )
+
+    def slice(self, start: int, stop: int) -> 'RecordBatch':
+        """Returns rows start:stop as views of this batch's columns (no copy)."""
+        return self.filter(slice(start, stop))
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Adapter back to the list-of-dicts representation. NaN in derived float columns becomes None."""
+        records = [
+            {'id': record_id, 'name': name, 'value': value, 'category': category, 'timestamp': timestamp}
+            for record_id, name, value, category, timestamp in zip(
+                self.ids.tolist(),
+                self.names.tolist(),
+                self.values.tolist(),
+                self.categories.tolist(),
+                self.timestamps.astype(object).tolist(),
+            )
+        ]
+        for key, column in self.extra_columns.items():
+            if column.dtype.kind == 'f':
+                column = np.where(np.isnan(column), None, column)
+            for record, value in zip(records, column.tolist()):
+                record[key] = value
+        return records
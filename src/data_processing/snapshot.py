@@ -0,0 +1,130 @@
+import json
+import mmap
+import os
+import struct
+from typing import List, Dict, Any, Iterator, Union
+
+import numpy as np
+
+from src.utils.helpers import setup_logger
+from .record_batch import RecordBatch, ID_DTYPE, VALUE_DTYPE, TIMESTAMP_DTYPE, CODE_DTYPE
+from .schema import EXPECTED_SCHEMA
+
+logger = setup_logger(__name__)
+
+SNAPSHOT_SCHEME = 'snapshot://'
+SNAPSHOT_MAGIC = b'DPSNAP01'
+SNAPSHOT_VERSION = 1
+
+# Column data starts at multiples of this, so every array is aligned for its dtype
+ALIGNMENT = 64
+
+# Storage of each schema field: RecordBatch attribute, on-disk dtype (little-endian), encoding
+COLUMN_LAYOUT = {
+    'id': ('ids', np.dtype(ID_DTYPE).newbyteorder('<'), 'plain'),
+    'name': ('name_codes', np.dtype(CODE_DTYPE).newbyteorder('<'), 'dictionary'),
+    'value': ('values', np.dtype(VALUE_DTYPE).newbyteorder('<'), 'plain'),
+    'category': ('category_codes', np.dtype(CODE_DTYPE).newbyteorder('<'), 'dictionary'),
+    'timestamp': ('timestamps', np.dtype(TIMESTAMP_DTYPE).newbyteorder('<'), 'plain'),
+}
+
+_HEADER_PREFIX = struct.Struct('<8sI') # magic, header length
+
+def is_snapshot_source(source: str) -> bool:
+    return source.startswith(SNAPSHOT_SCHEME)
+
+def snapshot_path(source: str) -> str:
+    """Strips the snapshot:// scheme from a source string."""
+    return source[len(SNAPSHOT_SCHEME):] if is_snapshot_source(source) else source
+
+def _schema_header() -> Dict[str, str]:
+    missing = set(EXPECTED_SCHEMA) - set(COLUMN_LAYOUT)
+    if missing:
+        raise ValueError(f"No snapshot column layout for schema fields: {sorted(missing)}")
+    return {field: field_type.__name__ for field, field_type in EXPECTED_SCHEMA.items()}
+
+def _align(position: int) -> int:
+    return -(-position // ALIGNMENT) * ALIGNMENT
+
+def write_snapshot(data: Union[List[Dict[str, Any]], RecordBatch], path: str) -> int:
+    """
+    Writes parsed (already validated) records to a binary columnar snapshot and returns its size.
+    Layout: magic, JSON header (schema, row count, column offsets and the name/category
+    dictionaries), then one fixed-width little-endian array per column, each 64-byte aligned.
+    """
+    batch = data if isinstance(data, RecordBatch) else RecordBatch.from_records(data)
+    schema = _schema_header()
+
+    arrays = {field: np.ascontiguousarray(getattr(batch, attribute), dtype=dtype)
+              for field, (attribute, dtype, _) in COLUMN_LAYOUT.items() if field in schema}
+    columns = {}
+    position = 0
+    for field, array in arrays.items():
+        columns[field] = {'dtype': array.dtype.str, 'encoding': COLUMN_LAYOUT[field][2], 'offset': position, 'nbytes': array.nbytes}
+        position = _align(position + array.nbytes)
+    header = {
+        'version': SNAPSHOT_VERSION,
+        'rows': len(batch),
+        'schema': schema,
+        'columns': columns,
+        'dictionaries': {'name': batch.name_dictionary, 'category': batch.category_dictionary},
+    }
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = _align(_HEADER_PREFIX.size + len(header_bytes))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER_PREFIX.pack(SNAPSHOT_MAGIC, len(header_bytes)))
+        f.write(header_bytes)
+        for field, array in arrays.items():
+            f.seek(data_start + columns[field]['offset'])
+            f.write(array.tobytes())
+        f.truncate(data_start + position)
+        size = f.tell()
+    os.replace(tmp_path, path)
+    logger.info(f"Wrote snapshot of {len(batch)} records to {path} ({size} bytes).")
+    return size
+
+def read_snapshot_header(path: str) -> Dict[str, Any]:
+    """Reads and checks a snapshot's header; adds 'data_start', the byte where column data begins."""
+    with open(path, 'rb') as f:
+        magic, header_length = _HEADER_PREFIX.unpack(f.read(_HEADER_PREFIX.size))
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a data snapshot")
+        header = json.loads(f.read(header_length))
+    if header.get('version') != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {header.get('version')} in {path}")
+    if header.get('schema') != _schema_header():
+        raise ValueError(f"Snapshot schema {header.get('schema')} in {path} does not match the expected schema")
+    header['data_start'] = _align(_HEADER_PREFIX.size + header_length)
+    return header
+
+def load_snapshot(path: str) -> RecordBatch:
+    """
+    Memory-maps a snapshot and returns a RecordBatch whose columns are read-only views of the
+    mapping, so no column data is copied or parsed. The mapping lives as long as the arrays do.
+    """
+    header = read_snapshot_header(path)
+    rows = header['rows']
+    with open(path, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    arrays = {}
+    for field, column in header['columns'].items():
+        dtype = np.dtype(column['dtype'])
+        if dtype.itemsize * rows != column['nbytes']:
+            raise ValueError(f"Snapshot column '{field}' in {path} has {column['nbytes']} bytes for {rows} rows")
+        arrays[COLUMN_LAYOUT[field][0]] = np.frombuffer(mapping, dtype=dtype, count=rows, offset=header['data_start'] + column['offset'])
+
+    logger.info(f"Memory-mapped snapshot of {rows} records from {path}.")
+    return RecordBatch(
+        name_dictionary=header['dictionaries']['name'],
+        category_dictionary=header['dictionaries']['category'],
+        **arrays,
+    )
+
+def iter_snapshot_batches(path: str, batch_size: int) -> Iterator[RecordBatch]:
+    """Memory-maps a snapshot and yields it as zero-copy RecordBatch slices of at most batch_size rows."""
+    snapshot = load_snapshot(path)
+    for start in range(0, len(snapshot), batch_size):
+        yield snapshot.slice(start, start + batch_size)
@@ -1,5 +1,6 @@
 import sys
 import logging
+import argparse
 
 # Add src directory to Python path
 # This is sometimes needed for imports to work correctly when running main.py directly
@@ -8,28 +9,83 @@ import logging
 # sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.reporting.generator import ReportGenerator
-from src.utils.helpers import setup_logger
+from src.data_processing.mapping import register_mappings_from_settings
+from src.utils.helpers import setup_logger, load_settings
 
 # Setup a main logger for the application entry point
 logger = setup_logger("MainApp", level=logging.DEBUG) # Set to DEBUG to see all logs
 
+def build_report_config(settings: dict) -> dict:
+    """Maps the settings file onto ReportGenerator's report_config."""
+    cache_settings = settings.get('cache', {})
+    feature_flags = settings.get('featureFlags', {})
+    execution_settings = settings.get('execution', {})
+    return {
+        'enable_advanced_calculations': feature_flags.get('enableAdvancedCalculations', False),
+        'use_caching': feature_flags.get('useCaching', False),
+        'cache_dir': cache_settings.get('directory'),
+        'cache_max_memory_entries': cache_settings.get('maxMemoryEntries', 128),
+        'cache_max_disk_bytes': cache_settings.get('maxDiskBytes', 512 * 1024 * 1024),
+        'exact_quantiles': execution_settings.get('exactQuantiles', []),
+        'memory_budget': execution_settings.get('memoryBudgetBytes'),
+        'spill_dir': execution_settings.get('spillDirectory'),
+    }
+
 def run_application():
     """Runs the main application logic."""
     logger.info("Application starting.")
-    
+
     try:
-        report_generator = ReportGenerator(data_source="dummy")
+        settings = load_settings()
+        register_mappings_from_settings(settings) # Column renames for sources beyond the built-in ones
+        report_config = build_report_config(settings)
+        report_generator = ReportGenerator(data_source=settings.get('defaultDataSource', "dummy"), report_config=report_config)
         summary_report = report_generator.generate_summary_report()
-        
+
         print("\n--- Generated Report ---")
         print(summary_report)
         print("--- End of Report ---")
-        
+
         logger.info("Application finished successfully.")
-        
+
     except Exception as e:
         logger.critical(f"An unhandled error occurred in the main application: {e}", exc_info=True)
         sys.exit(1) # Exit with an error code
 
+def serve_application(args: argparse.Namespace):
+    """Runs the long-lived report server until interrupted."""
+    # Imported on demand: one-shot reports never load the HTTP server
+    from src.reporting.server import server_from_settings
+    logger.info("Report server starting.")
+    try:
+        settings = load_settings()
+        register_mappings_from_settings(settings)
+        server = server_from_settings(settings, build_report_config(settings), sources=args.source, host=args.host, port=args.port,
+                                      socket_path=args.socket, max_workers=args.workers, refresh_interval=args.refresh)
+    except Exception as e:
+        logger.critical(f"Could not start the report server: {e}", exc_info=True)
+        sys.exit(1)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Report server stopping.")
+    finally:
+        server.httpd.server_close()
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate a summary report, or serve reports from warm state with --serve.")
+    parser.add_argument('--serve', action='store_true', help="run as a report server (settings: \"server\" section)")
+    parser.add_argument('--source', action='append', help="source the server may report on (repeatable)")
+    parser.add_argument('--host', help="address to listen on")
+    parser.add_argument('--port', type=int, help="port to listen on")
+    parser.add_argument('--socket', help="listen on this Unix socket path instead of TCP")
+    parser.add_argument('--workers', type=int, help="maximum requests handled at once")
+    parser.add_argument('--refresh', type=float, help="seconds between background source refreshes")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    run_application() 
\ No newline at end of file
+    args = parse_args()
+    if args.serve:
+        serve_application(args)
+    else:
+        run_application()
@@ -0,0 +1,176 @@
+from typing import List, Dict, Any, Optional, Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
+import os
+import time
+
+from src.utils.helpers import setup_logger
+from src.data_processing.loader import is_http_source
+from src.data_processing.snapshot import is_snapshot_source
+from src.calculations.aggregation import SummaryAggregator
+from .generator import ReportGenerator
+
+logger = setup_logger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 4
+
+# Config entries holding live objects that cannot be sent to a worker process
+_PROCESS_LOCAL_CONFIG = ('cache',)
+
+# Per-report metrics are not collected in batch runs: an Instrumentation is not shared across threads
+_UNSUPPORTED_CONFIG = ('instrumentation', 'metrics_prometheus_path', 'metrics_json_path')
+
+def is_io_bound_source(source: str) -> bool:
+    """
+    Sources whose load time is spent waiting rather than parsing: remote pages, memory-mapped
+    snapshots (already parsed) and the built-in dummy data. Everything else is parsed from text.
+    """
+    return source == "dummy" or is_http_source(source) or is_snapshot_source(source)
+
+def source_state_path(state_path: str, source: str) -> str:
+    """
+    Per-source variant of a 'state_path' for batch runs, e.g. state.json -> state.<hash>.json,
+    so sources never read or overwrite each other's incremental state.
+    """
+    root, ext = os.path.splitext(state_path)
+    digest = hashlib.sha256(os.path.abspath(source).encode('utf-8')).hexdigest()[:16]
+    return f"{root}.{digest}{ext}"
+
+def _aggregate_source(source: str, report_config: Optional[Dict[str, Any]]) -> SummaryAggregator:
+    """Worker entry point: loads and parses one source into an aggregator."""
+    return ReportGenerator(data_source=source, report_config=report_config).aggregate()
+
+class SourceResult:
+    """Outcome for one source of a batch run: its report, or the error that stopped it."""
+    def __init__(self, source: str, report: Optional[str] = None, aggregator: Optional[SummaryAggregator] = None,
+                 error: Optional[str] = None, seconds: float = 0.0):
+        self.source = source
+        self.report = report
+        self.aggregator = aggregator
+        self.error = error
+        self.seconds = seconds
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        status = "ok" if self.ok else f"failed: {self.error}"
+        return f"<SourceResult {self.source!r} {status} in {self.seconds:.2f}s>"
+
+class BatchResult:
+    """Per-source results in input order, plus the aggregate over every source that succeeded."""
+    def __init__(self, results: List[SourceResult], combined: SummaryAggregator, combined_report: str):
+        self.results = results
+        self.combined = combined
+        self.combined_report = combined_report
+
+    @property
+    def failures(self) -> List[SourceResult]:
+        return [result for result in self.results if not result.ok]
+
+    def report_for(self, source: str) -> Optional[str]:
+        for result in self.results:
+            if result.source == source:
+                return result.report
+        return None
+
+    def __repr__(self) -> str:
+        return f"<BatchResult sources={len(self.results)} failed={len(self.failures)} records={self.combined.records}>"
+
+class BatchReportGenerator:
+    """
+    Generates summary reports for many sources concurrently.
+    At most max_concurrency sources are in progress at once. I/O-bound sources (see
+    is_io_bound_source) are loaded in threads; file sources are parsed in a process pool of
+    up to max_processes workers (use_processes=False keeps everything in threads).
+    A source that fails is reported in its SourceResult and does not affect the others.
+    Each source's aggregator is merged into a combined roll-up report.
+    A 'cache' in report_config is only used for sources handled in threads; instrumentation is ignored.
+    A 'state_path' is split per source (see source_state_path).
+    """
+    def __init__(self, sources: Sequence[str], report_config: Optional[Dict[str, Any]] = None,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY, max_processes: Optional[int] = None,
+                 use_processes: bool = True):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.sources = list(sources)
+        self.report_config = {key: value for key, value in (report_config or {}).items() if key not in _UNSUPPORTED_CONFIG}
+        self.max_concurrency = max_concurrency
+        self.max_processes = max_processes or min(max_concurrency, os.cpu_count() or 1)
+        self.use_processes = use_processes
+        self.logger = setup_logger(f"{__name__}.BatchReportGenerator")
+
+    def run(self) -> BatchResult:
+        self.logger.info(f"Generating reports for {len(self.sources)} sources (concurrency {self.max_concurrency}).")
+        needs_processes = self.use_processes and any(not is_io_bound_source(source) for source in self.sources)
+        process_pool = None
+        if needs_processes:
+            # Imported on demand, like the parser's worker pool
+            from concurrent.futures import ProcessPoolExecutor
+            process_pool = ProcessPoolExecutor(max_workers=self.max_processes)
+
+        results: List[Optional[SourceResult]] = [None] * len(self.sources)
+        try:
+            # Each thread drives one source at a time, so the thread count is the concurrency limit
+            with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='batch-report') as threads:
+                futures = {threads.submit(self._run_source, source, process_pool): i for i, source in enumerate(self.sources)}
+                for future in as_completed(futures):
+                    result = future.result()
+                    results[futures[future]] = result
+                    if result.ok:
+                        self.logger.info(f"Report for {result.source} done in {result.seconds:.2f}s.")
+                    else:
+                        self.logger.error(f"Report for {result.source} failed: {result.error}")
+        finally:
+            if process_pool is not None:
+                process_pool.shutdown(wait=True, cancel_futures=True)
+
+        combined = self._combine(results)
+        combined_report = self._generator(f"{len(self.sources)} sources", roll_up=True).report_from_aggregator(combined)
+        failed = sum(1 for result in results if not result.ok)
+        self.logger.info(f"Batch finished: {len(results) - failed} succeeded, {failed} failed.")
+        return BatchResult(results, combined, combined_report)
+
+    def _source_config(self, source: str) -> Dict[str, Any]:
+        config = dict(self.report_config)
+        if config.get('state_path'):
+            config['state_path'] = source_state_path(config['state_path'], source)
+        return config
+
+    def _generator(self, source: str, roll_up: bool = False) -> ReportGenerator:
+        config = self._source_config(source)
+        if roll_up:
+            # The transform sample comes from a single source, so it has no meaning for the roll-up
+            config['enable_advanced_calculations'] = False
+            config['state_path'] = None
+        return ReportGenerator(data_source=source, report_config=config)
+
+    def _run_source(self, source: str, process_pool) -> SourceResult:
+        start = time.perf_counter()
+        try:
+            generator = self._generator(source)
+            if process_pool is not None and not is_io_bound_source(source):
+                config = {key: value for key, value in self._source_config(source).items() if key not in _PROCESS_LOCAL_CONFIG}
+                aggregator = process_pool.submit(_aggregate_source, source, config).result()
+            else:
+                aggregator = generator.aggregate()
+            if not aggregator.records:
+                raise ValueError("no records parsed")
+            report = generator.report_from_aggregator(aggregator)
+        except Exception as e:
+            return SourceResult(source, error=f"{type(e).__name__}: {e}", seconds=time.perf_counter() - start)
+        return SourceResult(source, report=report, aggregator=aggregator, seconds=time.perf_counter() - start)
+
+    def _combine(self, results: List[SourceResult]) -> SummaryAggregator:
+        # Sources with incremental state fall back to estimated quantiles (see ReportGenerator)
+        exact_quantiles = () if self.report_config.get('state_path') else tuple(self.report_config.get('exact_quantiles') or ())
+        combined = SummaryAggregator(value_key='value', weight_key='id', category_key='category',
+                                     category_error_rate=self.report_config.get('category_error_rate'),
+                                     group_key=self.report_config.get('group_by'), exact_quantiles=exact_quantiles,
+                                     memory_budget=self.report_config.get('memory_budget'),
+                                     spill_dir=self.report_config.get('spill_dir'))
+        for result in results:
+            if result.ok:
+                combined.merge(result.aggregator)
+        return combined
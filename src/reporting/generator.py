@@ -1,14 +1,15 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
+import os
 
 from src.utils.helpers import get_current_timestamp, setup_logger, format_data, generate_report_summary
+from src.utils.instrumentation import Instrumentation, NULL_INSTRUMENTATION
 from src.data_processing.parser import DataParser
-from src.calculations.core import (
-    calculate_total_value, 
-    calculate_weighted_average, 
-    calculate_value_statistics, 
-    find_most_common_categories,
-    AdvancedCalculator
-)
+from src.data_processing.loader import detect_file_format, DEFAULT_BATCH_SIZE
+from src.calculations.core import AdvancedCalculator
+from src.calculations.aggregation import SummaryAggregator
+
+if TYPE_CHECKING:
+    from src.utils.cache import TieredCache
 
 logger = setup_logger(__name__)
 
@@ -23,6 +24,9 @@ def format_statistics(stats: Dict[str, float]) -> str:
         f"    Mean:    {stats['mean']:.2f}",
         f"    Std Dev: {stats['std_dev']:.2f}"
     ]
+    # Estimated percentiles, e.g. 'p50', 'p99.9'
+    percentiles = sorted((key for key in stats if key.startswith('p') and key[1:].replace('.', '', 1).isdigit()), key=lambda key: float(key[1:]))
+    lines.extend(f"    {key.upper() + ':':<8} {stats[key]:.2f}" for key in percentiles)
     return "\n".join(lines)
     
 def format_common_categories(categories: List[tuple]) -> str:
@@ -32,67 +36,247 @@ def format_common_categories(categories: List[tuple]) -> str:
     lines = [f"    - {cat} ({count})" for cat, count in categories]
     return "\n".join(lines)
 
+def format_group_statistics(groups: Dict[Any, Dict[str, float]], limit: Optional[int] = None) -> str:
+    """Formats per-group statistics, largest groups first (ties keep first-seen order)."""
+    if not groups:
+        return "  N/A"
+    ranked = sorted(groups.items(), key=lambda item: item[1]['count'], reverse=True)
+    lines = [
+        f"    - {group}: count {stats['count']}, sum {stats['sum']:.2f}, min {stats['min']:.2f}, max {stats['max']:.2f}, "
+        f"mean {stats['mean']:.2f}, std dev {stats['std_dev']:.2f}, weighted avg {stats['weighted_average']:.2f}"
+        for group, stats in ranked[:limit]
+    ]
+    if limit is not None and len(ranked) > limit:
+        lines.append(f"    ... {len(ranked) - limit} more groups")
+    return "\n".join(lines)
+
 class ReportGenerator:
     def __init__(self, data_source: str = "dummy", report_config: Dict = None):
         self.data_source = data_source
-        self.parser = DataParser()
         # Example: Configure calculator based on external config
-        default_config = {'calculator_exponent': 1.5, 'top_n_categories': 3}
+        # 'state_path' enables incremental re-reporting for append-only file sources.
+        # 'use_caching' (featureFlags.useCaching) caches parsed data and report sections,
+        # in memory and optionally under 'cache_dir'; an explicit TieredCache can be passed as 'cache'.
+        # 'category_error_rate' switches category counting to a bounded-memory sketch whose counts
+        # are overestimated by at most that fraction of the records (None keeps exact counts).
+        # 'enable_advanced_calculations' (featureFlags.enableAdvancedCalculations) adds the transform stage.
+        # 'group_by' (a field name such as 'category' or 'name') adds per-group statistics for up to
+        # 'group_by_limit' groups, largest first.
+        # 'instrumentation' (an Instrumentation) records per-stage metrics; after each report they are
+        # also written to 'metrics_prometheus_path' / 'metrics_json_path' when those are set.
+        # 'exact_quantiles' (e.g. [0.5]) are computed exactly instead of estimated.
+        # 'memory_budget' (bytes) bounds the group-by and exact-quantile state; what does not fit is
+        # spilled under 'spill_dir' (the system temp directory by default). Parsed data is streamed
+        # rather than cached, and the report is the same as without a budget.
+        default_config = {
+            'calculator_exponent': 1.5,
+            'enable_advanced_calculations': False,
+            'top_n_categories': 3,
+            'category_error_rate': None,
+            'state_path': None,
+            'use_caching': False,
+            'cache_dir': None,
+            'cache_max_memory_entries': 128,
+            'cache_max_disk_bytes': 512 * 1024 * 1024,
+            'cache': None,
+            'instrumentation': None,
+            'metrics_prometheus_path': None,
+            'metrics_json_path': None,
+            'group_by': None,
+            'group_by_limit': 20,
+            'exact_quantiles': (),
+            'memory_budget': None,
+            'spill_dir': None,
+        }
         if report_config:
             default_config.update(report_config)
             
         self.calculator = AdvancedCalculator(exponent=default_config['calculator_exponent'])
+        self.enable_advanced_calculations = default_config['enable_advanced_calculations']
         self.top_n = default_config['top_n_categories']
+        self.group_by = default_config['group_by']
+        self.group_by_limit = default_config['group_by_limit']
+        self.category_error_rate = default_config['category_error_rate']
+        self.state_path = default_config['state_path']
+        self.exact_quantiles = tuple(default_config['exact_quantiles'])
+        if self.exact_quantiles and self.state_path:
+            # Incremental state is saved as JSON, which cannot hold every value seen
+            logger.warning("Exact quantiles are not supported with incremental state; using estimates.")
+            self.exact_quantiles = ()
+        self.memory_budget = default_config['memory_budget']
+        self.spill_dir = default_config['spill_dir']
+        self.cache: Optional['TieredCache'] = default_config['cache']
+        if self.cache is None and default_config['use_caching']:
+            # The cache module (hashlib, pickle) is only imported when caching is on
+            from src.utils.cache import get_shared_cache
+            self.cache = get_shared_cache(
+                default_config['cache_dir'],
+                max_memory_entries=default_config['cache_max_memory_entries'],
+                max_disk_bytes=default_config['cache_max_disk_bytes'],
+            )
+        self.instrumentation: Instrumentation = default_config['instrumentation'] or NULL_INSTRUMENTATION
+        self.metrics_prometheus_path = default_config['metrics_prometheus_path']
+        self.metrics_json_path = default_config['metrics_json_path']
+        self.parser = DataParser(instrumentation=self.instrumentation)
         self.logger = setup_logger(f"{__name__}.ReportGenerator")
         self.logger.info(f"ReportGenerator initialized with config: {default_config}")
 
-    def generate_summary_report(self) -> str:
-        self.logger.info(f"Generating summary report for data source: {self.data_source}")
-        
-        report_data = {}
-        notes_list = []
+    def source_fingerprint(self) -> Optional[str]:
+        """Fingerprint identifying the current content of the source, or None if it cannot be cached."""
+        if self.data_source == "dummy":
+            return "dummy" # Hardcoded data never changes
+        if detect_file_format(self.data_source) and os.path.exists(self.data_source):
+            from src.utils.cache import file_fingerprint
+            return file_fingerprint(self.data_source)
+        return None
 
-        try:
-            # 1. Parse data
-            parsed_data = self.parser.parse(self.data_source)
-            report_data['processed_records'] = len(parsed_data)
-            if not parsed_data:
-                self.logger.warning("No data parsed, cannot generate full report.")
-                notes_list.append("No data available for analysis.")
-                # Use the generate_report_summary helper for a minimal report
-                return generate_report_summary(
-                    title="Data Analysis Summary Report", 
-                    data_points={'Status': 'Failed - No Data', 'Source': self.data_source},
-                    notes="\n".join(notes_list)
-                )
-
-            # 2. Perform calculations
-            report_data['total_value'] = f"{calculate_total_value(parsed_data):.2f}"
-            report_data['weighted_average_by_id'] = f"{calculate_weighted_average(parsed_data, weight_key='id'):.2f}"
-            
-            # Calculate statistics
-            value_stats = calculate_value_statistics(parsed_data, value_key='value')
+    def _aggregate(self, fingerprint: Optional[str]) -> SummaryAggregator:
+        """Parses the source and folds it into a SummaryAggregator."""
+        aggregator = SummaryAggregator(value_key='value', weight_key='id', category_key='category', category_error_rate=self.category_error_rate,
+                                       group_key=self.group_by, exact_quantiles=self.exact_quantiles,
+                                       memory_budget=self.memory_budget, spill_dir=self.spill_dir)
+        if self.state_path:
+            # Imported on demand: incremental state (and its hashing) is only used when a state path is set
+            from src.reporting.incremental import aggregate_incrementally, supports_incremental
+            if supports_incremental(self.data_source):
+                # Only rows appended since the last saved state are parsed
+                with self.instrumentation.stage('aggregate') as stage:
+                    aggregator = aggregate_incrementally(self.parser, self.data_source, self.state_path, aggregator)
+                    stage.rows_out = aggregator.records
+                return aggregator
+
+        if self.cache is not None and fingerprint and self.memory_budget is None:
+            # The cached parsed data is the whole source in one batch, so it is skipped under a memory budget
+            parsed_key = ('parsed', self.data_source, fingerprint)
+            parsed_batch = self.cache.get(parsed_key)
+            if parsed_batch is None:
+                parsed_batch = self.parser.parse(self.data_source, columnar=True)
+                self.cache.set(parsed_key, parsed_batch, tag=self.data_source, version=fingerprint)
+            else:
+                self.logger.info(f"Using cached parsed data for {self.data_source}.")
+            with self.instrumentation.stage('aggregate', rows_in=len(parsed_batch)):
+                # Folded in the batches iter_parse would yield, so the report matches the uncached path exactly
+                for start in range(0, len(parsed_batch), DEFAULT_BATCH_SIZE):
+                    aggregator.update_many(parsed_batch.slice(start, start + DEFAULT_BATCH_SIZE))
+                return aggregator
+
+        for parsed_batch in self.parser.iter_parse(self.data_source):
+            with self.instrumentation.stage('aggregate', rows_in=len(parsed_batch)):
+                aggregator.update_many(parsed_batch)
+        return aggregator
+
+    def _build_sections(self, aggregator: SummaryAggregator) -> Dict[str, Any]:
+        """Renders the report sections from a populated aggregator."""
+        report_data = {'processed_records': aggregator.records}
+        stage = self.instrumentation.stage
+
+        # Read the calculations off the aggregator (no further passes over the data)
+        with stage('calculate.total_value'):
+            report_data['total_value'] = f"{aggregator.total_value():.2f}"
+        with stage('calculate.weighted_average'):
+            report_data['weighted_average_by_id'] = f"{aggregator.weighted_average():.2f}"
+        
+        # Calculate statistics
+        with stage('calculate.value_statistics'):
+            value_stats = aggregator.statistics()
             report_data['value_statistics'] = format_statistics(value_stats)
-            
-            # Find common categories
-            common_categories = find_most_common_categories(parsed_data, category_key='category', top_n=self.top_n)
+        
+        # Find common categories
+        with stage('calculate.most_common_categories'):
+            common_categories = aggregator.most_common_categories(top_n=self.top_n)
             report_data['most_common_categories'] = format_common_categories(common_categories)
-            
-            # Perform transformation (optional, maybe based on config)
-            # transformed_data = self.calculator.transform_values(parsed_data)
-            # report_data['sample_transformed_record'] = format_data(transformed_data[0]) if transformed_data else 'N/A'
+            if self.category_error_rate:
+                report_data['category_count_max_overestimate'] = aggregator.category_error_bound()
 
-            # 3. Generate formatted report using helper
-            report_title = "Data Analysis Summary Report"
+        if aggregator.groups is not None:
+            with stage('calculate.group_by'):
+                report_data[f"statistics_by_{self.group_by}"] = format_group_statistics(aggregator.groups.results(), self.group_by_limit)
+
+        # Perform transformation (optional, based on config)
+        if self.enable_advanced_calculations:
+            with stage('calculate.transform_values'):
+                # The aggregator kept the first valid record, so the source is not read again
+                sample = aggregator.sample_record
+                transformed = self.calculator.transform_values([dict(sample)])[0] if sample is not None else None
+                report_data['sample_transformed_record'] = format_data(transformed) if transformed else 'N/A'
+        return report_data
+
+    def generate_summary_report(self) -> str:
+        with self.instrumentation.stage('report'):
+            report = self._generate_summary_report()
+        self._export_metrics()
+        return report
+
+    def _export_metrics(self) -> None:
+        """Writes the collected stage metrics to the configured files, if any."""
+        if not self.instrumentation.enabled:
+            return
+        try:
+            if self.metrics_prometheus_path:
+                self.instrumentation.write_prometheus(self.metrics_prometheus_path, prefix='report')
+            if self.metrics_json_path:
+                self.instrumentation.write_json(self.metrics_json_path)
+        except OSError as e:
+            self.logger.warning(f"Could not write report metrics: {e}")
+
+    def aggregate(self) -> SummaryAggregator:
+        """Parses the source into a populated SummaryAggregator (reusing cached parsed data if enabled)."""
+        fingerprint = self.source_fingerprint() if self.cache is not None else None
+        return self._aggregate(fingerprint)
+
+    def report_from_aggregator(self, aggregator: SummaryAggregator) -> str:
+        """Renders the summary report for an aggregator that was already populated, e.g. in another process."""
+        if not aggregator.records:
+            return self._no_data_report()
+        return self._render(self._build_sections(aggregator))
+
+    def _no_data_report(self) -> str:
+        self.logger.warning("No data parsed, cannot generate full report.")
+        # Use the generate_report_summary helper for a minimal report
+        return generate_report_summary(
+            title="Data Analysis Summary Report", 
+            data_points={'Status': 'Failed - No Data', 'Source': self.data_source},
+            notes="No data available for analysis."
+        )
+
+    def _render(self, report_data: Dict[str, Any]) -> str:
+        with self.instrumentation.stage('render'):
             final_report = generate_report_summary(
-                title=report_title,
+                title="Data Analysis Summary Report",
                 data_points=report_data,
-                notes="\n".join(notes_list)
             )
-            
-            # Log success and return
-            self.logger.info("Summary report generated successfully.")
-            return final_report
+        self.logger.info("Summary report generated successfully.")
+        return final_report
+
+    def _generate_summary_report(self) -> str:
+        self.logger.info(f"Generating summary report for data source: {self.data_source}")
+
+        try:
+            fingerprint = self.source_fingerprint() if self.cache is not None else None
+            sections_key = None
+            report_data = None
+            if fingerprint:
+                # Entries computed from older versions of this source are stale now
+                self.cache.invalidate(self.data_source, keep_version=fingerprint)
+                sections_key = ('report_sections', self.data_source, fingerprint, self.calculator.exponent, self.top_n, self.category_error_rate, self.enable_advanced_calculations,
+                                self.group_by, self.group_by_limit, self.exact_quantiles)
+                report_data = self.cache.get(sections_key)
+                if report_data is not None:
+                    self.logger.info(f"Using cached report sections for {self.data_source}.")
+
+            if report_data is None:
+                # 1. Parse data and fold each batch into a single-pass aggregator
+                aggregator = self._aggregate(fingerprint)
+                if not aggregator.records:
+                    return self._no_data_report()
+
+                # 2. Perform calculations
+                report_data = self._build_sections(aggregator)
+                if sections_key:
+                    self.cache.set(sections_key, report_data, tag=self.data_source, version=fingerprint)
+
+            # 3. Generate formatted report using helper
+            return self._render(report_data)
 
         except Exception as e:
             self.logger.error(f"Failed to generate report: {e}", exc_info=True)
@@ -101,4 +285,4 @@ class ReportGenerator:
                 title="Data Analysis Summary Report",
                 data_points={'Status': 'Failed - Error', 'Source': self.data_source},
                 notes=f"An error occurred during report generation: {e}"
-            ) 
\ No newline at end of file
+            )
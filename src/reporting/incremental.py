@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+from typing import Dict, Any, Optional, Tuple
+
+from src.utils.helpers import setup_logger, get_current_timestamp
+from src.data_processing.loader import detect_file_format
+from src.data_processing.parser import DataParser
+from src.calculations.aggregation import SummaryAggregator
+
+logger = setup_logger(__name__)
+
+STATE_VERSION = 5
+
+# Bytes hashed at the start of the file and just before the high-water mark
+FINGERPRINT_BYTES = 64 * 1024
+
+def supports_incremental(data_source: str) -> bool:
+    """Only append-only local files can be resumed from a byte offset."""
+    return detect_file_format(data_source) is not None
+
+def prefix_fingerprint(path: str, offset: int) -> str:
+    """
+    Hashes the already-processed part of a file (up to offset) cheaply: the first and last
+    FINGERPRINT_BYTES of that range. A mismatch means the file was rewritten, not appended to.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        head = f.read(min(offset, FINGERPRINT_BYTES))
+        digest.update(head)
+        tail_start = max(len(head), offset - FINGERPRINT_BYTES)
+        if tail_start < offset:
+            f.seek(tail_start)
+            digest.update(f.read(offset - tail_start))
+    return digest.hexdigest()
+
+class IncrementalState:
+    """
+    Persists a SummaryAggregator together with the byte offset (high-water mark) it covers
+    for one source file, so later runs only need to parse rows appended after that offset.
+    """
+    def __init__(self, state_path: str, data_source: str):
+        self.state_path = state_path
+        self.data_source = os.path.abspath(data_source)
+        self.logger = setup_logger(f"{__name__}.IncrementalState")
+
+    def load(self, aggregator_template: SummaryAggregator) -> Tuple[SummaryAggregator, int]:
+        """
+        Returns the saved aggregator and offset, or a fresh aggregator and offset 0 if there is
+        no usable state (missing, for another source or config, or the file was rewritten).
+        """
+        fresh = SummaryAggregator(aggregator_template.value_key, aggregator_template.weight_key, aggregator_template.category_key,
+                                  aggregator_template.category_error_rate, aggregator_template.quantiles, aggregator_template.group_key,
+                                  memory_budget=aggregator_template.memory_budget, spill_dir=aggregator_template.spill_dir)
+        state = self._read()
+        if state is None:
+            return fresh, 0
+
+        reason = self._invalid_reason(state, fresh)
+        if reason:
+            self.logger.info(f"Discarding incremental state for {self.data_source}: {reason}. Recomputing from scratch.")
+            return fresh, 0
+
+        self.logger.info(f"Resuming {self.data_source} from byte {state['offset']} ({state['aggregator']['records']} records already aggregated).")
+        return SummaryAggregator.from_state(state['aggregator']), state['offset']
+
+    def save(self, aggregator: SummaryAggregator, offset: int) -> None:
+        """Atomically writes the aggregator state and high-water mark."""
+        state = {
+            'version': STATE_VERSION,
+            'source': self.data_source,
+            'offset': offset,
+            'fingerprint': prefix_fingerprint(self.data_source, offset),
+            'updated_at': get_current_timestamp(),
+            'aggregator': aggregator.to_state(),
+        }
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+        self.logger.info(f"Saved incremental state for {self.data_source} at byte {offset}.")
+
+    def _read(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.state_path):
+            return None
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Could not read incremental state {self.state_path}: {e}")
+            return None
+
+    def _invalid_reason(self, state: Dict[str, Any], fresh: SummaryAggregator) -> Optional[str]:
+        if state.get('version') != STATE_VERSION:
+            return "state version changed"
+        if state.get('source') != self.data_source:
+            return f"state belongs to {state.get('source')}"
+        saved = state.get('aggregator', {})
+        if (saved.get('value_key'), saved.get('weight_key'), saved.get('category_key')) != (fresh.value_key, fresh.weight_key, fresh.category_key):
+            return "aggregation keys changed"
+        if saved.get('category_error_rate') != fresh.category_error_rate:
+            return "category accuracy setting changed"
+        if tuple(saved.get('quantiles', ())) != fresh.quantiles:
+            return "reported quantiles changed"
+        if saved.get('group_key') != fresh.group_key:
+            return "group-by key changed"
+        offset = state.get('offset', 0)
+        if os.path.getsize(self.data_source) < offset:
+            return "file is shorter than the saved offset"
+        if prefix_fingerprint(self.data_source, offset) != state.get('fingerprint'):
+            return "already-processed content changed"
+        return None
+
+def aggregate_incrementally(parser: DataParser, data_source: str, state_path: str, aggregator: SummaryAggregator) -> SummaryAggregator:
+    """
+    Brings a saved aggregate up to date with rows appended to data_source since the last run.
+    Only complete lines are folded into the saved state; an unterminated last line is folded
+    into a copy used for this run's result, so the output always equals a full recompute.
+    """
+    store = IncrementalState(state_path, data_source)
+    aggregator, offset = store.load(aggregator)
+
+    for parsed_batch in parser.iter_parse(data_source, start_offset=offset, complete_lines_only=True):
+        aggregator.update_many(parsed_batch)
+    new_offset = parser.last_offset if parser.last_offset is not None else offset
+    store.save(aggregator, new_offset)
+
+    if os.path.getsize(data_source) > new_offset:
+        logger.info("Source ends with an unterminated line; including it without saving it to the state.")
+        result = aggregator.copy()
+        for parsed_batch in parser.iter_parse(data_source, start_offset=new_offset):
+            result.update_many(parsed_batch)
+        return result
+    return aggregator
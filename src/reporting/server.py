@@ -0,0 +1,294 @@
+from typing import List, Dict, Any, Optional, Sequence
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+import datetime
+import json
+import os
+import socketserver
+import threading
+import time
+
+from src.utils.helpers import setup_logger
+from src.data_processing.schema import get_schema
+from .generator import ReportGenerator
+
+logger = setup_logger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_MAX_WORKERS = 4
+
+# Seconds a request waits for a free worker before it is answered with 503
+DEFAULT_REQUEST_TIMEOUT = 5.0
+
+# Per-report metrics files would be rewritten by every refresh; the server reports its own status instead
+_UNSUPPORTED_CONFIG = ('instrumentation', 'metrics_prometheus_path', 'metrics_json_path')
+
+class Dataset:
+    """The warm state kept for one source: its aggregator and the report rendered from it."""
+    def __init__(self, source: str, aggregator=None, report: Optional[str] = None, fingerprint: Optional[str] = None,
+                 refreshed_at: Optional[datetime.datetime] = None, seconds: float = 0.0, error: Optional[str] = None):
+        self.source = source
+        self.aggregator = aggregator
+        self.report = report
+        self.fingerprint = fingerprint
+        self.refreshed_at = refreshed_at
+        self.seconds = seconds
+        self.error = error # Last refresh failure; the previous report (if any) is still served
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'records': self.aggregator.records if self.aggregator is not None else None,
+            'refreshed_at': self.refreshed_at.isoformat() if self.refreshed_at else None,
+            'refresh_seconds': round(self.seconds, 6),
+            'error': self.error,
+        }
+
+    def __repr__(self) -> str:
+        return f"<Dataset {self.source!r} refreshed_at={self.refreshed_at}>"
+
+class ReportService:
+    """
+    Keeps parsed sources warm for repeated report requests.
+    Each allowed source is aggregated once and its report rendered once; requests are answered
+    from that state. refresh() re-reads sources whose fingerprint changed (sources that cannot be
+    fingerprinted, e.g. HTTP, are always re-read), and start() runs it every refresh_interval
+    seconds in a background thread. Only the configured sources can be requested.
+    """
+    def __init__(self, sources: Sequence[str], report_config: Optional[Dict[str, Any]] = None,
+                 refresh_interval: Optional[float] = None):
+        if not sources:
+            raise ValueError("A report service needs at least one source")
+        self.sources = list(dict.fromkeys(sources))
+        self.report_config = {key: value for key, value in (report_config or {}).items() if key not in _UNSUPPORTED_CONFIG}
+        self.refresh_interval = refresh_interval
+        self.generators = {source: ReportGenerator(data_source=source, report_config=self.report_config) for source in self.sources}
+        self.datasets: Dict[str, Dataset] = {}
+        self._locks = {source: threading.Lock() for source in self.sources} # One load at a time per source
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+        self.started_at = datetime.datetime.now()
+        self.logger = setup_logger(f"{__name__}.ReportService")
+
+    def report(self, source: str) -> str:
+        """Returns the source's current report, loading the source on first use."""
+        if source not in self.generators:
+            raise KeyError(source)
+        dataset = self.datasets.get(source)
+        if dataset is None or dataset.report is None:
+            dataset = self._load(source, force=False)
+        if dataset.report is None:
+            raise RuntimeError(f"Report for {source} failed: {dataset.error}")
+        return dataset.report
+
+    def warm(self) -> None:
+        """Loads every source and compiles its schema's validator before the first request."""
+        for source in self.sources:
+            get_schema(source).validator
+            self._load(source, force=False)
+
+    def refresh(self, source: Optional[str] = None) -> List[str]:
+        """Re-reads changed sources (or just the given one) and returns the sources that were reloaded."""
+        sources = [source] if source is not None else self.sources
+        refreshed = []
+        for name in sources:
+            if name not in self.generators:
+                raise KeyError(name)
+            before = self.datasets.get(name)
+            after = self._load(name, force=True)
+            if after is not before and after.error is None:
+                refreshed.append(name)
+        return refreshed
+
+    def _load(self, source: str, force: bool) -> Dataset:
+        generator = self.generators[source]
+        with self._locks[source]:
+            current = self.datasets.get(source)
+            if current is not None and current.report is not None and not force:
+                return current # Loaded by a concurrent request while this one waited
+            start = time.perf_counter()
+            try:
+                fingerprint = generator.source_fingerprint()
+                if current is not None and current.report is not None and fingerprint is not None and fingerprint == current.fingerprint:
+                    return current
+                aggregator = generator.aggregate()
+                report = generator.report_from_aggregator(aggregator)
+            except Exception as e:
+                self.logger.error(f"Refreshing {source} failed: {e}", exc_info=True)
+                last = current or Dataset(source)
+                # Keep serving the last good report, if there is one
+                failed = Dataset(source, last.aggregator, last.report, last.fingerprint, last.refreshed_at,
+                                 seconds=time.perf_counter() - start, error=f"{type(e).__name__}: {e}")
+                self.datasets[source] = failed
+                return failed
+            dataset = Dataset(source, aggregator, report, fingerprint, datetime.datetime.now(), time.perf_counter() - start)
+            self.datasets[source] = dataset # Replaced whole, so readers never see a half-refreshed dataset
+            self.logger.info(f"Loaded {aggregator.records} records from {source} in {dataset.seconds:.2f}s.")
+            return dataset
+
+    def start(self) -> None:
+        """Starts the background refresh thread (if a refresh interval is set)."""
+        if not self.refresh_interval or self._refresher is not None:
+            return
+        self._stop.clear()
+        self._refresher = threading.Thread(target=self._refresh_loop, name='report-refresh', daemon=True)
+        self._refresher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join()
+            self._refresher = None
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                refreshed = self.refresh()
+            except Exception as e:
+                self.logger.error(f"Background refresh failed: {e}", exc_info=True)
+                continue
+            if refreshed:
+                self.logger.info(f"Refreshed sources: {refreshed}")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'started_at': self.started_at.isoformat(),
+            'refresh_interval': self.refresh_interval,
+            'sources': {source: self.datasets[source].status() if source in self.datasets else None for source in self.sources},
+        }
+
+    def __repr__(self) -> str:
+        return f"<ReportService sources={len(self.sources)} loaded={len(self.datasets)}>"
+
+class _ReportRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET /report?source=<source>  the source's summary report (text)
+    GET /health                  service status (JSON)
+    POST /refresh[?source=...]   re-reads changed sources now (JSON)
+    """
+    server_version = 'ReportServer/1.0'
+
+    def do_GET(self) -> None:
+        self._dispatch('GET')
+
+    def do_POST(self) -> None:
+        self._dispatch('POST')
+
+    def _dispatch(self, method: str) -> None:
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        routes = {('GET', '/report'): self._report, ('GET', '/health'): self._health, ('POST', '/refresh'): self._refresh}
+        handler = routes.get((method, url.path))
+        if handler is None:
+            self._send(404, f"Unknown endpoint {method} {url.path}\n")
+            return
+        slots = self.server.worker_slots
+        if not slots.acquire(timeout=self.server.request_timeout):
+            self._send(503, "Server busy, try again later\n")
+            return
+        try:
+            handler(query)
+        except KeyError as e:
+            self._send(404, f"Unknown source {e}\n")
+        except Exception as e:
+            logger.error(f"{method} {self.path} failed: {e}", exc_info=True)
+            self._send(500, f"{e}\n")
+        finally:
+            slots.release()
+
+    def _report(self, query: Dict[str, str]) -> None:
+        service = self.server.service
+        self._send(200, service.report(query.get('source', service.sources[0])) + "\n")
+
+    def _health(self, query: Dict[str, str]) -> None:
+        self._send_json(200, self.server.service.status())
+
+    def _refresh(self, query: Dict[str, str]) -> None:
+        self._send_json(200, {'refreshed': self.server.service.refresh(query.get('source'))})
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        self._send(status, json.dumps(payload, indent=2) + "\n", content_type='application/json')
+
+    def _send(self, status: int, body: str, content_type: str = 'text/plain; charset=utf-8') -> None:
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Unix socket clients have no address, so requests are logged by line only
+        logger.debug(f"{self.requestline!r}: {format % args}")
+
+class _UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+class ReportServer:
+    """
+    Serves a ReportService over local HTTP (host/port) or, if socket_path is given, a Unix socket.
+    Each connection gets a thread, but at most max_workers requests are handled at once; others
+    wait up to request_timeout seconds for a free worker before getting a 503.
+    """
+    def __init__(self, service: ReportService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 socket_path: Optional[str] = None, max_workers: int = DEFAULT_MAX_WORKERS,
+                 request_timeout: float = DEFAULT_REQUEST_TIMEOUT):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.service = service
+        self.socket_path = socket_path
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path) # Left behind by a previous run
+            self.httpd = _UnixHTTPServer(socket_path, _ReportRequestHandler)
+        else:
+            self.httpd = ThreadingHTTPServer((host, port), _ReportRequestHandler)
+            self.httpd.daemon_threads = True
+        # The handler reaches the service and its limits through the server object
+        self.httpd.service = service
+        self.httpd.worker_slots = threading.BoundedSemaphore(max_workers)
+        self.httpd.request_timeout = request_timeout
+        self.logger = setup_logger(f"{__name__}.ReportServer")
+
+    @property
+    def address(self) -> Any:
+        """The bound (host, port), or the socket path."""
+        return self.socket_path or self.httpd.server_address[:2]
+
+    def serve_forever(self) -> None:
+        """Starts background refresh and handles requests until shutdown() is called."""
+        self.service.start()
+        self.logger.info(f"Serving reports for {self.service.sources} on {self.address}")
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.service.stop()
+
+    def shutdown(self) -> None:
+        """Stops serve_forever (call from another thread) and releases the socket."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def __repr__(self) -> str:
+        return f"<ReportServer address={self.address!r}>"
+
+def server_from_settings(settings: Dict[str, Any], report_config: Dict[str, Any], **overrides: Any) -> ReportServer:
+    """
+    Builds a warmed-up server from the settings' "server" section (host, port, socketPath,
+    maxWorkers, refreshSeconds, sources). Keyword overrides (e.g. from the command line) win.
+    """
+    server_settings = settings.get('server', {})
+    options = {
+        'host': server_settings.get('host', DEFAULT_HOST),
+        'port': server_settings.get('port', DEFAULT_PORT),
+        'socket_path': server_settings.get('socketPath'),
+        'max_workers': server_settings.get('maxWorkers', DEFAULT_MAX_WORKERS),
+        'refresh_interval': server_settings.get('refreshSeconds'),
+        'sources': server_settings.get('sources') or [settings.get('defaultDataSource', "dummy")],
+    }
+    options.update({key: value for key, value in overrides.items() if value is not None})
+    service = ReportService(options.pop('sources'), report_config, refresh_interval=options.pop('refresh_interval'))
+    service.warm()
+    return ReportServer(service, **options)
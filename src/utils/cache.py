@@ -0,0 +1,203 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from src.utils.helpers import setup_logger
+
+logger = setup_logger(__name__)
+
+# Bytes hashed at each end of a file when fingerprinting without a full content hash
+SAMPLE_HASH_BYTES = 64 * 1024
+
+def file_fingerprint(path: str, full_hash: bool = False) -> str:
+    """
+    Returns a fingerprint of a file's identity and content: path, mtime, size and a content hash.
+    By default only the first and last SAMPLE_HASH_BYTES are hashed; full_hash hashes everything.
+    """
+    stat = os.stat(path)
+    digest = hashlib.sha256()
+    digest.update(f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}".encode('utf-8'))
+    with open(path, 'rb') as f:
+        if full_hash or stat.st_size <= 2 * SAMPLE_HASH_BYTES:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        else:
+            digest.update(f.read(SAMPLE_HASH_BYTES))
+            f.seek(stat.st_size - SAMPLE_HASH_BYTES)
+            digest.update(f.read(SAMPLE_HASH_BYTES))
+    return digest.hexdigest()
+
+def _digest(obj: Any) -> str:
+    return hashlib.sha1(repr(obj).encode('utf-8')).hexdigest()
+
+class TieredCache:
+    """
+    Two-tier cache: an in-memory LRU (bounded by entry count) in front of an optional on-disk
+    tier (bounded by total bytes, least recently used files evicted first).
+    Every entry carries a tag (e.g. the source it was computed from) and a version (e.g. the
+    source fingerprint), so all entries of a tag with an outdated version can be dropped at once.
+    """
+    def __init__(self, max_memory_entries: int = 128, cache_dir: Optional[str] = None, max_disk_bytes: int = 512 * 1024 * 1024):
+        self.max_memory_entries = max_memory_entries
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[Hashable, Tuple[str, str, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'invalidations': 0}
+        self.logger = setup_logger(f"{__name__}.TieredCache")
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the cached value for key, promoting disk hits into memory."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return entry[2]
+
+            path = self._find_disk_entry(key)
+            if path is not None:
+                try:
+                    with open(path, 'rb') as f:
+                        tag, version, stored_key, value = pickle.load(f)
+                except (OSError, pickle.PickleError, EOFError, ValueError) as e:
+                    self.logger.warning(f"Dropping unreadable cache file {path}: {e}")
+                    self._remove_file(path)
+                else:
+                    if stored_key == key:
+                        os.utime(path) # Mark as recently used for disk eviction
+                        self._stats['disk_hits'] += 1
+                        self._remember(key, tag, version, value)
+                        return value
+
+            self._stats['misses'] += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, tag: str = '', version: str = '') -> None:
+        """Stores a value in memory and, if configured, on disk."""
+        with self._lock:
+            self._stats['stores'] += 1
+            self._remember(key, tag, version, value)
+            if self.cache_dir:
+                self._write_disk_entry(key, tag, version, value)
+
+    def invalidate(self, tag: str, keep_version: Optional[str] = None) -> int:
+        """Removes every entry with this tag whose version differs from keep_version. Returns the count."""
+        removed = 0
+        with self._lock:
+            for key in [k for k, (t, v, _) in self._memory.items() if t == tag and v != keep_version]:
+                del self._memory[key]
+                removed += 1
+            if self.cache_dir:
+                tag_prefix = _digest(tag)[:16] + '-'
+                keep_part = _digest(keep_version)[:16] if keep_version is not None else None
+                for name in os.listdir(self.cache_dir):
+                    if name.startswith(tag_prefix) and name.split('-')[1] != keep_part:
+                        self._remove_file(os.path.join(self.cache_dir, name))
+                        removed += 1
+            self._stats['invalidations'] += removed
+        if removed:
+            self.logger.info(f"Invalidated {removed} stale cache entries for '{tag}'.")
+        return removed
+
+    def clear(self) -> None:
+        """Empties both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self.cache_dir:
+                for name in os.listdir(self.cache_dir):
+                    self._remove_file(os.path.join(self.cache_dir, name))
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters plus the current size of each tier."""
+        with self._lock:
+            stats = dict(self._stats)
+            lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+            stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+            stats['memory_entries'] = len(self._memory)
+            stats['disk_bytes'] = self._disk_usage()[0] if self.cache_dir else 0
+            return stats
+
+    def _remember(self, key: Hashable, tag: str, version: str, value: Any) -> None:
+        self._memory[key] = (tag, version, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def _entry_name(self, key: Hashable, tag: str, version: str) -> str:
+        return f"{_digest(tag)[:16]}-{_digest(version)[:16]}-{_digest(key)}.pkl"
+
+    def _find_disk_entry(self, key: Hashable) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        suffix = f"-{_digest(key)}.pkl"
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(suffix):
+                return os.path.join(self.cache_dir, name)
+        return None
+
+    def _write_disk_entry(self, key: Hashable, tag: str, version: str, value: Any) -> None:
+        try:
+            payload = pickle.dumps((tag, version, key, value), protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            self.logger.warning(f"Value for cache key {key!r} is not picklable, keeping it in memory only: {e}")
+            return
+        if len(payload) > self.max_disk_bytes:
+            self.logger.debug(f"Cache entry of {len(payload)} bytes exceeds the disk budget, keeping it in memory only.")
+            return
+        path = os.path.join(self.cache_dir, self._entry_name(key, tag, version))
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        self._evict_disk()
+
+    def _disk_usage(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.pkl'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+            total += stat.st_size
+        return total, entries
+
+    def _evict_disk(self) -> None:
+        total, entries = self._disk_usage()
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            self._remove_file(path)
+            total -= size
+            self._stats['evictions'] += 1
+
+    def _remove_file(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def __repr__(self) -> str:
+        return f"<TieredCache memory_entries={len(self._memory)} cache_dir={self.cache_dir!r}>"
+
+_shared_caches: Dict[Tuple[Optional[str], int, int], TieredCache] = {}
+_shared_lock = threading.Lock()
+
+def get_shared_cache(cache_dir: Optional[str] = None, max_memory_entries: int = 128, max_disk_bytes: int = 512 * 1024 * 1024) -> TieredCache:
+    """Returns a process-wide cache for the given settings, so repeated callers share hits."""
+    key = (os.path.abspath(cache_dir) if cache_dir else None, max_memory_entries, max_disk_bytes)
+    with _shared_lock:
+        if key not in _shared_caches:
+            _shared_caches[key] = TieredCache(max_memory_entries=max_memory_entries, cache_dir=cache_dir, max_disk_bytes=max_disk_bytes)
+        return _shared_caches[key]
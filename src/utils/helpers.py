@@ -1,21 +1,51 @@
 import datetime
+import json
 import logging
+import os
+from typing import Optional
+
+# Project-level settings file (config/settings.json)
+DEFAULT_SETTINGS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'config', 'settings.json')
 
 def get_current_timestamp() -> str:
     """Returns the current timestamp as a string."""
     return datetime.datetime.now().isoformat()
 
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+class _DeferredStreamHandler(logging.Handler):
+    """
+    Handler shared by every logger from setup_logger. The stream handler and formatter it
+    writes through are only built when the first record is emitted, so the loggers that
+    modules set up at import time cost almost nothing until something is logged.
+    """
+    def __init__(self):
+        super().__init__()
+        self._target: Optional[logging.StreamHandler] = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self._target is None:
+            self._target = logging.StreamHandler()
+            self._target.setFormatter(logging.Formatter(LOG_FORMAT))
+        self._target.emit(record)
+
+_shared_handler = _DeferredStreamHandler()
+
 def setup_logger(name: str, level=logging.INFO) -> logging.Logger:
     """Sets up a basic logger."""
     logger = logging.getLogger(name)
     if not logger.handlers:
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        logger.addHandler(_shared_handler)
         logger.setLevel(level)
     return logger
 
+def load_settings(path: str = DEFAULT_SETTINGS_PATH) -> dict:
+    """Loads the JSON settings file. Returns an empty dict if the file does not exist."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
 def format_data(data: dict) -> str:
     """A simple function to format dictionary data for display."""
     items = [f"  {k}: {v}" for k, v in data.items()]
@@ -0,0 +1,248 @@
+import json
+import os
+import time
+from collections import Counter
+from typing import List, Dict, Any, Callable, Optional
+
+try:
+    import resource # Unix only; used for the process high-water mark
+except ImportError: # pragma: no cover
+    resource = None
+
+from src.utils.helpers import setup_logger
+
+logger = setup_logger(__name__)
+
+def _max_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 # Reported in KiB on Linux
+
+class StageMetrics:
+    """Metrics for one pipeline stage; repeated runs of a stage are accumulated by Instrumentation."""
+    __slots__ = ('name', 'calls', 'wall_seconds', 'cpu_seconds', 'rows_in', 'rows_out', 'rejected', 'peak_memory_bytes', '_running_peak')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.rows_in: Optional[int] = None
+        self.rows_out: Optional[int] = None
+        self.rejected: Counter = Counter()
+        self.peak_memory_bytes: Optional[int] = None
+        self._running_peak = 0
+
+    def accumulate(self, other: 'StageMetrics') -> None:
+        self.calls += other.calls
+        self.wall_seconds += other.wall_seconds
+        self.cpu_seconds += other.cpu_seconds
+        if other.rows_in is not None:
+            self.rows_in = (self.rows_in or 0) + other.rows_in
+        if other.rows_out is not None:
+            self.rows_out = (self.rows_out or 0) + other.rows_out
+        self.rejected.update(other.rejected)
+        if other.peak_memory_bytes is not None:
+            self.peak_memory_bytes = max(self.peak_memory_bytes or 0, other.peak_memory_bytes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'stage': self.name,
+            'calls': self.calls,
+            'wall_seconds': self.wall_seconds,
+            'cpu_seconds': self.cpu_seconds,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'rejected': dict(self.rejected),
+            'peak_memory_bytes': self.peak_memory_bytes,
+        }
+
+    def __repr__(self) -> str:
+        return f"<StageMetrics {self.name} calls={self.calls} wall={self.wall_seconds:.6f}s rows_in={self.rows_in} rows_out={self.rows_out}>"
+
+class _StageTimer:
+    """Context manager returned by Instrumentation.stage; yields the StageMetrics being filled in."""
+    __slots__ = ('_owner', '_metrics', '_wall', '_cpu')
+
+    def __init__(self, owner: 'Instrumentation', metrics: StageMetrics):
+        self._owner = owner
+        self._metrics = metrics
+
+    def __enter__(self) -> StageMetrics:
+        self._owner._enter(self._metrics)
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        return self._metrics
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._metrics.wall_seconds = time.perf_counter() - self._wall
+        self._metrics.cpu_seconds = time.process_time() - self._cpu
+        self._owner._exit(self._metrics)
+
+class Instrumentation:
+    """
+    Collects per-stage wall time, CPU time, row counts, rejections by reason and peak memory.
+    Stages are timed with `with instrumentation.stage(name, rows_in=n) as metrics:`; the block
+    can set metrics.rows_out and metrics.rejected. Runs of the same stage name add up.
+    Subscribers registered with subscribe() receive each finished StageMetrics.
+    Peak memory is the process high-water mark (RSS) by default; with track_memory=True it is
+    the peak of Python allocations during the stage, via tracemalloc (slower).
+    """
+    enabled = True
+
+    def __init__(self, track_memory: bool = False, callbacks: Optional[List[Callable[[StageMetrics], None]]] = None):
+        self.track_memory = track_memory
+        self.stages: Dict[str, StageMetrics] = {}
+        self._callbacks: List[Callable[[StageMetrics], None]] = list(callbacks or [])
+        self._open: List[StageMetrics] = []
+        self._started_tracemalloc = False
+
+    def subscribe(self, callback: Callable[[StageMetrics], None]) -> None:
+        self._callbacks.append(callback)
+
+    def stage(self, name: str, rows_in: Optional[int] = None) -> _StageTimer:
+        metrics = StageMetrics(name)
+        metrics.rows_in = rows_in
+        return _StageTimer(self, metrics)
+
+    def _enter(self, metrics: StageMetrics) -> None:
+        if self.track_memory:
+            import tracemalloc # Only loaded when memory tracking is requested
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            # Resetting the peak for this stage must not lose what enclosing stages have seen so far
+            peak = tracemalloc.get_traced_memory()[1]
+            for outer in self._open:
+                outer._running_peak = max(outer._running_peak, peak)
+            tracemalloc.reset_peak()
+        self._open.append(metrics)
+
+    def _exit(self, metrics: StageMetrics) -> None:
+        self._open.remove(metrics)
+        if self.track_memory:
+            import tracemalloc
+        if self.track_memory and tracemalloc.is_tracing():
+            peak = max(metrics._running_peak, tracemalloc.get_traced_memory()[1])
+            metrics.peak_memory_bytes = peak
+            for outer in self._open:
+                outer._running_peak = max(outer._running_peak, peak)
+            if not self._open and self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+        else:
+            metrics.peak_memory_bytes = _max_rss_bytes()
+        self._finish(metrics)
+
+    def record(self, name: str, wall_seconds: float, cpu_seconds: float = 0.0, rows_in: Optional[int] = None,
+               rows_out: Optional[int] = None, rejected: Optional[Dict[str, int]] = None) -> None:
+        """Adds a run of a stage that was timed elsewhere (e.g. accumulated inside a loop)."""
+        metrics = StageMetrics(name)
+        metrics.wall_seconds, metrics.cpu_seconds = wall_seconds, cpu_seconds
+        metrics.rows_in, metrics.rows_out = rows_in, rows_out
+        metrics.rejected.update(rejected or {})
+        self._finish(metrics)
+
+    def _finish(self, metrics: StageMetrics) -> None:
+        metrics.calls = 1
+        if metrics.name not in self.stages:
+            self.stages[metrics.name] = StageMetrics(metrics.name)
+        self.stages[metrics.name].accumulate(metrics)
+        for callback in self._callbacks:
+            try:
+                callback(metrics)
+            except Exception as e:
+                logger.warning(f"Instrumentation callback {callback!r} failed: {e}")
+
+    def reset(self) -> None:
+        self.stages = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'stages': [metrics.to_dict() for metrics in self.stages.values()]}
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self, prefix: str = 'pipeline') -> str:
+        """Renders the metrics in the Prometheus text exposition format."""
+        series = [
+            ('stage_runs_total', 'counter', 'Number of times the stage ran.', lambda m: m.calls),
+            ('stage_wall_seconds_total', 'counter', 'Wall-clock time spent in the stage.', lambda m: m.wall_seconds),
+            ('stage_cpu_seconds_total', 'counter', 'CPU time spent in the stage.', lambda m: m.cpu_seconds),
+            ('stage_rows_in_total', 'counter', 'Rows entering the stage.', lambda m: m.rows_in),
+            ('stage_rows_out_total', 'counter', 'Rows leaving the stage.', lambda m: m.rows_out),
+            ('stage_peak_memory_bytes', 'gauge', 'Peak memory observed during the stage.', lambda m: m.peak_memory_bytes),
+        ]
+        lines = []
+        for suffix, metric_type, help_text, getter in series:
+            name = f"{prefix}_{suffix}"
+            samples = [(m.name, getter(m)) for m in self.stages.values() if getter(m) is not None]
+            if not samples:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.extend(f'{name}{{stage="{_escape_label(stage)}"}} {value}' for stage, value in samples)
+
+        rejected = [(m.name, reason, count) for m in self.stages.values() for reason, count in m.rejected.items()]
+        if rejected:
+            name = f"{prefix}_stage_rows_rejected_total"
+            lines.append(f"# HELP {name} Rows rejected by the stage, by reason.")
+            lines.append(f"# TYPE {name} counter")
+            lines.extend(f'{name}{{stage="{_escape_label(stage)}",reason="{_escape_label(reason)}"}} {count}' for stage, reason, count in rejected)
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str, prefix: str = 'pipeline') -> None:
+        """Writes a textfile-collector file atomically."""
+        _write_atomic(path, self.to_prometheus(prefix))
+
+    def write_json(self, path: str) -> None:
+        _write_atomic(path, self.to_json())
+
+    def __repr__(self) -> str:
+        return f"<Instrumentation stages={list(self.stages)}>"
+
+def _escape_label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _write_atomic(path: str, text: str) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+class _NullStage:
+    """Shared no-op stage: entering it costs two method calls and nothing is recorded."""
+    __slots__ = ('name', 'calls', 'wall_seconds', 'cpu_seconds', 'rows_in', 'rows_out', 'rejected', 'peak_memory_bytes')
+
+    def __enter__(self) -> '_NullStage':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+class NullInstrumentation:
+    """Drop-in replacement for Instrumentation used when instrumentation is disabled."""
+    enabled = False
+    stages: Dict[str, StageMetrics] = {}
+    _stage = _NullStage()
+
+    def subscribe(self, callback: Callable[[StageMetrics], None]) -> None:
+        pass
+
+    def stage(self, name: str, rows_in: Optional[int] = None) -> _NullStage:
+        return self._stage
+
+    def record(self, name: str, wall_seconds: float, cpu_seconds: float = 0.0, rows_in: Optional[int] = None,
+               rows_out: Optional[int] = None, rejected: Optional[Dict[str, int]] = None) -> None:
+        pass
+
+    def reset(self) -> None:
+        pass
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'stages': []}
+
+    def __repr__(self) -> str:
+        return "<NullInstrumentation>"
+
+NULL_INSTRUMENTATION = NullInstrumentation()
@@ -1,6 +1,8 @@
 import math
 import statistics
-from typing import List
+from typing import List, Iterable, Union
+
+import numpy as np
 
 def add(a: float, b: float) -> float:
     """Adds two numbers."""
@@ -71,6 +73,8 @@ def is_prime(num: int) -> bool:
 
 class Vector2D:
     """Represents a 2D vector with basic operations."""
+    __slots__ = ('x', 'y')
+
     def __init__(self, x: float, y: float):
         self.x = x
         self.y = y
@@ -102,4 +106,82 @@ class Vector2D:
         return Vector2D(self.x * scalar, self.y * scalar)
 
     def __repr__(self) -> str:
-        return f"Vector2D(x={self.x}, y={self.y})" 
\ No newline at end of file
+        return f"Vector2D(x={self.x}, y={self.y})" 
+
+class Vector2DArray:
+    """
+    A batch of 2D vectors stored as two NumPy arrays (struct of arrays).
+    Operations apply to all vectors at once; use it instead of lists of Vector2D for large batches.
+    """
+    __slots__ = ('x', 'y')
+
+    def __init__(self, x: Iterable[float], y: Iterable[float]):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        if self.x.shape != self.y.shape or self.x.ndim != 1:
+            raise ValueError(f"x and y must be 1-D arrays of the same length, got shapes {self.x.shape} and {self.y.shape}")
+
+    @classmethod
+    def from_vectors(cls, vectors: Iterable[Vector2D]) -> 'Vector2DArray':
+        vectors = list(vectors)
+        return cls([v.x for v in vectors], [v.y for v in vectors])
+
+    @classmethod
+    def zeros(cls, n: int) -> 'Vector2DArray':
+        return cls(np.zeros(n), np.zeros(n))
+
+    def to_vectors(self) -> List[Vector2D]:
+        return [Vector2D(x, y) for x, y in zip(self.x.tolist(), self.y.tolist())]
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def __getitem__(self, index) -> Union[Vector2D, 'Vector2DArray']:
+        if isinstance(index, (int, np.integer)):
+            return Vector2D(float(self.x[index]), float(self.y[index]))
+        return Vector2DArray(self.x[index], self.y[index])
+
+    def __iter__(self):
+        return iter(self.to_vectors())
+
+    def __add__(self, other: Union[Vector2D, 'Vector2DArray']) -> 'Vector2DArray':
+        # A single Vector2D is broadcast against every vector in the batch
+        return Vector2DArray(self.x + other.x, self.y + other.y)
+
+    def __sub__(self, other: Union[Vector2D, 'Vector2DArray']) -> 'Vector2DArray':
+        return Vector2DArray(self.x - other.x, self.y - other.y)
+
+    def __mul__(self, scalar: Union[float, np.ndarray]) -> 'Vector2DArray':
+        """Scales every vector by a scalar, or each vector by its own factor."""
+        return Vector2DArray(self.x * scalar, self.y * scalar)
+
+    __rmul__ = __mul__
+
+    def scale(self, factor: Union[float, np.ndarray]) -> 'Vector2DArray':
+        return self * factor
+
+    def dot(self, other: Union[Vector2D, 'Vector2DArray']) -> np.ndarray:
+        """Per-vector dot products."""
+        return self.x * other.x + self.y * other.y
+
+    def magnitude(self) -> np.ndarray:
+        """Per-vector magnitudes."""
+        return np.hypot(self.x, self.y)
+
+    def normalize(self) -> 'Vector2DArray':
+        """Returns unit vectors. Raises ValueError if any vector is zero, like Vector2D.normalize."""
+        mag = self.magnitude()
+        if np.any(mag == 0):
+            raise ValueError("Cannot normalize a zero vector")
+        return Vector2DArray(self.x / mag, self.y / mag)
+
+    def sum(self) -> Vector2D:
+        return Vector2D(float(self.x.sum()), float(self.y.sum()))
+
+    def mean(self) -> Vector2D:
+        if not len(self):
+            raise ValueError("Cannot calculate mean of an empty Vector2DArray")
+        return Vector2D(float(self.x.mean()), float(self.y.mean()))
+
+    def __repr__(self) -> str:
+        return f"Vector2DArray(n={len(self)})"
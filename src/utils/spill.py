@@ -0,0 +1,47 @@
+import itertools
+import os
+import shutil
+import tempfile
+import weakref
+from typing import Optional
+
+from src.utils.helpers import setup_logger
+
+logger = setup_logger(__name__)
+
+class SpillDirectory:
+    """
+    Private temporary directory for the spill files of one out-of-core component.
+    It is created under parent (the system temp directory by default) when the first file is
+    requested, and removed with its contents by close() or when the object is garbage-collected.
+    Files that are still memory-mapped stay readable after removal.
+    """
+    def __init__(self, parent: Optional[str] = None, prefix: str = 'spill-'):
+        self.parent = parent
+        self.prefix = prefix
+        self.path: Optional[str] = None
+        self._names = itertools.count()
+        self._finalizer: Optional[weakref.finalize] = None
+
+    def new_file(self, suffix: str = '') -> str:
+        """Returns the path of a new, not yet existing file in the directory."""
+        if self.path is None:
+            if self.parent:
+                os.makedirs(self.parent, exist_ok=True)
+            self.path = tempfile.mkdtemp(prefix=self.prefix, dir=self.parent)
+            self._finalizer = weakref.finalize(self, shutil.rmtree, self.path, ignore_errors=True)
+            logger.info(f"Spilling to {self.path}")
+        return os.path.join(self.path, f"{next(self._names):06d}{suffix}")
+
+    @property
+    def active(self) -> bool:
+        return self.path is not None
+
+    def close(self) -> None:
+        if self._finalizer is not None:
+            self._finalizer()
+            self._finalizer = None
+        self.path = None
+
+    def __repr__(self) -> str:
+        return f"<SpillDirectory {self.path or 'unused'}>"
@@ -1,12 +1,58 @@
+import functools
 import re
+import sys
+from typing import Dict, Any
+
+_NON_ALNUM_PATTERN = re.compile(r'[^a-zA-Z0-9\s]')
+_EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+_CAMEL_BOUNDARY_PATTERN = re.compile('(?<!^)(?=[A-Z])')
+
+# str.translate table deleting exactly the ASCII characters the pattern above removes
+_ASCII_NON_ALNUM_TABLE = str.maketrans('', '', ''.join(c for c in map(chr, range(128)) if _NON_ALNUM_PATTERN.match(c)))
+
+# Maximum number of distinct names kept by normalize_name
+NAME_CACHE_SIZE = 65536
 
 def sanitize_string(text: str) -> str:
     """Removes non-alphanumeric characters from a string."""
-    return re.sub(r'[^a-zA-Z0-9\s]', '', text).strip()
+    if type(text) is str and text.isascii():
+        return text.translate(_ASCII_NON_ALNUM_TABLE).strip()
+    return _NON_ALNUM_PATTERN.sub('', text).strip()
 
 def capitalize_words(text: str) -> str:
     """Capitalizes the first letter of each word in a string."""
-    return ' '.join(word.capitalize() for word in text.split())
+    return ' '.join(map(str.capitalize, text.split()))
+
+def _normalize_name(text: str) -> str:
+    return sys.intern(capitalize_words(sanitize_string(text)))
+
+_normalize_name_cached = functools.lru_cache(maxsize=NAME_CACHE_SIZE)(_normalize_name)
+
+def normalize_name(text: str) -> str:
+    """
+    capitalize_words(sanitize_string(text)), memoized in a bounded LRU cache.
+    Results are interned, so every occurrence of a repeated name shares one string object.
+    """
+    try:
+        return _normalize_name_cached(text)
+    except TypeError:
+        # Unhashable input: raise the same error the uncached functions would
+        return _normalize_name(text)
+
+def normalization_stats() -> Dict[str, Any]:
+    """Hit/miss counts and current size of the normalize_name cache."""
+    info = _normalize_name_cached.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'hit_rate': info.hits / lookups if lookups else 0.0,
+        'size': info.currsize,
+        'max_size': info.maxsize,
+    }
+
+def clear_normalization_cache() -> None:
+    _normalize_name_cached.cache_clear()
 
 def reverse_string(text: str) -> str:
     """Reverses a string."""
@@ -39,8 +85,7 @@ def count_substring(text: str, sub: str) -> int:
 def extract_emails(text: str) -> list[str]:
     """Extracts potential email addresses from a string using a simple regex."""
     # Basic regex, not fully RFC compliant but good for common cases
-    email_regex = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-    return re.findall(email_regex, text)
+    return _EMAIL_PATTERN.findall(text)
 
 def snake_to_camel(snake_str: str) -> str:
     """Converts snake_case string to camelCase."""
@@ -52,5 +97,5 @@ def snake_to_camel(snake_str: str) -> str:
 def camel_to_snake(camel_str: str) -> str:
     """Converts camelCase string to snake_case."""
     # Add underscore before uppercase letters (if not first char) and convert to lower
-    snake_str = re.sub('(?<!^)(?=[A-Z])', '_', camel_str).lower()
+    snake_str = _CAMEL_BOUNDARY_PATTERN.sub('_', camel_str).lower()
     return snake_str 
\ No newline at end of file
@@ -0,0 +1,44 @@
+import json
+import pytest
+from benchmarks import bench_pipeline
+
+def test_run_benchmarks_small(tmp_path):
+    stages = ['parse_raw_data', 'calculate_total_value[batch]', 'ReportGenerator.generate_summary_report']
+    document = bench_pipeline.run_benchmarks(sizes=[200], stages=stages, repeat=1)
+    assert [r['benchmark'] for r in document['results']] == stages
+    for result in document['results']:
+        assert result['rows'] == 200
+        assert result['seconds'] > 0 and result['peak_bytes'] >= 0
+    with pytest.raises(ValueError):
+        bench_pipeline.run_benchmarks(sizes=[10], stages=['no_such_stage'])
+
+def test_compare_results_flags_regressions():
+    baseline = {'results': [
+        {'benchmark': 'parse_raw_data', 'rows': 1000, 'seconds': 0.010, 'peak_bytes': 1000},
+        {'benchmark': 'validate_record', 'rows': 1000, 'seconds': 0.0001, 'peak_bytes': 0},
+    ]}
+    current = {'results': [
+        {'benchmark': 'parse_raw_data', 'rows': 1000, 'seconds': 0.013, 'peak_bytes': 1100},
+        {'benchmark': 'validate_record', 'rows': 1000, 'seconds': 0.0005, 'peak_bytes': 10}, # Below the noise floor
+        {'benchmark': 'parse_raw_data', 'rows': 5000, 'seconds': 1.0, 'peak_bytes': 1}, # Not in the baseline
+    ]}
+    regressions = bench_pipeline.compare_results(current, baseline, threshold=0.2)
+    assert [(r['benchmark'], r['metric']) for r in regressions] == [('parse_raw_data', 'seconds')]
+    assert regressions[0]['change'] == pytest.approx(0.3)
+
+def test_main_compare_mode_exit_code(tmp_path):
+    output = tmp_path / "current.json"
+    args = ['--sizes', '100', '--stages', 'parse_raw_data', '--repeat', '1', '--output', str(output)]
+    assert bench_pipeline.main(args) == 0
+    baseline = json.loads(output.read_text())
+    for result in baseline['results']:
+        result['seconds'] = result['peak_bytes'] = 1e-12 # A baseline nothing can match
+    (tmp_path / "baseline.json").write_text(json.dumps(baseline))
+    assert bench_pipeline.main(args + ['--compare', str(tmp_path / "baseline.json")]) == 1
+
+def test_dataset_inputs_are_streamed_and_isolated(tmp_path):
+    dataset = bench_pipeline.Dataset(300, str(tmp_path))
+    assert dataset.parsed == bench_pipeline.parse_raw_data(bench_pipeline.generate_raw_records(300))
+    assert 'raw' not in dataset._cache # The CSV file is written without materializing the raw records
+    bench_pipeline.BENCHMARKS['AdvancedCalculator.transform_values'](dataset)
+    assert 'value_transformed' not in dataset.parsed[0] # Later stages see unmodified records
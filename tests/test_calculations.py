@@ -42,4 +42,328 @@ def test_advanced_calculator_transform(sample_processed_data):
 
     calculator_half = core.AdvancedCalculator(exponent=0.5)
     transformed_half = calculator_half.transform_values(sample_processed_data)
-    assert transformed_half[0]['value_transformed'] == pytest.approx(3.16227766) # sqrt(10) 
\ No newline at end of file
+    assert transformed_half[0]['value_transformed'] == pytest.approx(3.16227766) # sqrt(10) 
+
+@pytest.fixture
+def sample_batch():
+    import datetime
+    from src.data_processing.record_batch import RecordBatch
+    ts = datetime.datetime(2023, 1, 1, 12, 0)
+    return RecordBatch.from_records([
+        {'id': 1, 'name': 'A', 'value': 10.0, 'category': 'FRUIT', 'timestamp': ts},
+        {'id': 2, 'name': 'B', 'value': 20.0, 'category': 'GRAIN', 'timestamp': ts},
+        {'id': 3, 'name': 'C', 'value': 30.0, 'category': 'GRAIN', 'timestamp': ts},
+    ])
+
+def test_calculations_accept_record_batch(sample_batch):
+    records = sample_batch.to_records()
+    assert core.calculate_total_value(sample_batch) == core.calculate_total_value(records)
+    assert core.calculate_weighted_average(sample_batch) == pytest.approx(core.calculate_weighted_average(records))
+    assert core.calculate_weighted_average(sample_batch, weight_key='name') == 0.0
+    batch_stats = core.calculate_value_statistics(sample_batch)
+    list_stats = core.calculate_value_statistics(records)
+    assert batch_stats == pytest.approx(list_stats)
+    assert core.find_most_common_categories(sample_batch) == core.find_most_common_categories(records)
+
+def _mixed_records():
+    import datetime
+    ts = datetime.datetime(2023, 1, 1)
+    categories = ['FRUIT', 'GRAIN', 'DAIRY', 'GRAIN', 'FRUIT', 'GRAIN']
+    return [
+        {'id': i, 'name': f'N{i}', 'value': v, 'category': c, 'timestamp': ts}
+        for i, (v, c) in enumerate(zip([3.5, -2.0, 10.0, 7.25, 0.0, 100.0], categories), start=1)
+    ]
+
+def test_summary_aggregator_matches_individual_functions():
+    from src.calculations.aggregation import aggregate_summary
+    records = _mixed_records()
+    aggregator = aggregate_summary(records)
+    assert aggregator.total_value() == core.calculate_total_value(records)
+    assert aggregator.weighted_average() == pytest.approx(core.calculate_weighted_average(records))
+    assert aggregator.statistics() == pytest.approx(core.calculate_value_statistics(records))
+    assert aggregator.most_common_categories(2) == core.find_most_common_categories(records, top_n=2)
+
+def test_summary_aggregator_merge_and_batches():
+    from src.calculations.aggregation import SummaryAggregator, aggregate_summary
+    from src.data_processing.record_batch import RecordBatch
+    records = _mixed_records()
+    full = aggregate_summary(records)
+
+    merged = SummaryAggregator()
+    merged.update_many(RecordBatch.from_records(records[:2]))
+    merged.merge(aggregate_summary(records[2:5]))
+    merged.update_many(RecordBatch.from_records(records[5:]))
+    assert merged.records == full.records == 6
+    assert merged.statistics() == pytest.approx(full.statistics())
+    assert merged.weighted_average() == pytest.approx(full.weighted_average())
+    assert merged.most_common_categories(3) == full.most_common_categories(3)
+    assert SummaryAggregator().statistics()['count'] == 0
+
+def test_summary_aggregator_same_results_for_records_and_batches():
+    import datetime
+    import numpy as np
+    from src.calculations.aggregation import SummaryAggregator, aggregate_summary
+    from src.data_processing.record_batch import RecordBatch
+    rng = np.random.default_rng(11)
+    records = [
+        {'id': i, 'name': 'Item', 'value': float(v), 'category': ('FRUIT', 'GRAIN', 'DAIRY')[i % 3], 'timestamp': datetime.datetime(2023, 1, 1)}
+        for i, v in enumerate(rng.lognormal(4.0, 1.0, size=9_000), start=1)
+    ]
+    expected = aggregate_summary(records)
+    for size in (1_000, 2_345, 9_000):
+        batched = SummaryAggregator()
+        for start in range(0, len(records), size):
+            chunk = records[start:start + size]
+            batched.update_many(RecordBatch.from_records(chunk) if start % (2 * size) else chunk)
+        assert batched.statistics() == expected.statistics(), size # Exactly, not just within rounding
+        assert (batched.total_value(), batched.weighted_average()) == (expected.total_value(), expected.weighted_average())
+        assert batched.most_common_categories(3) == expected.most_common_categories(3)
+    values = [r['value'] for r in records]
+    assert expected.total_value() == pytest.approx(core.calculate_total_value(records), rel=1e-12)
+    assert expected.statistics()['std_dev'] == pytest.approx(float(np.std(values, ddof=1)), rel=1e-9)
+
+def test_space_saving_sketch_bounds_and_merge():
+    import random
+    from collections import Counter
+    from src.calculations.sketches import SpaceSaving
+
+    rng = random.Random(7)
+    # A few heavy hitters in a long tail of distinct values
+    stream = [f"hot{i % 3}" for i in range(3000)] + [f"tail{rng.randrange(100000)}" for _ in range(7000)]
+    rng.shuffle(stream)
+    exact = Counter(stream)
+
+    halves = [SpaceSaving(capacity=50), SpaceSaving(capacity=50)]
+    halves[0].update_many(stream[:5000])
+    halves[1].update_many(stream[5000:])
+    sketch = halves[0].merge(halves[1])
+
+    assert len(sketch) <= 50 and sketch.total == len(stream)
+    assert sketch.max_error() <= len(stream) * 2 / 50 # Each merged half contributes at most total / capacity
+    assert sorted(item for item, _ in sketch.most_common(3)) == ['hot0', 'hot1', 'hot2']
+    for item, count in sketch.most_common(10):
+        assert count - sketch.error(item) <= exact[item] <= count
+
+def test_approximate_top_categories_exact_for_low_cardinality():
+    from src.calculations.aggregation import aggregate_summary
+    from src.data_processing.record_batch import RecordBatch
+    records = _mixed_records()
+    expected = core.find_most_common_categories(records, top_n=2)
+    assert core.find_most_common_categories(records, top_n=2, approximate=True, error_rate=0.01) == expected
+    assert core.find_most_common_categories(RecordBatch.from_records(records), top_n=2, approximate=True) == expected
+
+    aggregator = aggregate_summary(records, category_error_rate=0.01)
+    assert aggregator.most_common_categories(2) == expected
+    assert aggregator.category_error_bound() == 0
+    restored = aggregator.from_state(aggregator.to_state()).update_many(RecordBatch.from_records(records))
+    assert restored.most_common_categories(1) == [('GRAIN', 6)]
+
+def test_tdigest_quantiles_bounded_and_mergeable():
+    import numpy as np
+    from src.calculations.sketches import TDigest
+
+    values = np.random.default_rng(3).normal(100.0, 15.0, size=200_000)
+    parts = [TDigest() for _ in range(4)]
+    for digest, chunk in zip(parts, np.array_split(values, 4)):
+        digest.update_many(chunk)
+    merged = parts[0]
+    for digest in parts[1:]:
+        merged.merge(digest)
+
+    assert merged.count == len(values)
+    assert len(merged) <= merged.compression # Centroids stay bounded
+    for q in (0.01, 0.5, 0.9, 0.99):
+        assert merged.quantile(q) == pytest.approx(np.quantile(values, q), rel=2e-3)
+    assert merged.quantile(0) == values.min() and merged.quantile(1) == values.max()
+    assert TDigest.from_state(merged.to_state()).quantile(0.9) == pytest.approx(merged.quantile(0.9))
+
+def test_tdigest_estimates_do_not_depend_on_batching_or_saves():
+    import json
+    import numpy as np
+    from src.calculations.sketches import TDigest
+    values = np.random.default_rng(5).lognormal(4.0, 1.0, size=30_000)
+    qs = (0.5, 0.9, 0.99)
+    single = TDigest()
+    for value in values.tolist():
+        single.update(value)
+    expected = single.quantiles(qs)
+    for split in (1_000, 7_919, 17_357):
+        digest = TDigest()
+        digest.update_many(values[:split])
+        digest.quantiles(qs) # Reading estimates mid-stream must not change later ones
+        restored = TDigest.from_state(json.loads(json.dumps(digest.to_state())))
+        for chunk in np.array_split(values[split:], 7):
+            restored.update_many(chunk)
+        assert restored.quantiles(qs) == expected, split
+
+def test_value_statistics_report_percentiles():
+    from src.calculations.aggregation import aggregate_summary
+    records = [{'id': i, 'value': float(i), 'category': 'FRUIT'} for i in range(1, 101)]
+    stats = core.calculate_value_statistics(records)
+    assert stats['p50'] == pytest.approx(50.5)
+    assert stats['p90'] == pytest.approx(90.5)
+    assert set(core.calculate_value_statistics(records, quantiles=())) == {'min', 'max', 'mean', 'count', 'std_dev'}
+
+    aggregator = aggregate_summary(records[:40]).merge(aggregate_summary(records[40:]))
+    assert aggregator.statistics() == pytest.approx(stats)
+    assert aggregator.quantile(0.25) == pytest.approx(25.5)
+
+def test_transform_values_vectorized_with_nan_masks():
+    import math
+    from src.data_processing.record_batch import RecordBatch
+    records = [{'id': 1, 'value': 4.0}, {'id': 2, 'value': -8.0}, {'id': 3, 'value': 0.0}, {'id': 4, 'value': 'n/a'}]
+    calculator = core.AdvancedCalculator(exponent=0.5)
+
+    transformed = calculator.transform_values(records, exponents=[0.5, 2, -1])
+    assert transformed is records # Updated in place, no per-record copies
+    assert [r['value_transformed_0.5'] for r in records] == [2.0, None, 0.0, None]
+    assert [r['value_transformed_2'] for r in records] == [16.0, 64.0, 0.0, None]
+    assert [r['value_transformed_-1'] for r in records] == [0.25, -0.125, None, None]
+
+    batch = RecordBatch.from_records(_mixed_records())
+    transformed_batch = calculator.transform_values(batch)
+    column = transformed_batch.column('value_transformed')
+    assert transformed_batch.values is batch.values # Existing columns are shared
+    assert column[0] == pytest.approx(math.sqrt(3.5)) and math.isnan(column[1])
+    assert transformed_batch.to_records()[1]['value_transformed'] is None
+    assert len(transformed_batch.filter(column > 1).column('value_transformed')) == 4
+
+def _assert_groups_close(actual, expected):
+    assert list(actual) == list(expected)
+    for group, stats in expected.items():
+        assert actual[group] == pytest.approx(stats), group
+
+def test_aggregate_by_group_lists_batches_and_derived_keys():
+    import datetime
+    from src.data_processing.record_batch import RecordBatch
+    records = [
+        {'id': i, 'name': f"Item {i % 3}", 'value': float(v), 'category': c, 'timestamp': datetime.datetime(2023, 1, 1 + i % 2)}
+        for i, (v, c) in enumerate([(10, 'FRUIT'), (20, 'DAIRY'), (30, 'FRUIT'), (-5, 'GRAIN'), (15, 'DAIRY')], start=1)
+    ]
+    groups = core.aggregate_by_group(records, 'category')
+    assert list(groups) == ['FRUIT', 'DAIRY', 'GRAIN']
+    fruit = groups['FRUIT']
+    assert (fruit['count'], fruit['sum'], fruit['min'], fruit['max'], fruit['mean']) == (2, 40.0, 10.0, 30.0, 20.0)
+    assert fruit['std_dev'] == pytest.approx(core.calculate_value_statistics(records[0:3:2])['std_dev'])
+    assert fruit['weighted_average'] == pytest.approx(core.calculate_weighted_average(records[0:3:2]))
+    assert groups['GRAIN']['std_dev'] == 0.0
+
+    batch = RecordBatch.from_records(records)
+    for key in ('category', 'name', 'id', 'timestamp'):
+        _assert_groups_close(core.aggregate_by_group(batch, key), core.aggregate_by_group(records, key))
+    filtered = batch.filter(batch.values > 12)
+    assert list(core.aggregate_by_group(filtered, 'category')) == ['DAIRY', 'FRUIT']
+
+    by_sign = core.aggregate_by_group(records + [{'id': 9, 'value': 'n/a'}], key=lambda r: r['value'] if isinstance(r['value'], str) else r['value'] > 0)
+    assert by_sign[True]['count'] == 4 and by_sign[False]['sum'] == -5.0
+    assert by_sign['n/a']['count'] == 0 and by_sign['n/a']['mean'] == 0.0
+
+def test_group_aggregator_streams_and_merges():
+    from src.calculations.aggregation import GroupAggregator, SummaryAggregator
+    records = [{'id': i, 'value': float(i * 7 % 11), 'category': 'ABC'[i % 3]} for i in range(1, 61)]
+    expected = core.aggregate_by_group(records, 'category')
+
+    streamed = GroupAggregator('category')
+    for record in records[:10]:
+        streamed.update(record)
+    streamed.update_many(records[10:40])
+    other = GroupAggregator('category').update_many(records[40:])
+    _assert_groups_close(streamed.merge(other).results(), expected)
+    restored = GroupAggregator.from_state(streamed.to_state())
+    _assert_groups_close(restored.results(), expected)
+
+    summary = SummaryAggregator(group_key='category').update_many(records[:30])
+    summary.merge(SummaryAggregator(group_key='category').update_many(records[30:]))
+    _assert_groups_close(summary.copy().groups.results(), expected)
+
+def test_windowed_aggregator_tumbling_sliding_and_late_data():
+    import datetime
+    from src.calculations.windowing import WindowedAggregator, iter_windows
+    from src.data_processing.record_batch import RecordBatch
+    start = datetime.datetime(2023, 1, 1)
+    records = [
+        {'id': i, 'name': f"Item {i}", 'value': float(i), 'category': 'FRUIT', 'timestamp': start + datetime.timedelta(minutes=7 * i)}
+        for i in range(1, 41)
+    ]
+
+    hourly = WindowedAggregator('hour')
+    assert hourly.update_many(records[:8]) == [] # Watermark at 00:56
+    closed = hourly.update_many(records[8:9]) # 01:03 closes the first hour
+    assert [(w.start, w.aggregator.records) for w in closed] == [(start, 8)]
+    stats = closed[0].statistics()
+    assert stats['window_end'] == start + datetime.timedelta(hours=1)
+    assert (stats['total_value'], stats['mean']) == (36.0, 4.5)
+    assert hourly.update(records[0]) == [] and hourly.late_records == 1
+
+    def summarize(windows):
+        return [(w.start, w.aggregator.records, w.aggregator.total_value()) for w in windows]
+    def expected(size, slide):
+        windows = {}
+        for record in records:
+            index = (record['timestamp'] - datetime.datetime(1970, 1, 1)) // slide
+            while datetime.datetime(1970, 1, 1) + index * slide + size > record['timestamp']:
+                windows.setdefault(datetime.datetime(1970, 1, 1) + index * slide, []).append(record['value'])
+                index -= 1
+        return [(s, len(values), sum(values)) for s, values in sorted(windows.items())]
+
+    size, slide = datetime.timedelta(minutes=30), datetime.timedelta(minutes=10)
+    chunks = [records[i:i + 7] for i in range(0, len(records), 7)]
+    assert summarize(iter_windows(chunks, size, slide=slide)) == expected(size, slide)
+    batches = [RecordBatch.from_records(chunk) for chunk in chunks]
+    assert summarize(iter_windows(batches, size, slide=slide)) == expected(size, slide)
+
+    # Out-of-order data within the allowed lateness is kept; state stays bounded
+    shuffled = records[::-1]
+    late = WindowedAggregator('hour', allowed_lateness=datetime.timedelta(hours=5))
+    windows = [w for i in range(0, 40, 4) for w in late.update_many(RecordBatch.from_records(shuffled[i:i + 4]))] + late.flush()
+    assert late.late_records == 0 and summarize(windows) == expected(datetime.timedelta(hours=1), datetime.timedelta(hours=1))
+    bounded = WindowedAggregator('minute', allowed_lateness=datetime.timedelta(days=1), max_open_windows=3)
+    assert len(bounded.update_many(records[:5])) == 2 and len(bounded.windows) == 3
+    assert bounded.update(records[0]) == [] and bounded.late_records == 1
+
+def test_out_of_core_state_matches_in_memory(tmp_path):
+    import datetime
+    import math
+    import numpy as np
+    from src.calculations.aggregation import GroupAggregator, SummaryAggregator
+    from src.calculations.external import ExactQuantiles, SpillingGroupAggregator
+    from src.data_processing.record_batch import RecordBatch
+    rng = np.random.default_rng(7)
+    values = np.concatenate([rng.normal(size=5000), [0.0, -0.0, 3.0, 3.0]])
+    in_memory, spilled = ExactQuantiles(), ExactQuantiles(memory_budget=4000, spill_dir=str(tmp_path))
+    for chunk in np.array_split(values, 23):
+        in_memory.update_many(chunk)
+        spilled.update_many(chunk)
+    qs = [0, 0.1, 0.5, 0.999, 1]
+    assert spilled.spilled_runs > 1 and spilled.quantiles(qs) == in_memory.quantiles(qs)
+    assert [in_memory.quantile(q) for q in qs] == pytest.approx(np.quantile(values, qs).tolist(), abs=1e-12)
+    assert math.isnan(ExactQuantiles().quantile(0.5))
+    halves = [ExactQuantiles(memory_budget=400, spill_dir=str(tmp_path)) for _ in range(2)]
+    for half, chunk in zip(halves, np.array_split(np.arange(200.0), 2)):
+        half.update_many(chunk)
+    merged = halves[0].merge(halves[1])
+    assert merged.count == 200 and merged.quantile(0.5) == 99.5 # Runs taken over from a spilled instance count too
+
+    records = [
+        {'id': i, 'name': f"Item {rng.integers(0, 400)}", 'value': float(rng.normal()), 'category': 'FRUIT', 'timestamp': datetime.datetime(2023, 1, 1)}
+        for i in range(1, 4001)
+    ]
+    batches = [RecordBatch.from_records(records[start:start + 250]) for start in range(0, 4000, 250)]
+    groups, spilling = GroupAggregator('name'), SpillingGroupAggregator('name', memory_budget=20000, spill_dir=str(tmp_path))
+    for batch in batches:
+        groups.update_many(batch)
+        spilling.update_many(batch)
+    assert spilling.spilled
+    assert list(spilling.results().items()) == list(groups.results().items()) # Same values and first-seen order
+    assert not spilling.spilled # Results merged the spill files back into memory
+
+    expected = SummaryAggregator(group_key='name', exact_quantiles=[0.5, 0.75])
+    budgeted = SummaryAggregator(group_key='name', exact_quantiles=[0.5, 0.75], memory_budget=30000, spill_dir=str(tmp_path))
+    for batch in batches:
+        expected.update_many(batch)
+        budgeted.update_many(batch)
+    assert budgeted.groups.spilled and budgeted.exact.spilled_runs
+    assert list(budgeted.groups.results().items()) == list(expected.groups.results().items())
+    assert budgeted.statistics() == expected.statistics() and budgeted.statistics()['p75'] == np.quantile([r['value'] for r in records], 0.75)
+    with pytest.raises(ValueError):
+        budgeted.to_state()
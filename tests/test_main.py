@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Subsystems a plain file/dummy report never uses; they must only be imported on demand
+DEFERRED_MODULES = (
+    'asyncio',
+    'ssl',
+    'concurrent.futures.process',
+    'tracemalloc',
+    'src.data_processing.http_source',
+    'src.utils.cache',
+    'src.reporting.incremental',
+    'http.server',
+    'src.reporting.server',
+)
+
+# Budget for `import src.main`, including numpy; about 0.1 s on a developer machine
+IMPORT_BUDGET_SECONDS = 0.5
+
+def _run_python(code, *flags):
+    env = {**os.environ, 'PYTHONPATH': REPO_ROOT}
+    return subprocess.run([sys.executable, *flags, '-c', code], cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True)
+
+def test_main_import_defers_unused_subsystems():
+    result = _run_python(f"import sys, src.main; print([m for m in {DEFERRED_MODULES!r} if m in sys.modules])")
+    assert result.stdout.strip() == "[]"
+
+def test_main_import_time_within_budget():
+    timings = []
+    for _ in range(3):
+        stderr = _run_python("import src.main", '-X', 'importtime').stderr
+        # Last line: "import time: <self us> | <cumulative us> | src.main"
+        cumulative_us = int(stderr.strip().splitlines()[-1].split('|')[1])
+        timings.append(cumulative_us / 1e6)
+    assert min(timings) < IMPORT_BUDGET_SECONDS, f"import src.main took {min(timings):.3f}s"
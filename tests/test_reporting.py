@@ -0,0 +1,252 @@
+import pytest
+from src.reporting import generator
+
+@pytest.fixture
+def csv_source(tmp_path):
+    rows = [
+        "1,Apple,10,fruit,2023-01-01T00:00:00",
+        "2,Oat,20,grain,2023-01-01T01:00:00",
+        "3,Pear,30,fruit,2023-01-01T02:00:00",
+    ]
+    path = tmp_path / "data.csv"
+    path.write_text("id,name,value,category,timestamp\n" + "\n".join(rows) + "\n", encoding='utf-8')
+    return str(path)
+
+def test_generate_summary_report(csv_source):
+    report = generator.ReportGenerator(data_source=csv_source).generate_summary_report()
+    assert "- Processed records: 3" in report
+    assert "- Total value: 60.00" in report
+    assert "- Weighted average by id: 23.33" in report
+    assert "Std Dev: 10.00" in report
+    assert "P50:     20.00" in report
+    assert "- FRUIT (2)" in report
+
+def test_generate_summary_report_no_data():
+    report = generator.ReportGenerator(data_source="nowhere").generate_summary_report()
+    assert "Failed - No Data" in report
+
+def _report_body(report):
+    # Drop the timestamp line, which differs between runs
+    return [line for line in report.splitlines() if not line.startswith("Timestamp:")]
+
+def test_incremental_report_matches_full_recompute(csv_source, tmp_path):
+    state_path = str(tmp_path / "state.json")
+    incremental = generator.ReportGenerator(data_source=csv_source, report_config={'state_path': state_path})
+    incremental.generate_summary_report()
+
+    with open(csv_source, 'a', encoding='utf-8') as f:
+        f.write("4,Milk,-5.5,dairy,2023-01-02T00:00:00\n5,Rye,12,grain,2023-01-02T01:00:0")  # last line unterminated
+
+    full = generator.ReportGenerator(data_source=csv_source).generate_summary_report()
+    assert _report_body(incremental.generate_summary_report()) == _report_body(full)
+    assert "- Processed records: 4" in full  # the half-written row does not parse yet
+
+    with open(csv_source, 'a', encoding='utf-8') as f:
+        f.write("0\n6,Kale,7,vegetable,2023-01-03T00:00:00\n")
+    full = generator.ReportGenerator(data_source=csv_source).generate_summary_report()
+    assert _report_body(incremental.generate_summary_report()) == _report_body(full)
+    assert "- Processed records: 6" in full
+
+def _append_rows(path, start, count, seed):
+    import random
+    rng = random.Random(seed)
+    with open(path, 'a', encoding='utf-8') as f:
+        for i in range(start, start + count):
+            f.write(f"{i},Item {rng.randint(0, 500)},{rng.lognormvariate(4.0, 1.0):.4f},{rng.choice(['fruit', 'grain', 'dairy'])},2023-01-01T00:00:00\n")
+
+def test_incremental_report_matches_full_recompute_at_scale(tmp_path):
+    source = tmp_path / "large.csv"
+    source.write_text("id,name,value,category,timestamp\n", encoding='utf-8')
+    _append_rows(source, 1, 12_345, seed=1) # Not a multiple of the batch or t-digest buffer size
+    config = {'state_path': str(tmp_path / "state.json")}
+    generator.ReportGenerator(data_source=str(source), report_config=config).generate_summary_report()
+
+    _append_rows(source, 12_346, 9_876, seed=2)
+    incremental = _report_body(generator.ReportGenerator(data_source=str(source), report_config=config).generate_summary_report())
+    full = _report_body(generator.ReportGenerator(data_source=str(source)).generate_summary_report())
+    assert "- Processed records: 22221" in full and any("P99" in line for line in full)
+    for resumed_line, full_line in zip(incremental, full):
+        assert resumed_line == full_line
+    assert len(incremental) == len(full)
+
+def test_incremental_state_discarded_when_file_rewritten(csv_source, tmp_path):
+    from src.reporting.incremental import IncrementalState
+    from src.calculations.aggregation import SummaryAggregator
+    state_path = str(tmp_path / "state.json")
+    generator.ReportGenerator(data_source=csv_source, report_config={'state_path': state_path}).generate_summary_report()
+    aggregator, offset = IncrementalState(state_path, csv_source).load(SummaryAggregator())
+    assert aggregator.records == 3 and offset > 0
+
+    with open(csv_source, 'w', encoding='utf-8') as f:
+        f.write("id,name,value,category,timestamp\n9,Fig,1,fruit,2023-01-01T00:00:00\n9,Fig,1,fruit,2023-01-01T00:00:00\n")
+    aggregator, offset = IncrementalState(state_path, csv_source).load(SummaryAggregator())
+    assert (aggregator.records, offset) == (0, 0)
+
+def test_report_cache_hits_and_invalidation(csv_source, tmp_path):
+    from src.utils.cache import TieredCache
+    cache = TieredCache(cache_dir=str(tmp_path / "cache"))
+    config = {'cache': cache}
+    first = generator.ReportGenerator(data_source=csv_source, report_config=config).generate_summary_report()
+    second = generator.ReportGenerator(data_source=csv_source, report_config=config).generate_summary_report()
+    assert _report_body(first) == _report_body(second)
+    assert cache.stats()['memory_hits'] == 1
+
+    # A different report config must not reuse the cached sections
+    generator.ReportGenerator(data_source=csv_source, report_config={'cache': cache, 'top_n_categories': 1}).generate_summary_report()
+    assert cache.stats()['memory_hits'] == 2  # parsed data reused, sections recomputed
+
+    with open(csv_source, 'a', encoding='utf-8') as f:
+        f.write("4,Milk,40,dairy,2023-01-02T00:00:00\n")
+    updated = generator.ReportGenerator(data_source=csv_source, report_config=config).generate_summary_report()
+    assert "- Processed records: 4" in updated
+    assert cache.stats()['invalidations'] > 0
+
+def test_report_cache_does_not_change_results(tmp_path):
+    from src.utils.cache import TieredCache
+    source = tmp_path / "large.csv"
+    source.write_text("id,name,value,category,timestamp\n", encoding='utf-8')
+    _append_rows(source, 1, 23_456, seed=3) # Spans several parser batches
+    config = {'group_by': 'category'}
+    uncached = generator.ReportGenerator(data_source=str(source), report_config=config).generate_summary_report()
+    cache = TieredCache(cache_dir=str(tmp_path / "cache"))
+    cached = generator.ReportGenerator(data_source=str(source), report_config=dict(config, cache=cache)).generate_summary_report()
+    assert _report_body(cached) == _report_body(uncached) # Built from the whole source parsed as one batch
+    reused = generator.ReportGenerator(data_source=str(source), report_config=dict(config, cache=cache)).aggregate()
+    fresh = generator.ReportGenerator(data_source=str(source), report_config=config).aggregate()
+    assert cache.stats()['memory_hits'] == 1 # The parsed data came from the cache
+    assert reused.statistics() == fresh.statistics() and reused.groups.results() == fresh.groups.results()
+
+def test_report_with_approximate_categories(csv_source):
+    config = {'top_n_categories': 1, 'category_error_rate': 0.01}
+    report = generator.ReportGenerator(data_source=csv_source, report_config=config).generate_summary_report()
+    assert "- FRUIT (2)" in report
+    assert "- Category count max overestimate: 0" in report
+
+def test_report_includes_transform_stage_when_enabled(csv_source, tmp_path):
+    from src.utils.instrumentation import Instrumentation
+    instrumentation = Instrumentation()
+    config = {'enable_advanced_calculations': True, 'calculator_exponent': 2, 'instrumentation': instrumentation}
+    report = generator.ReportGenerator(data_source=csv_source, report_config=config).generate_summary_report()
+    assert "- Sample transformed record: {" in report
+    assert "  value_transformed: 100.0" in report
+    assert instrumentation.stages['parse'].rows_in == 3 # The sample comes from the aggregation pass
+    # The sample survives incremental state, so resumed reports match a full recompute
+    incremental = {'enable_advanced_calculations': True, 'calculator_exponent': 2, 'state_path': str(tmp_path / "state.json")}
+    for _ in range(2):
+        resumed = generator.ReportGenerator(data_source=csv_source, report_config=incremental).generate_summary_report()
+        assert _report_body(resumed) == _report_body(report)
+
+def test_report_records_stage_metrics(csv_source, tmp_path):
+    from src.utils.instrumentation import Instrumentation
+    with open(csv_source, 'a', encoding='utf-8') as f:
+        f.write("4,Bad,n/a,fruit,2023-01-02T00:00:00\n")
+    instrumentation = Instrumentation()
+    prom_path = tmp_path / "report.prom"
+    config = {'instrumentation': instrumentation, 'metrics_prometheus_path': str(prom_path)}
+    generator.ReportGenerator(data_source=csv_source, report_config=config).generate_summary_report()
+
+    stages = instrumentation.stages
+    for name in ('load', 'parse', 'validate', 'aggregate', 'calculate.total_value', 'calculate.value_statistics', 'render', 'report'):
+        assert name in stages, name
+    assert stages['parse'].rows_in == 4 and stages['parse'].rows_out == 3
+    assert sum(stages['parse'].rejected.values()) == 1
+    assert 'report_stage_wall_seconds_total{stage="render"}' in prom_path.read_text()
+
+def test_batch_reports_isolate_failures_and_roll_up(csv_source, tmp_path):
+    from src.reporting.batch import BatchReportGenerator
+    second = tmp_path / "second.csv"
+    second.write_text("id,name,value,category,timestamp\n4,Milk,40,dairy,2023-01-02T00:00:00\n", encoding='utf-8')
+    sources = [csv_source, str(tmp_path / "missing.csv"), str(second), "dummy"]
+
+    batch = BatchReportGenerator(sources, max_concurrency=3).run()
+    assert [r.source for r in batch.results] == sources
+    assert [r.source for r in batch.failures] == [str(tmp_path / "missing.csv")]
+    assert _report_body(batch.report_for(csv_source)) == _report_body(generator.ReportGenerator(data_source=csv_source).generate_summary_report())
+    dummy_records = batch.results[3].aggregator.records
+    assert batch.combined.records == 3 + 1 + dummy_records
+    assert f"- Processed records: {4 + dummy_records}" in batch.combined_report
+
+    threaded = BatchReportGenerator(sources[:3], use_processes=False).run()
+    assert threaded.combined.total_value() == 100.0
+    exact = BatchReportGenerator(sources[:3], report_config={'exact_quantiles': [0.5], 'memory_budget': 10000, 'spill_dir': str(tmp_path)}).run()
+    assert exact.combined.exact is not None and exact.combined.statistics()['p50'] == 25.0
+
+def test_batch_reports_keep_incremental_state_per_source(csv_source, tmp_path, caplog):
+    import os
+    from src.reporting.batch import BatchReportGenerator, source_state_path
+    sources = []
+    for name in ("a.csv", "b.csv", "c.csv"):
+        path = tmp_path / name
+        path.write_text(open(csv_source, encoding='utf-8').read(), encoding='utf-8')
+        sources.append(str(path))
+    state_path = str(tmp_path / "state.json")
+    first = BatchReportGenerator(sources, report_config={'state_path': state_path}).run()
+    assert all(os.path.exists(source_state_path(state_path, source)) for source in sources) and not os.path.exists(state_path)
+    caplog.clear()
+    second = BatchReportGenerator(sources, report_config={'state_path': state_path}, use_processes=False).run()
+    assert "Discarding incremental state" not in caplog.text # Each source resumed from its own state
+    assert [_report_body(r.report) for r in second.results] == [_report_body(r.report) for r in first.results]
+
+def test_report_group_by_section(csv_source):
+    report = generator.ReportGenerator(data_source=csv_source, report_config={'group_by': 'category'}).generate_summary_report()
+    assert "- Statistics by category:" in report
+    assert "    - FRUIT: count 2, sum 40.00, min 10.00, max 30.00, mean 20.00, std dev 14.14, weighted avg 25.00" in report
+    limited = generator.ReportGenerator(data_source=csv_source, report_config={'group_by': 'name', 'group_by_limit': 1}).generate_summary_report()
+    assert "    ... 2 more groups" in limited
+
+def test_report_server_serves_warm_reports_and_refreshes(csv_source, tmp_path):
+    import json
+    import os
+    import socket
+    import threading
+    import urllib.error
+    import urllib.request
+    from src.reporting.server import ReportService, ReportServer
+
+    service = ReportService([csv_source, "dummy"])
+    service.warm()
+    assert service.status()['sources'][csv_source]['records'] == 3
+    server = ReportServer(service, port=0, max_workers=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        base = "http://%s:%d" % server.address
+        with urllib.request.urlopen(f"{base}/report?source={csv_source}") as response:
+            assert "- Processed records: 3" in response.read().decode('utf-8')
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{base}/report?source=/etc/passwd") # Only configured sources are served
+        assert error.value.code == 404
+
+        with open(csv_source, 'a', encoding='utf-8') as f:
+            f.write("4,Milk,40,dairy,2023-01-02T00:00:00\n")
+        os.utime(csv_source, ns=(0, os.stat(csv_source).st_mtime_ns + 1))
+        with urllib.request.urlopen(urllib.request.Request(f"{base}/refresh", method='POST')) as response:
+            assert json.loads(response.read()) == {'refreshed': [csv_source]} # The dummy source is unchanged
+        assert "- Processed records: 4" in service.report(csv_source)
+        with urllib.request.urlopen(f"{base}/health") as response:
+            assert json.loads(response.read())['sources'][csv_source]['records'] == 4
+    finally:
+        server.shutdown()
+        thread.join()
+
+    socket_path = str(tmp_path / "reports.sock")
+    unix_server = ReportServer(service, socket_path=socket_path)
+    thread = threading.Thread(target=unix_server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_path)
+            client.sendall(b"GET /report?source=dummy HTTP/1.0\r\n\r\n")
+            response = b"".join(iter(lambda: client.recv(65536), b""))
+        assert response.startswith(b"HTTP/1.0 200") and b"- Processed records: 4" in response
+    finally:
+        unix_server.shutdown()
+        thread.join()
+    assert not os.path.exists(socket_path)
+
+def test_report_with_memory_budget_matches_in_memory(csv_source, tmp_path):
+    config = {'group_by': 'name', 'exact_quantiles': [0.5, 0.9]}
+    expected = generator.ReportGenerator(data_source=csv_source, report_config=config).generate_summary_report()
+    assert "P90:     28.00" in expected # Exact, interpolated like numpy.quantile
+    budgeted = generator.ReportGenerator(data_source=csv_source, report_config={**config, 'memory_budget': 1, 'spill_dir': str(tmp_path / "spill")})
+    assert _report_body(budgeted.generate_summary_report()) == _report_body(expected)
@@ -43,4 +43,118 @@ def test_divide():
 
 def test_power():
     assert math_utils.power(2, 3) == 8
-    assert math_utils.power(5, 0) == 1 
\ No newline at end of file
+    assert math_utils.power(5, 0) == 1 
+
+def test_tiered_cache_lru_disk_and_invalidation(tmp_path):
+    from src.utils.cache import TieredCache
+    cache = TieredCache(max_memory_entries=2, cache_dir=str(tmp_path / "cache"))
+    cache.set('a', 1, tag='src', version='v1')
+    cache.set('b', 2, tag='src', version='v1')
+    cache.set('c', 3, tag='other', version='v1')
+    assert cache.stats()['memory_entries'] == 2  # 'a' evicted from memory...
+    assert cache.get('a') == 1                   # ...but still on disk
+    assert cache.get('missing') is None
+    stats = cache.stats()
+    assert (stats['memory_hits'], stats['disk_hits'], stats['misses']) == (0, 1, 1)
+
+    assert cache.invalidate('src', keep_version='v2') == 3  # 'a' in memory plus 'a' and 'b' on disk
+    assert cache.get('a') is None and cache.get('b') is None
+    assert cache.get('c') == 3
+
+def test_tiered_cache_disk_size_eviction(tmp_path):
+    from src.utils.cache import TieredCache
+    cache = TieredCache(max_memory_entries=1, cache_dir=str(tmp_path), max_disk_bytes=3000)
+    for i in range(5):
+        cache.set(i, b'x' * 1000)
+    assert cache.stats()['disk_bytes'] <= 3000
+    assert cache.get(4) == b'x' * 1000
+    assert cache.get(0) is None
+
+def test_file_fingerprint_changes_with_content(tmp_path):
+    from src.utils.cache import file_fingerprint
+    path = tmp_path / "data.csv"
+    path.write_text("id\n1\n")
+    first = file_fingerprint(str(path))
+    assert file_fingerprint(str(path)) == first
+    path.write_text("id\n2\n")
+    assert file_fingerprint(str(path)) != first
+
+def test_vector2d_uses_slots():
+    v = math_utils.Vector2D(3, 4)
+    assert not hasattr(v, '__dict__')
+    with pytest.raises(AttributeError):
+        v.z = 1
+
+def test_vector2d_array_batched_operations():
+    import numpy as np
+    vectors = [math_utils.Vector2D(3, 4), math_utils.Vector2D(-1, 0), math_utils.Vector2D(0.5, 2)]
+    arr = math_utils.Vector2DArray.from_vectors(vectors)
+    other = math_utils.Vector2DArray([1, 1, 1], [2, 2, 2])
+
+    assert np.allclose((arr + other).x, [4, 0, 1.5])
+    assert np.allclose((arr - math_utils.Vector2D(1, 1)).y, [3, -1, 1])
+    assert np.allclose((2 * arr).x, [6, -2, 1])
+    assert np.allclose(arr.dot(other), [v.dot_product(math_utils.Vector2D(1, 2)) for v in vectors])
+    assert np.allclose(arr.magnitude(), [v.magnitude() for v in vectors])
+    assert np.allclose(arr.normalize().magnitude(), 1.0)
+    total = arr.sum()
+    assert (total.x, total.y) == (2.5, 6.0)
+    assert arr[0].magnitude() == 5.0 and len(arr[1:]) == 2
+    with pytest.raises(ValueError):
+        math_utils.Vector2DArray.zeros(2).normalize()
+
+def test_calculate_vector_sum_accepts_lists_and_arrays():
+    from src.calculations.core import AdvancedCalculator
+    calculator = AdvancedCalculator()
+    vectors = [math_utils.Vector2D(1, 2), "not a vector", math_utils.Vector2D(3, -1)]
+    from_list = calculator.calculate_vector_sum(vectors)
+    from_array = calculator.calculate_vector_sum(math_utils.Vector2DArray.from_vectors(vectors[::2]))
+    assert (from_list.x, from_list.y) == (from_array.x, from_array.y) == (4.0, 1.0)
+
+def test_instrumentation_accumulates_stages_and_exports(tmp_path):
+    import json
+    from src.utils.instrumentation import Instrumentation, NULL_INSTRUMENTATION
+    seen = []
+    instrumentation = Instrumentation(track_memory=True, callbacks=[seen.append])
+    for rows in (10, 5):
+        with instrumentation.stage('parse', rows_in=rows) as stage:
+            stage.rows_out = rows - 1
+            stage.rejected['invalid_value'] += 1
+            [0] * 10000
+    instrumentation.record('validate', wall_seconds=0.5, rejected={'unknown_category': 2})
+
+    parse = instrumentation.stages['parse']
+    assert (parse.calls, parse.rows_in, parse.rows_out) == (2, 15, 13)
+    assert parse.rejected['invalid_value'] == 2 and parse.peak_memory_bytes > 0
+    assert [m.name for m in seen] == ['parse', 'parse', 'validate']
+
+    text = instrumentation.to_prometheus(prefix='report')
+    assert 'report_stage_rows_in_total{stage="parse"} 15' in text
+    assert 'report_stage_rows_rejected_total{stage="validate",reason="unknown_category"} 2' in text
+    json_path = tmp_path / "metrics.json"
+    instrumentation.write_json(str(json_path))
+    assert {s['stage'] for s in json.loads(json_path.read_text())['stages']} == {'parse', 'validate'}
+
+    with NULL_INSTRUMENTATION.stage('parse', rows_in=3) as stage:
+        stage.rows_out = 3
+    assert NULL_INSTRUMENTATION.to_dict() == {'stages': []}
+
+def test_sanitize_string_fast_path_matches_regex():
+    import re
+    samples = ["Hello! World? 123.", "\tTabs\x1c and\x0b odd\x7f bytes ", "Café Ünïcode ½", "a_b-c", "", "  "]
+    for text in samples + [chr(i) * 2 for i in range(160)]:
+        assert string_utils.sanitize_string(text) == re.sub(r'[^a-zA-Z0-9\s]', '', text).strip(), repr(text)
+    with pytest.raises(TypeError):
+        string_utils.sanitize_string(None)
+
+def test_normalize_name_is_memoized_and_interned():
+    string_utils.clear_normalization_cache()
+    first = string_utils.normalize_name(" apple  PIE! ")
+    second = string_utils.normalize_name(" apple  PIE! ")
+    assert first == "Apple Pie" and first is second
+    assert string_utils.normalize_name("apple pie") is first # Different raw names share the interned result
+    stats = string_utils.normalization_stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (1, 2, 2)
+    assert stats['hit_rate'] == pytest.approx(1 / 3)
+    with pytest.raises(TypeError):
+        string_utils.normalize_name(['not', 'hashable'])